@@ -0,0 +1,367 @@
+import asyncio
+import logging
+import re
+import sqlite3
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Protocol
+
+from app.indexes import FacetIndex, IdIndex, MonthIndex, SortedIndex, SortKey
+from app.pagination import decode_cursor, encode_cursor, paginate
+from app.store import StoreIndex
+
+logger: logging.Logger = logging.getLogger("uvicorn.error")
+
+# joins the parts of a sort key; sorts below any character a key part holds,
+# so joined keys order exactly like the tuples
+KEY_SEPARATOR: str = "\x00"
+
+IDENTIFIER: re.Pattern[str] = re.compile(r"[a-z_][a-z0-9_]*")
+
+
+@dataclass(frozen=True)
+class QuerySpec:
+    """How a collection is listed: its sort key, equality facets and date."""
+
+    key: Callable[[Any], SortKey]
+    facets: dict[str, Callable[[Any], str]] = field(default_factory=dict)
+    date_of: Callable[[Any], date] | None = None
+
+
+class QueryBackend(Protocol):
+    """The list, filter and calendar queries routes run against a collection."""
+
+    def add_collection(self, name: str, spec: QuerySpec) -> list[StoreIndex]:
+        """Set up a collection and return the indexes its store must feed."""
+        ...
+
+    async def page(
+        self,
+        name: str,
+        *,
+        lo: SortKey | None = None,
+        hi: SortKey | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        descending: bool = False,
+        where: dict[str, str] | None = None,
+    ) -> tuple[list[Any], str | None]:
+        """Return one page of items in sort-key order, as pagination.paginate."""
+        ...
+
+    async def month_dates(self, name: str, year: int, month: int) -> list[date]:
+        """Return the distinct dates with items in a month, in ascending order."""
+        ...
+
+    async def facet_counts(self, name: str, facet: str) -> dict[str, int]:
+        """Return the number of items per value of a facet."""
+        ...
+
+    def loaded(self) -> None:
+        """Note that the stores' initial scan has been published."""
+        ...
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+        ...
+
+
+class MemoryBackend:
+    """Answers queries from in-memory sorted, facet and month indexes."""
+
+    def __init__(self) -> None:
+        self.sorted: dict[str, SortedIndex] = {}
+        self.facets: dict[str, FacetIndex] = {}
+        self.months: dict[str, MonthIndex] = {}
+
+    def add_collection(self, name: str, spec: QuerySpec) -> list[StoreIndex]:
+        """Create the collection's in-memory indexes."""
+        indexes: list[StoreIndex] = []
+        self.sorted[name] = SortedIndex(key=spec.key)
+        indexes.append(self.sorted[name])
+        if spec.facets:
+            self.facets[name] = FacetIndex(facets=spec.facets)
+            indexes.append(self.facets[name])
+        if spec.date_of is not None:
+            self.months[name] = MonthIndex(date_of=spec.date_of)
+            indexes.append(self.months[name])
+        return indexes
+
+    async def page(
+        self,
+        name: str,
+        *,
+        lo: SortKey | None = None,
+        hi: SortKey | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        descending: bool = False,
+        where: dict[str, str] | None = None,
+    ) -> tuple[list[Any], str | None]:
+        """Bisect the sorted index, or order just the facet matches when filtered."""
+        index: SortedIndex = self.sorted[name]
+        items: list[Any] = index.items
+        if where:
+            # intersect the facet sets, then order just the matches
+            items = sorted(self.facets[name].select(**where), key=index.key)
+        return paginate(
+            items,
+            index.key,
+            lo=lo,
+            hi=hi,
+            cursor=cursor,
+            limit=limit,
+            descending=descending,
+        )
+
+    async def month_dates(self, name: str, year: int, month: int) -> list[date]:
+        """Return the month's dates from the month index."""
+        return self.months[name].dates_in(year, month)
+
+    async def facet_counts(self, name: str, facet: str) -> dict[str, int]:
+        """Return the sizes of the facet's maintained value sets."""
+        return self.facets[name].counts(facet)
+
+    def loaded(self) -> None:
+        """Nothing to do: the indexes were filled by the initial publish."""
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class SqliteBackend:
+    """Answers queries from SQLite tables mirroring each collection.
+
+    Every collection gets a table of (ID, joined sort key, date ordinal,
+    facet values) with an index per access path, kept in sync through a
+    SqliteMirror on its store. Matching rows are turned back into items
+    through the ID indexes, so the items stay resident in their stores as
+    with MemoryBackend; the tables stand in for its sorted lists, facet sets
+    and month indexes. A filtered page walks a (facet, sort key) index for
+    just the rows it returns instead of sorting every facet match, and a
+    change is a B-tree update instead of an insert into a list of every item.
+
+    The markdown files stay the source of truth. Tables persist across
+    restarts: the first change a store publishes (its whole initial scan)
+    is reconciled with the rows on disk, rewriting only those that differ,
+    and a table is recreated when its columns change. All database work runs
+    in order on one worker thread, so it never blocks the event loop and a
+    query sees every change published before it.
+    """
+
+    def __init__(self, path: Path, ids: dict[str, IdIndex]) -> None:
+        self.path: Path = path
+        self.ids: dict[str, IdIndex] = ids
+        self.specs: dict[str, QuerySpec] = {}
+        # collections whose persisted rows wait for their store's first change;
+        # only touched on the database thread
+        self._unsynced: set[str] = set()
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="index-db"
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps the file consistent; a commit lost to a power cut is
+        # repaired by the reconcile on the next start
+        self._db.execute("PRAGMA synchronous=NORMAL")
+
+    def add_collection(self, name: str, spec: QuerySpec) -> list[StoreIndex]:
+        """Create or reuse the collection's table and indexes and return its mirror."""
+        for identifier in (name, *spec.facets):
+            if not IDENTIFIER.fullmatch(identifier):
+                raise ValueError(f"invalid collection or facet name: {identifier}")
+        self.specs[name] = spec
+        self._executor.submit(self._create, name, spec).result()
+        return [SqliteMirror(self, name)]
+
+    def _create(self, name: str, spec: QuerySpec) -> None:
+        """Set up a table, dropping a persisted one only if its columns differ."""
+        columns: str = "".join(f", f_{facet} TEXT" for facet in spec.facets)
+        create: str = (
+            f"CREATE TABLE {name} (id TEXT NOT NULL, sort_key TEXT NOT NULL, "
+            f"day INTEGER{columns})"
+        )
+        row: tuple | None = self._db.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        statements: list[str] = []
+        if row is None or row[0] != create:
+            statements += [f"DROP TABLE IF EXISTS {name}", create]
+        statements += [
+            f"CREATE INDEX IF NOT EXISTS {name}_sort ON {name} (sort_key)",
+            *(
+                f"CREATE INDEX IF NOT EXISTS {name}_{facet} "
+                f"ON {name} (f_{facet}, sort_key)"
+                for facet in spec.facets
+            ),
+        ]
+        if spec.date_of is not None:
+            statements.append(f"CREATE INDEX IF NOT EXISTS {name}_day ON {name} (day)")
+        with self._db:
+            for statement in statements:
+                self._db.execute(statement)
+        self._unsynced.add(name)
+
+    def _rows(self, spec: QuerySpec, items: list[Any]) -> list[tuple]:
+        """Return the table rows of items."""
+        return [
+            (
+                item.id,
+                KEY_SEPARATOR.join(spec.key(item)),
+                spec.date_of(item).toordinal() if spec.date_of else None,
+                *(value(item) for value in spec.facets.values()),
+            )
+            for item in items
+        ]
+
+    def write(self, name: str, removed: list[Any], added: list[Any]) -> None:
+        """Queue the removal of removed items' rows and the insert of added ones."""
+        self._executor.submit(self._write, name, removed, added)
+
+    def _write(self, name: str, removed: list[Any], added: list[Any]) -> None:
+        """Apply one published change to the table on the database thread."""
+        spec: QuerySpec = self.specs[name]
+        try:
+            with self._db:
+                if name in self._unsynced:
+                    # the store started empty, so this change is all it holds
+                    self._reconcile(name, self._rows(spec, added))
+                    return
+                self._db.executemany(
+                    f"DELETE FROM {name} WHERE rowid = (SELECT rowid FROM {name} "
+                    "WHERE sort_key = ? AND id = ? LIMIT 1)",
+                    [(KEY_SEPARATOR.join(spec.key(item)), item.id) for item in removed],
+                )
+                self._insert(name, self._rows(spec, added))
+        except sqlite3.Error:
+            logger.exception("Failed to mirror %s changes into %s", name, self.path)
+
+    def _insert(self, name: str, rows: list[tuple]) -> None:
+        """Insert rows into a table; callers hold a transaction."""
+        if rows:
+            placeholders: str = ", ".join("?" * len(rows[0]))
+            self._db.executemany(f"INSERT INTO {name} VALUES ({placeholders})", rows)
+
+    def _reconcile(self, name: str, rows: list[tuple]) -> None:
+        """Make a persisted table hold exactly rows, touching only the differences."""
+        self._unsynced.discard(name)
+        wanted: Counter[tuple] = Counter(rows)
+        stale: list[tuple[int]] = []
+        for rowid, *row in self._db.execute(f"SELECT rowid, * FROM {name}"):
+            if wanted[tuple(row)] > 0:
+                wanted[tuple(row)] -= 1
+            else:
+                stale.append((rowid,))
+        self._db.executemany(f"DELETE FROM {name} WHERE rowid = ?", stale)
+        self._insert(name, list(wanted.elements()))
+
+    def loaded(self) -> None:
+        """Empty the tables of stores whose initial scan published nothing."""
+        self._executor.submit(self._reconcile_unsynced)
+
+    def _reconcile_unsynced(self) -> None:
+        """Reconcile the tables still waiting for a change with no rows."""
+        try:
+            with self._db:
+                for name in list(self._unsynced):
+                    self._reconcile(name, [])
+        except sqlite3.Error:
+            logger.exception("Failed to reconcile the tables in %s", self.path)
+
+    async def _select(self, sql: str, params: list[Any]) -> list[tuple]:
+        """Run a read query on the database thread, after the queued writes."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: self._db.execute(sql, params).fetchall()
+        )
+
+    async def page(
+        self,
+        name: str,
+        *,
+        lo: SortKey | None = None,
+        hi: SortKey | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+        descending: bool = False,
+        where: dict[str, str] | None = None,
+    ) -> tuple[list[Any], str | None]:
+        """Select one page of IDs by sort-key range and facets, then resolve them."""
+        spec: QuerySpec = self.specs[name]
+        conditions: list[str] = []
+        params: list[Any] = []
+        if lo is not None:
+            conditions.append("sort_key >= ?")
+            params.append(KEY_SEPARATOR.join(lo))
+        if hi is not None:
+            conditions.append("sort_key <= ?")
+            params.append(KEY_SEPARATOR.join(hi))
+        if cursor is not None:
+            conditions.append("sort_key < ?" if descending else "sort_key > ?")
+            params.append(KEY_SEPARATOR.join(decode_cursor(cursor)))
+        for facet, value in (where or {}).items():
+            if facet not in spec.facets:
+                raise ValueError(f"unknown facet: {facet}")
+            conditions.append(f"f_{facet} = ?")
+            params.append(value)
+
+        sql: str = f"SELECT id FROM {name}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY sort_key {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            # one extra row tells whether there is a next page
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        rows: list[tuple] = await self._select(sql, params)
+        ids: IdIndex = self.ids[name]
+        items: list[Any] = [
+            item for (item_id,) in rows if (item := ids.get(item_id)) is not None
+        ]
+        if limit is not None and len(items) > limit:
+            return items[:limit], encode_cursor(spec.key(items[limit - 1]))
+        return items, None
+
+    async def month_dates(self, name: str, year: int, month: int) -> list[date]:
+        """Select the month's distinct date ordinals through the day index."""
+        first: int = date(year, month, 1).toordinal()
+        end: int = (
+            date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        ).toordinal()
+        rows = await self._select(
+            f"SELECT DISTINCT day FROM {name} WHERE day >= ? AND day < ? ORDER BY day",
+            [first, end],
+        )
+        return [date.fromordinal(day) for (day,) in rows]
+
+    async def facet_counts(self, name: str, facet: str) -> dict[str, int]:
+        """Count rows per facet value over the facet's index."""
+        if facet not in self.specs[name].facets:
+            raise ValueError(f"unknown facet: {facet}")
+        rows = await self._select(
+            f"SELECT f_{facet}, COUNT(*) FROM {name} GROUP BY f_{facet}", []
+        )
+        return dict(rows)
+
+    def close(self) -> None:
+        """Finish the queued writes, then close the database connection."""
+        self._executor.submit(self._db.close)
+        self._executor.shutdown(wait=True)
+
+
+@dataclass
+class SqliteMirror(StoreIndex[Any]):
+    """Feeds one store's item changes into its SqliteBackend table."""
+
+    backend: SqliteBackend
+    name: str
+
+    def update(self, removed: list[Any], added: list[Any]) -> None:
+        """Queue the removed and added items for the table."""
+        self.backend.write(self.name, removed, added)
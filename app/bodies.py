@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+
+import frontmatter
+
+from app import fast_frontmatter
+
+logger: logging.Logger = logging.getLogger("uvicorn.error")
+
+
+@dataclass(frozen=True, slots=True)
+class BodyRef:
+    """Where a markdown body sits in its file, and the file it was parsed from.
+
+    The stat signature lets a read notice that the file was replaced since.
+    """
+
+    path: Path
+    offset: int
+    length: int
+    mtime_ns: int
+    size: int
+    inode: int
+
+
+class BodyCache:
+    """LRU cache of decoded bodies, bounded by their total length in characters."""
+
+    def __init__(self, max_chars: int) -> None:
+        self.max_chars: int = max_chars
+        self._bodies: OrderedDict[BodyRef, str] = OrderedDict()
+        self._chars: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def get(self, ref: BodyRef) -> str | None:
+        """Return a cached body, marking it as recently used."""
+        with self._lock:
+            body = self._bodies.get(ref)
+            if body is not None:
+                self._bodies.move_to_end(ref)
+            return body
+
+    def put(self, ref: BodyRef, body: str) -> None:
+        """Cache a body, evicting the least recently used ones over the limit."""
+        if len(body) > self.max_chars:
+            return
+        with self._lock:
+            if ref in self._bodies:
+                return
+            self._bodies[ref] = body
+            self._chars += len(body)
+            while self._chars > self.max_chars:
+                _, evicted = self._bodies.popitem(last=False)
+                self._chars -= len(evicted)
+
+
+# None keeps bodies resident as str; otherwise parsed items hold a BodyRef
+_cache: BodyCache | None = None
+
+
+def configure(lazy: bool, cache_chars: int = 8 * 1024 * 1024) -> None:
+    """Select whether parsed items keep their bodies in memory or read them lazily."""
+    global _cache
+    _cache = BodyCache(cache_chars) if lazy else None
+
+
+def load(md_path: Path, flat: bool = True) -> tuple[frontmatter.Post, str | BodyRef]:
+    """Read and parse a markdown file, returning its post and body.
+
+    In lazy mode the body is a BodyRef into the file (the post's content is
+    only held until the caller is done with the post); otherwise, and for
+    files only python-frontmatter understands, it is the content itself.
+    """
+    if _cache is None:
+        post: frontmatter.Post = fast_frontmatter.load(md_path, flat=flat)
+        return post, post.content
+    with md_path.open("rb") as f:
+        st: os.stat_result = os.fstat(f.fileno())
+        raw: bytes = f.read()
+    if b"\r" in raw:
+        # text mode would translate these newlines, so offsets into the raw
+        # bytes would not give back the same body
+        post = fast_frontmatter.loads(
+            raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"), flat=flat
+        )
+        return post, post.content
+    text: str = raw.decode("utf-8")
+    post, span = fast_frontmatter.loads_with_span(text, flat=flat)
+    if span is None or not post.content:
+        return post, post.content
+    start, _ = span
+    return post, BodyRef(
+        path=md_path,
+        offset=len(text[:start].encode("utf-8")),
+        length=len(post.content.encode("utf-8")),
+        mtime_ns=st.st_mtime_ns,
+        size=st.st_size,
+        inode=st.st_ino,
+    )
+
+
+def text(body: str | BodyRef) -> str:
+    """Return a body's text, reading a BodyRef through the LRU cache."""
+    if isinstance(body, str):
+        return body
+    cache: BodyCache | None = _cache
+    cached: str | None = cache.get(body) if cache is not None else None
+    if cached is not None:
+        return cached
+    try:
+        with body.path.open("rb") as f:
+            st: os.stat_result = os.fstat(f.fileno())
+            if (st.st_mtime_ns, st.st_size, st.st_ino) != (
+                body.mtime_ns,
+                body.size,
+                body.inode,
+            ):
+                # replaced since it was parsed: the store will re-parse it
+                # shortly, until then serve the current file's body
+                return fast_frontmatter.load(body.path).content
+            f.seek(body.offset)
+            read: str = f.read(body.length).decode("utf-8")
+    except FileNotFoundError:
+        return ""
+    except Exception as e:
+        logger.warning("Failed to read body of %s: %s", body.path, e)
+        return ""
+    if cache is not None:
+        cache.put(body, read)
+    return read
+
+
+def read_all(page: Iterable[str | BodyRef]) -> dict[BodyRef, str]:
+    """Read the texts of the BodyRefs among the given bodies, keyed by ref."""
+    return {body: text(body) for body in page if isinstance(body, BodyRef)}
+
+
+async def resolve(
+    executor: Executor, page: Iterable[str | BodyRef]
+) -> Callable[[str | BodyRef], str]:
+    """Read a page's lazy bodies in the executor and return a lookup like text.
+
+    List views serialize many items at once, so their file reads are done off
+    the event loop up front; bodies outside the page fall back to text.
+    """
+    refs: list[BodyRef] = [body for body in page if isinstance(body, BodyRef)]
+    if not refs:
+        return text
+    read: dict[BodyRef, str] = await asyncio.get_running_loop().run_in_executor(
+        executor, read_all, refs
+    )
+
+    def lookup(body: str | BodyRef) -> str:
+        if isinstance(body, str):
+            return body
+        found: str | None = read.get(body)
+        return found if found is not None else text(body)
+
+    return lookup
@@ -0,0 +1,109 @@
+import bisect
+from array import array
+from collections.abc import Iterable, Iterator
+from datetime import date
+
+
+def _ordinal(day: date | str) -> int:
+    """Return the proleptic Gregorian ordinal of a date or YYYY-MM-DD string."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return day.toordinal()
+
+
+class CompletionSet:
+    """A habit's completion dates, stored as a sorted array of date ordinals.
+
+    Membership and toggles find their position by bisection, and a date
+    window is sliced out without visiting the dates outside it. Each date
+    costs 8 bytes instead of a str object.
+
+    Values that are not valid dates, such as hand-edited typos, are kept
+    as ``unparsed`` strings so that rewriting the habit does not lose them.
+    """
+
+    __slots__ = ("_ordinals", "unparsed")
+
+    def __init__(
+        self, ordinals: Iterable[int] = (), unparsed: Iterable[str] = ()
+    ) -> None:
+        self._ordinals: array = array("q", sorted(set(ordinals)))
+        self.unparsed: tuple[str, ...] = tuple(unparsed)
+
+    @classmethod
+    def from_iso(cls, values: Iterable[str | date]) -> "CompletionSet":
+        """Build a set from YYYY-MM-DD strings or dates, keeping invalid values."""
+        ordinals: list[int] = []
+        unparsed: list[str] = []
+        for value in values:
+            try:
+                ordinals.append(
+                    _ordinal(value if isinstance(value, date) else str(value))
+                )
+            except ValueError:
+                unparsed.append(str(value))
+        return cls(ordinals, unparsed)
+
+    def copy(self) -> "CompletionSet":
+        """Return an independent copy of the set."""
+        copied = CompletionSet(unparsed=self.unparsed)
+        copied._ordinals = array("q", self._ordinals)
+        return copied
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def __contains__(self, day: object) -> bool:
+        if not isinstance(day, (date, str)):
+            return False
+        try:
+            ordinal: int = _ordinal(day)
+        except ValueError:
+            return False
+        i: int = bisect.bisect_left(self._ordinals, ordinal)
+        return i < len(self._ordinals) and self._ordinals[i] == ordinal
+
+    def __iter__(self) -> Iterator[date]:
+        return map(date.fromordinal, self._ordinals)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompletionSet):
+            return NotImplemented
+        return self._ordinals == other._ordinals and self.unparsed == other.unparsed
+
+    def __repr__(self) -> str:
+        return f"CompletionSet({self.values()!r})"
+
+    def toggle(self, day: date | str) -> bool:
+        """Add the date if missing, else remove it; return True if now completed."""
+        ordinal: int = _ordinal(day)
+        i: int = bisect.bisect_left(self._ordinals, ordinal)
+        if i < len(self._ordinals) and self._ordinals[i] == ordinal:
+            del self._ordinals[i]
+            return False
+        self._ordinals.insert(i, ordinal)
+        return True
+
+    def ordinals(self, start: date | None = None, end: date | None = None) -> array:
+        """Return the ordinals of the dates in the inclusive [start, end] window."""
+        lo: int = (
+            0
+            if start is None
+            else bisect.bisect_left(self._ordinals, start.toordinal())
+        )
+        hi: int = (
+            len(self._ordinals)
+            if end is None
+            else bisect.bisect_right(self._ordinals, end.toordinal())
+        )
+        return self._ordinals[lo:hi]
+
+    def isoformats(
+        self, start: date | None = None, end: date | None = None
+    ) -> list[str]:
+        """Return the dates in the inclusive [start, end] window as YYYY-MM-DD."""
+        return [date.fromordinal(o).isoformat() for o in self.ordinals(start, end)]
+
+    def values(self) -> list[str]:
+        """Return every value as written back to disk: the dates, then the unparsed."""
+        return [*self.isoformats(), *self.unparsed]
@@ -0,0 +1,115 @@
+import re
+from pathlib import Path
+from typing import Any
+
+import frontmatter
+import yaml
+
+# the loader python-frontmatter picks too, so nested headers parse alike; the
+# speedup over frontmatter.loads comes from read_flat, not from this loader
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+# same delimiter rule as python-frontmatter's YAML handler
+FM_BOUNDARY: re.Pattern[str] = re.compile(r"^-{3,}\s*$", re.MULTILINE)
+
+# a top-level "key: value" line with nothing nested under it
+FLAT_LINE: re.Pattern[str] = re.compile(r"([A-Za-z_][A-Za-z0-9_]*):(?: (.*))?")
+
+# plain scalars simple enough to read without a YAML parser
+PLAIN_SCALAR: re.Pattern[str] = re.compile(r"[\w.(][\w .,()/+&!?'-]*")
+
+YAML_STR_TAG: str = "tag:yaml.org,2002:str"
+YAML_NULL_TAG: str = "tag:yaml.org,2002:null"
+
+_resolver = yaml.resolver.Resolver()
+
+
+def _flat_scalar(raw: str) -> tuple[bool, Any]:
+    """Decode a flat string or null value, returning (False, None) if unsure."""
+    if raw == "":
+        return True, None
+    if raw.startswith("'"):
+        inner: str = raw[1:-1]
+        if len(raw) < 2 or not raw.endswith("'") or "'" in inner.replace("''", ""):
+            return False, None
+        return True, inner.replace("''", "'")
+    if raw.endswith(" ") or not PLAIN_SCALAR.fullmatch(raw):
+        return False, None
+    tag: str = _resolver.resolve(yaml.ScalarNode, raw, (True, False))
+    if tag == YAML_STR_TAG:
+        return True, raw
+    if tag == YAML_NULL_TAG:
+        return True, None
+    return False, None
+
+
+def read_flat(fm: str) -> dict[str, Any] | None:
+    """Read frontmatter made only of top-level string and null values.
+
+    Covers what writer.py emits for media, activities, presets and tasks.
+    Returns None for anything else (nesting, numbers, double quotes, folded
+    lines, comments) so the caller can fall back to a full YAML parse.
+    """
+    data: dict[str, Any] = {}
+    for line in fm.strip().split("\n"):
+        match = FLAT_LINE.fullmatch(line)
+        if match is None:
+            return None
+        ok, value = _flat_scalar(match.group(2) or "")
+        if not ok:
+            return None
+        data[match.group(1)] = value
+    return data
+
+
+def loads_with_span(
+    text: str, flat: bool = True
+) -> tuple[frontmatter.Post, tuple[int, int] | None]:
+    """Parse like loads, also returning the body's [start, end) offsets in text.
+
+    The span is None when the file was handed to python-frontmatter.
+    """
+    stripped: str = text.strip()
+    lead: int = len(text) - len(text.lstrip())
+    opening = FM_BOUNDARY.match(stripped)
+    if opening is None:
+        return frontmatter.loads(stripped), None
+    closing = FM_BOUNDARY.search(stripped, opening.end())
+    if closing is None:
+        return frontmatter.loads(stripped), None
+    fm: str = stripped[opening.end() : closing.start()]
+
+    data: Any = read_flat(fm) if flat else None
+    if data is None:
+        try:
+            data = yaml.load(fm, Loader=YamlLoader)
+        except yaml.YAMLError:
+            return frontmatter.loads(stripped), None
+
+    rest: str = stripped[closing.end() :]
+    content: str = rest.strip()
+    start: int = lead + closing.end() + len(rest) - len(rest.lstrip())
+    post = frontmatter.Post(content)
+    if isinstance(data, dict):
+        post.metadata.update(data)
+    return post, (start, start + len(content))
+
+
+def loads(text: str, flat: bool = True) -> frontmatter.Post:
+    """Parse a markdown file's text, matching frontmatter.loads for YAML headers.
+
+    Tries the flat reader (if flat is set), then the same YAML loader as
+    python-frontmatter, and hands anything that is not a plain YAML
+    frontmatter block to python-frontmatter itself. tests/ checks the
+    results against frontmatter.loads on YAML edge cases.
+    """
+    return loads_with_span(text, flat)[0]
+
+
+def load(md_path: Path, flat: bool = True) -> frontmatter.Post:
+    """Read and parse a markdown file with frontmatter."""
+    with md_path.open("r", encoding="utf-8") as f:
+        return loads(f.read(), flat=flat)
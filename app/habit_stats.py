@@ -0,0 +1,192 @@
+from dataclasses import dataclass, field
+from datetime import date
+
+from app.completions import CompletionSet
+from app.models import Habit
+
+# trailing windows, in days ending today, that completion rates are reported for
+RATE_WINDOWS: dict[str, int] = {"weekly": 7, "monthly": 30, "yearly": 365}
+
+
+@dataclass(slots=True)
+class HabitStats:
+    """Streaks and completion rates of one habit as of a given day."""
+
+    current_streak: int
+    longest_streak: int
+    rates: dict[str, float | None]
+    as_of: date
+
+    def to_dict(self) -> dict:
+        """Convert the stats to a JSON-serializable dict."""
+        return {
+            "current_streak": self.current_streak,
+            "longest_streak": self.longest_streak,
+            **{f"{name}_rate": rate for name, rate in self.rates.items()},
+            "as_of": self.as_of.isoformat(),
+        }
+
+
+@dataclass(slots=True)
+class Schedule:
+    """When a habit is due, following the same rules as the frontend.
+
+    A day a shift moves the habit to is scheduled; otherwise a day a shift
+    moves it away from (or skips) is not; otherwise the weekday decides.
+    """
+
+    weekdays: frozenset[int]  # 0=Sun … 6=Sat, as in Habit.days
+    moved_to: frozenset[int]  # date ordinals
+    moved_from: frozenset[int]
+
+    @classmethod
+    def of(cls, habit: Habit) -> "Schedule":
+        """Build the schedule of a habit from its days and shifts."""
+        return cls(
+            weekdays=frozenset(habit.days),
+            moved_to=frozenset(
+                CompletionSet.from_iso(
+                    s.to_date for s in habit.shifts if s.to_date
+                ).ordinals()
+            ),
+            moved_from=frozenset(
+                CompletionSet.from_iso(s.from_date for s in habit.shifts).ordinals()
+            ),
+        )
+
+    def is_due(self, ordinal: int) -> bool:
+        """Return True if the habit is scheduled on the given date ordinal."""
+        if ordinal in self.moved_to:
+            return True
+        if ordinal in self.moved_from:
+            return False
+        # date.fromordinal(1) is a Monday; shift to the 0=Sunday numbering
+        return (ordinal % 7) in self.weekdays
+
+
+@dataclass
+class _Entry:
+    """Cached inputs and running totals for one habit."""
+
+    days: list[int]
+    shifts: list[tuple[str, str | None]]
+    completions: CompletionSet
+    schedule: Schedule
+    # streak state over the finished days before `through`
+    through: int = 0
+    run: int = 0
+    longest: int = 0
+    stats: HabitStats | None = field(default=None)
+
+    def matches(self, habit: Habit) -> bool:
+        """Return True if the habit's schedule and completions are unchanged."""
+        return (
+            self.days == habit.days
+            and self.shifts == [(s.from_date, s.to_date) for s in habit.shifts]
+            and (
+                self.completions is habit.completions
+                or self.completions == habit.completions
+            )
+        )
+
+
+class HabitStatsCache:
+    """Per-habit streaks and completion rates, cached until the habit changes.
+
+    An entry is kept while the habit's days, shifts and completions stay
+    equal. Streaks are accumulated day by day over finished days, so moving
+    to a new day only processes the days since the last request; a change
+    to the habit recomputes that habit alone.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, habit: Habit, today: date) -> HabitStats:
+        """Return the habit's stats as of today, computing only what changed."""
+        entry: _Entry | None = self._entries.get(habit.id)
+        if entry is None or not entry.matches(habit):
+            entry = _Entry(
+                days=list(habit.days),
+                shifts=[(s.from_date, s.to_date) for s in habit.shifts],
+                completions=habit.completions,
+                schedule=Schedule.of(habit),
+            )
+            self._entries[habit.id] = entry
+            self._reset(entry, today)
+        if entry.stats is not None and entry.stats.as_of == today:
+            return entry.stats
+
+        today_ordinal: int = today.toordinal()
+        if today_ordinal < entry.through:
+            # asked about an earlier day than the streaks were folded up to
+            self._reset(entry, today)
+        self._advance(entry, today_ordinal)
+
+        # today only counts once done, so an open day does not break a streak
+        done_today: bool = (
+            entry.schedule.is_due(today_ordinal) and today in entry.completions
+        )
+        current: int = entry.run + done_today
+        entry.stats = HabitStats(
+            current_streak=current,
+            longest_streak=max(entry.longest, current),
+            rates={
+                name: self._rate(entry, today_ordinal, days, done_today)
+                for name, days in RATE_WINDOWS.items()
+            },
+            as_of=today,
+        )
+        return entry.stats
+
+    def prune(self, habit_ids: set[str]) -> None:
+        """Drop the entries of habits that no longer exist."""
+        for habit_id in self._entries.keys() - habit_ids:
+            del self._entries[habit_id]
+
+    @staticmethod
+    def _reset(entry: _Entry, today: date) -> None:
+        """Restart the streak state at the habit's first completion."""
+        first: date | None = next(iter(entry.completions), None)
+        entry.through = min(first or today, today).toordinal()
+        entry.run = entry.longest = 0
+
+    @staticmethod
+    def _advance(entry: _Entry, today_ordinal: int) -> None:
+        """Fold the finished days from entry.through up to yesterday into the streaks."""
+        completed: set[int] = set(
+            entry.completions.ordinals(
+                date.fromordinal(entry.through), date.fromordinal(today_ordinal - 1)
+            )
+        )
+        for ordinal in range(entry.through, today_ordinal):
+            if not entry.schedule.is_due(ordinal):
+                continue
+            if ordinal in completed:
+                entry.run += 1
+                entry.longest = max(entry.longest, entry.run)
+            else:
+                entry.run = 0
+        entry.through = max(entry.through, today_ordinal)
+
+    @staticmethod
+    def _rate(
+        entry: _Entry, today_ordinal: int, days: int, done_today: bool
+    ) -> float | None:
+        """Return completed / scheduled days in the window ending today, or None."""
+        start: int = today_ordinal - days + 1
+        completed: set[int] = set(
+            entry.completions.ordinals(
+                date.fromordinal(start), date.fromordinal(today_ordinal - 1)
+            )
+        )
+        due: int = done_today
+        hits: int = done_today
+        for ordinal in range(start, today_ordinal):
+            if entry.schedule.is_due(ordinal):
+                due += 1
+                hits += ordinal in completed
+        return round(hits / due, 4) if due else None
@@ -0,0 +1,137 @@
+import hashlib
+import inspect
+import json
+import secrets
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import HTTPException, Request, Response
+
+# distinguishes generations of this process from those of a previous run
+INSTANCE: str = secrets.token_hex(4)
+
+
+@dataclass(slots=True)
+class CachedBody:
+    """An encoded JSON response body and the headers it was served with."""
+
+    etag: str
+    body: bytes
+    headers: dict[str, str]
+
+
+class ResponseCache:
+    """LRU cache of encoded collection views, each validated by its ETag.
+
+    An entry built from an older store generation no longer matches the
+    current ETag and is rebuilt on its next request.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries: int = max_entries
+        self._entries: OrderedDict[str, CachedBody] = OrderedDict()
+
+    def get(self, key: str, etag: str) -> CachedBody | None:
+        """Return the cached body for a view if it is still current."""
+        entry = self._entries.get(key)
+        if entry is None or entry.etag != etag:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CachedBody) -> None:
+        """Store a view's body, evicting the least recently used views."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def collection_etag(request: Request, names: Sequence[str], vary: str = "") -> str:
+    """Return a strong ETag built from the generations of the named stores."""
+    stores = request.app.state.stores
+    generations: str = ".".join(str(stores[name].generation) for name in names)
+    return f'"{INSTANCE}-{generations}{"-" + vary if vary else ""}"'
+
+
+def etag_matches(header: str, etag: str, strong: bool = False) -> bool:
+    """Return True if an If-None-Match or If-Match header value matches the ETag.
+
+    If-None-Match uses the weak comparison, ignoring W/ prefixes; If-Match
+    needs ``strong`` (RFC 9110 section 13.1.1), where a weak tag never matches.
+    """
+    if header.strip() == "*":
+        return True
+    tags: list[str] = [tag.strip() for tag in header.split(",")]
+    if strong:
+        return etag in tags
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def entity_etag(item: Any) -> str:
+    """Return a strong ETag for one parsed item, derived from its content."""
+    return f'"{hashlib.blake2b(repr(item).encode(), digest_size=8).hexdigest()}"'
+
+
+def check_if_match(request: Request, item: Any) -> None:
+    """Raise 412 if the request has an If-Match header the item's ETag fails."""
+    if_match: str | None = request.headers.get("if-match")
+    if if_match is not None and not etag_matches(
+        if_match, entity_etag(item), strong=True
+    ):
+        raise HTTPException(status_code=412, detail="item has been modified")
+
+
+def view_key(request: Request) -> str:
+    """Return the cache key for a request: its path and sorted query string."""
+    query: str = "&".join(
+        f"{k}={v}" for k, v in sorted(request.query_params.multi_items())
+    )
+    return f"{request.url.path}?{query}"
+
+
+async def collection_response(
+    request: Request,
+    names: Sequence[str],
+    build: Callable[[dict[str, str]], Any],
+    vary: str = "",
+) -> Response:
+    """Serve a collection view from the response cache, building it on a miss.
+
+    The ETag covers the generations of the named stores plus any vary token
+    for inputs outside the stores (such as today's date). A matching
+    If-None-Match gets an empty 304. On a miss, build is called with a dict
+    for extra response headers and its result, awaited if build is a
+    coroutine function, is encoded once and cached.
+    """
+    etag: str = collection_etag(request, names, vary)
+    if_none_match: str | None = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(
+            status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+
+    cache: ResponseCache = request.app.state.response_cache
+    key: str = view_key(request)
+    entry: CachedBody | None = cache.get(key, etag)
+    if entry is None:
+        headers: dict[str, str] = {}
+        content: Any = build(headers)
+        if inspect.isawaitable(content):
+            content = await content
+        body: bytes = json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+        entry = CachedBody(etag=etag, body=body, headers=headers)
+        cache.put(key, entry)
+
+    return Response(
+        content=entry.body,
+        media_type="application/json",
+        headers={**entry.headers, "ETag": etag, "Cache-Control": "no-cache"},
+    )
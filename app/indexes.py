@@ -0,0 +1,270 @@
+import bisect
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Generic, Protocol, TypeVar
+
+from app.models import Task
+from app.store import StoreIndex
+
+
+class HasId(Protocol):
+    """Any parsed item with a precomputed ID."""
+
+    id: str
+
+
+ItemT = TypeVar("ItemT", bound=HasId)
+
+
+@dataclass
+class IdIndex(StoreIndex[ItemT], Generic[ItemT]):
+    """ID -> item index for O(1) lookups and duplicate checks."""
+
+    items: dict[str, ItemT] = field(default_factory=dict)
+
+    def update(self, removed: list[ItemT], added: list[ItemT]) -> None:
+        """Drop removed items by ID and register added ones."""
+        for item in removed:
+            if self.items.get(item.id) is item:
+                del self.items[item.id]
+        for item in added:
+            self.items[item.id] = item
+
+    def get(self, item_id: str) -> ItemT | None:
+        """Return the item with the given ID, if loaded."""
+        return self.items.get(item_id)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self.items
+
+
+SortKey = tuple[str, ...]
+
+
+def resorts(changed: int, size: int) -> bool:
+    """Return True if re-sorting a list beats bisecting each change into it.
+
+    One insort per item is quadratic when a batch is large compared to the
+    list, such as on the initial load, where every item is added at once.
+    """
+    return changed > 32 and changed * 4 > size
+
+
+@dataclass
+class SortedIndex(StoreIndex[ItemT], Generic[ItemT]):
+    """Items kept in ascending order of a string-tuple sort key.
+
+    Supports range and cursor pagination in O(log n + page) via bisect.
+    """
+
+    key: Callable[[ItemT], SortKey]
+    items: list[ItemT] = field(default_factory=list)
+
+    def update(self, removed: list[ItemT], added: list[ItemT]) -> None:
+        """Remove items by key and identity, then insert added items in order.
+
+        Large batches filter and re-sort the list once instead; the sort is
+        stable, so equal keys keep the order insort_right would give them.
+        """
+        if resorts(len(removed), len(self.items)):
+            gone: set[int] = {id(item) for item in removed}
+            self.items = [item for item in self.items if id(item) not in gone]
+        else:
+            for item in removed:
+                item_key = self.key(item)
+                i = bisect.bisect_left(self.items, item_key, key=self.key)
+                while i < len(self.items) and self.key(self.items[i]) == item_key:
+                    if self.items[i] is item:
+                        del self.items[i]
+                        break
+                    i += 1
+        if resorts(len(added), len(self.items)):
+            self.items.extend(added)
+            self.items.sort(key=self.key)
+        else:
+            for item in added:
+                bisect.insort_right(self.items, item, key=self.key)
+
+
+@dataclass
+class MonthIndex(StoreIndex[ItemT], Generic[ItemT]):
+    """(year, month) -> sorted dates of the items falling in that month.
+
+    A date appears once per item on it, so a month's lookup costs
+    O(items in the month) however long the history is.
+    """
+
+    date_of: Callable[[ItemT], date]
+    months: dict[tuple[int, int], list[date]] = field(default_factory=dict)
+
+    def update(self, removed: list[ItemT], added: list[ItemT]) -> None:
+        """Remove one date occurrence per removed item and insert added ones."""
+        for item in removed:
+            day = self.date_of(item)
+            dates = self.months.get((day.year, day.month))
+            if not dates:
+                continue
+            i = bisect.bisect_left(dates, day)
+            if i < len(dates) and dates[i] == day:
+                del dates[i]
+            if not dates:
+                del self.months[(day.year, day.month)]
+        for item in added:
+            day = self.date_of(item)
+            bisect.insort(self.months.setdefault((day.year, day.month), []), day)
+
+    def dates_in(self, year: int, month: int) -> list[date]:
+        """Return the distinct dates with items in a month, in ascending order."""
+        return list(dict.fromkeys(self.months.get((year, month), ())))
+
+
+@dataclass
+class NameCounter(StoreIndex[ItemT], Generic[ItemT]):
+    """Distinct names -> number of items carrying each, for name pickers."""
+
+    name_of: Callable[[ItemT], str]
+    counts: dict[str, int] = field(default_factory=dict)
+
+    def update(self, removed: list[ItemT], added: list[ItemT]) -> None:
+        """Decrement the names of removed items and count those of added ones."""
+        for item in removed:
+            name = self.name_of(item)
+            remaining = self.counts.get(name, 0) - 1
+            if remaining > 0:
+                self.counts[name] = remaining
+            else:
+                self.counts.pop(name, None)
+        for item in added:
+            name = self.name_of(item)
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def names(self) -> set[str]:
+        """Return the distinct names currently in use."""
+        return set(self.counts)
+
+
+@dataclass
+class FacetIndex(StoreIndex[ItemT], Generic[ItemT]):
+    """Facet -> value -> items by ID, for filters and O(1) per-value counts."""
+
+    facets: dict[str, Callable[[ItemT], str]]
+    members: dict[str, dict[str, dict[str, ItemT]]] = field(default_factory=dict)
+
+    def update(self, removed: list[ItemT], added: list[ItemT]) -> None:
+        """Unlink removed items from their values and link added ones."""
+        for item in removed:
+            for facet, value_of in self.facets.items():
+                values = self.members.get(facet, {})
+                value = value_of(item)
+                same = values.get(value, {})
+                if same.get(item.id) is item:
+                    del same[item.id]
+                    if not same:
+                        del values[value]
+        for item in added:
+            for facet, value_of in self.facets.items():
+                values = self.members.setdefault(facet, {})
+                values.setdefault(value_of(item), {})[item.id] = item
+
+    def counts(self, facet: str) -> dict[str, int]:
+        """Return the number of items per value of a facet."""
+        return {value: len(same) for value, same in self.members.get(facet, {}).items()}
+
+    def select(self, **values: str) -> list[ItemT]:
+        """Return the items matching every given facet value, in no set order."""
+        sets: list[dict[str, ItemT]] = sorted(
+            (
+                self.members.get(facet, {}).get(value, {})
+                for facet, value in values.items()
+            ),
+            key=len,
+        )
+        if not sets:
+            return []
+        smallest, rest = sets[0], sets[1:]
+        return [
+            item
+            for item_id, item in smallest.items()
+            if all(item_id in other for other in rest)
+        ]
+
+
+# tasks
+
+
+@dataclass(slots=True)
+class TaskNode:
+    """A task together with its child sort key."""
+
+    sort_key: str
+    task: Task
+
+    @property
+    def id(self) -> str:
+        """Return the task's precomputed ID."""
+        return self.task.id
+
+
+def task_node_key(node: TaskNode) -> tuple[str, str]:
+    """Sort sibling tasks by lowercased title, then ID for a stable order."""
+    return (node.sort_key, node.task.id)
+
+
+@dataclass
+class TaskTree(StoreIndex[Task]):
+    """Parent -> children index over tasks with sorted child lists.
+
+    Top-level tasks are stored under the None parent key. Open tasks are also
+    indexed by (parent, title slug) for duplicate checks.
+    """
+
+    children: dict[str | None, list[TaskNode]] = field(default_factory=dict)
+    open_by_slug: dict[tuple[str | None, str], list[Task]] = field(default_factory=dict)
+
+    def update(self, removed: list[Task], added: list[Task]) -> None:
+        """Unlink removed tasks from their parents and insert added ones.
+
+        Sibling lists receiving a large batch, as on the initial load, are
+        extended and re-sorted once rather than bisected into per task.
+        """
+        for task in removed:
+            order = (task.title.lower(), task.id)
+            siblings = self.children.get(task.parent or None, [])
+            i = bisect.bisect_left(siblings, order, key=task_node_key)
+            while i < len(siblings) and task_node_key(siblings[i]) == order:
+                if siblings[i].task is task:
+                    del siblings[i]
+                    break
+                i += 1
+            if task.status == "open":
+                same = self.open_by_slug.get((task.parent or None, task.slug), [])
+                for i, other in enumerate(same):
+                    if other is task:
+                        del same[i]
+                        break
+
+        by_parent: dict[str | None, list[TaskNode]] = {}
+        for task in added:
+            node = TaskNode(sort_key=task.title.lower(), task=task)
+            by_parent.setdefault(task.parent or None, []).append(node)
+            if task.status == "open":
+                key = (task.parent or None, task.slug)
+                self.open_by_slug.setdefault(key, []).append(task)
+        for parent, nodes in by_parent.items():
+            siblings = self.children.setdefault(parent, [])
+            if resorts(len(nodes), len(siblings)):
+                siblings.extend(nodes)
+                siblings.sort(key=task_node_key)
+            else:
+                for node in nodes:
+                    bisect.insort(siblings, node, key=task_node_key)
+
+    def children_of(self, task_id: str | None) -> list[TaskNode]:
+        """Return the child nodes of a task (or top-level nodes for None), sorted."""
+        return self.children.get(task_id, [])
+
+    def find_open(self, parent_id: str | None, slug: str) -> Task | None:
+        """Return an open task under the given parent whose title has this slug."""
+        same = self.open_by_slug.get((parent_id or None, slug))
+        return same[0] if same else None
@@ -0,0 +1,45 @@
+import asyncio
+from collections.abc import AsyncIterator, Hashable
+from contextlib import asynccontextmanager
+
+
+class EntityLocks:
+    """Async locks per entity (such as a file path), created on first use.
+
+    Mutations of different entities run concurrently; those of the same
+    entity queue behind each other. Routes hold an entity's lock from reading
+    it until the write flush covering its file has finished, so the next
+    mutation of it starts from what is on disk. A lock is dropped once nothing
+    holds or waits for it, so the table only grows with the entities in use.
+    """
+
+    def __init__(self) -> None:
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+        self._users: dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, *keys: Hashable) -> AsyncIterator[None]:
+        """Hold the locks of all the given entities, taken in a fixed order."""
+        ordered: list[Hashable] = sorted(set(keys), key=str)
+        for key in ordered:
+            self._users[key] = self._users.get(key, 0) + 1
+            self._locks.setdefault(key, asyncio.Lock())
+
+        acquired: list[asyncio.Lock] = []
+        try:
+            for key in ordered:
+                lock = self._locks[key]
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+            for key in ordered:
+                self._users[key] -= 1
+                if self._users[key] == 0:
+                    del self._users[key]
+                    del self._locks[key]
@@ -2,7 +2,8 @@ import asyncio
 import logging
 import sys
 import tomllib
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import date, datetime, time
 from pathlib import Path
@@ -11,9 +12,16 @@ from typing import Any
 import frontmatter
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
+from app import bodies, completions, fast_frontmatter, models, records, writer
+from app.backends import MemoryBackend, QuerySpec, SqliteBackend
+from app.completions import CompletionSet
+from app.habit_stats import HabitStatsCache
+from app.http_cache import ResponseCache
+from app.indexes import IdIndex, NameCounter, TaskTree
+from app.locks import EntityLocks
 from app.models import (
     Activity,
     Exercise,
@@ -30,14 +38,36 @@ from app.models import (
     WorkoutSet,
     WorkoutTemplate,
 )
+from app.parse_cache import ParseCache, source_fingerprint
+from app.progression import ProgressionIndex
+from app.records import ITEM_CODECS
+from app.routes import batch as batch_routes
 from app.routes import habits as habits_routes
 from app.routes import media as media_routes
+from app.routes import search as search_routes
 from app.routes import tasks as tasks_routes
 from app.routes import workout as workout_routes
+from app.search import SearchIndex, SearchSource
 from app.sse import manager
+from app.store import FileStore, ScanStats
+from app.watcher import InotifyUnavailable, InotifyWatcher
+from app.workout_sets import WorkoutSetStore
+from app.write_queue import WriteFailed, WriteQueue
 
 logger: logging.Logger = logging.getLogger("uvicorn.error")
 
+# SSE invalidate keys for each store, sent when its files change outside the app
+# or in a batch
+INVALIDATE_KEYS: dict[str, list[str]] = {
+    "media": ["media"],
+    "workout": ["workouts", "calendar"],
+    "template": ["templates"],
+    "habit": ["habits"],
+    "activity": ["activities", "habits"],
+    "preset": ["presets"],
+    "task": ["tasks"],
+}
+
 
 def get_dir_from_config(config_path: str, key: str) -> Path:
     """Read a directory path from a TOML config file by key."""
@@ -62,6 +92,23 @@ def get_dir_from_config(config_path: str, key: str) -> Path:
         sys.exit(1)
 
 
+def get_option_from_config(config_path: str, key: str, default: Any) -> Any:
+    """Read an optional setting from a TOML config file, falling back to default."""
+    try:
+        with open(config_path, "rb") as f:
+            config: dict[str, Any] = tomllib.load(f)
+    except FileNotFoundError:
+        logger.error("Config file %s not found", config_path)
+        sys.exit(1)
+    except tomllib.TOMLDecodeError:
+        logger.error("Config file %s is not valid toml", config_path)
+        sys.exit(1)
+
+    value: Any = config.get(key, default)
+    logger.info("Loaded config %s=%s", key, value)
+    return value
+
+
 def validate_dir(dir_path: Path) -> None:
     """Ensure a directory exists, creating it and parents if needed."""
     dir_path.mkdir(parents=True, exist_ok=True)
@@ -73,51 +120,196 @@ def validate_dir(dir_path: Path) -> None:
 def parse_md_to_media(md_path: Path) -> Media:
     """Parse a markdown file into a Media dataclass."""
     try:
-        with md_path.open("r", encoding="utf-8") as f:
-            post: frontmatter.Post = frontmatter.load(f)
+        post, review = bodies.load(md_path)
         return Media(
             name=str(post.get("name", "n/a")),
             country=MediaCountry.get(post.get("country", "undefined")),
             type=MediaType.get(post.get("type", "undefined")),
             status=MediaStatus.get(post.get("status", "queued")),
             rating=str(post.get("rating", "n/a")),
-            review=post.content,
+            review=review,
         )
     except Exception:
         logger.exception("Failed to parse %s", md_path)
         raise HTTPException(status_code=404, detail=f"failed to parse {md_path}")
 
 
-def parse_all_media(media_dir: Path) -> list[Media]:
-    """Parse all markdown files in the media directory into Media objects."""
-    return [parse_md_to_media(p) for p in media_dir.iterdir() if p.is_file()]
+async def reload_items(app: FastAPI, *names: str) -> None:
+    """Re-scan stores in the reload worker pool and publish their items together.
+
+    Scans run off the event loop; the resulting item lists are swapped into
+    app.state in one step once every scan has finished. Defaults to all stores.
+    """
+    stores: list[FileStore] = [app.state.stores[n] for n in names or app.state.stores]
+    loop = asyncio.get_running_loop()
+    results: list[ScanStats | BaseException] = await asyncio.gather(
+        *(loop.run_in_executor(app.state.reload_executor, s.scan) for s in stores),
+        return_exceptions=True,
+    )
+
+    for store in stores:
+        setattr(app.state, f"{store.name}_items", store.publish())
+
+    for store, result in zip(stores, results):
+        if isinstance(result, BaseException):
+            raise result
+        if result.changed:
+            logger.info(
+                "Refreshed %s items (statted=%d parsed=%d removed=%d cached=%d)",
+                store.name,
+                result.statted,
+                result.parsed,
+                result.removed,
+                result.cached,
+            )
+
+
+async def reload_paths(app: FastAPI, name: str, paths: set[Path] | None) -> None:
+    """Re-check only the given files of one store in the reload worker pool.
+
+    A paths value of None falls back to a full scan of the store's directory.
+    """
+    if paths is None:
+        await reload_items(app, name)
+        return
+
+    store: FileStore = app.state.stores[name]
+    loop = asyncio.get_running_loop()
+    stats: ScanStats = await loop.run_in_executor(
+        app.state.reload_executor, store.refresh, paths
+    )
+    setattr(app.state, f"{store.name}_items", store.publish())
+    if stats.changed:
+        logger.info(
+            "Refreshed %s items (statted=%d parsed=%d removed=%d cached=%d)",
+            store.name,
+            stats.statted,
+            stats.parsed,
+            stats.removed,
+            stats.cached,
+        )
+
+
+def apply_writes(
+    app: FastAPI,
+    name: str,
+    upserts: dict[Path, tuple[Any, frontmatter.Post]] | None = None,
+    removes: Iterable[Path] = (),
+) -> asyncio.Future:
+    """Apply a route's changes to a store in memory and queue them for disk.
+
+    Upserts map each file to its new parsed item and the post to write.
+    The items are published right away; the files are written by the write
+    queue's next flush. Routes await the returned future before responding:
+    with write_wait set it is done once that flush wrote every file and
+    fails with WriteFailed if one could not be written; otherwise it is
+    already done and failures are only reported through settle_writes().
+    """
+    store: FileStore = app.state.stores[name]
+    queue: WriteQueue = app.state.write_queue
+    upserts = upserts or {}
+    removes = list(removes)
+    store.apply({p: item for p, (item, _) in upserts.items()}, removes, pending=True)
+    for path in removes:
+        queue.put(name, path, None)
+    for path, (_, post) in upserts.items():
+        queue.put(name, path, post)
+    setattr(app.state, f"{store.name}_items", store.publish())
+    if not app.state.write_wait:
+        return asyncio.gather()
+    return asyncio.gather(*(queue.written(p) for p in [*removes, *upserts]))
+
+
+async def settle_writes(
+    app: FastAPI, name: str, written: list[Path], failed: list[Path]
+) -> None:
+    """Record flushed files in their store so scans pick them up again.
+
+    Files that failed to write are re-read right away, so memory drops the
+    lost change for what the disk actually holds, and clients are told.
+    """
+    app.state.stores[name].settle(written, failed)
+    if not failed:
+        return
+    await reload_paths(app, name, set(failed))
+    await broadcast_store_changes([name])
+    await manager.broadcast(
+        {
+            "type": "write_failed",
+            "collection": name,
+            "files": sorted(path.name for path in failed),
+        }
+    )
+
+
+async def broadcast_store_changes(names: Iterable[str]) -> None:
+    """Send one SSE invalidate message covering the keys of all changed stores."""
+    keys: set[str] = {key for name in names for key in INVALIDATE_KEYS[name]}
+    if keys:
+        await manager.broadcast({"type": "invalidate", "keys": sorted(keys)})
+
+
+async def watch_changed_paths(app: FastAPI, name: str, paths: set[Path] | None) -> None:
+    """Apply a batch of inotify-reported file changes and notify SSE clients."""
+    before: int = app.state.stores[name].generation
+    await reload_paths(app, name, paths)
+    if app.state.stores[name].generation != before:
+        await broadcast_store_changes([name])
+
+
+def start_watcher(app: FastAPI, debounce_seconds: float) -> InotifyWatcher | None:
+    """Watch every store directory with inotify, or return None if unavailable."""
+    try:
+        watcher = InotifyWatcher(
+            lambda name, paths: watch_changed_paths(app, name, paths),
+            debounce_seconds,
+        )
+    except InotifyUnavailable as e:
+        logger.warning("inotify unavailable (%s), falling back to polling", e)
+        return None
+
+    try:
+        for store in app.state.stores.values():
+            watcher.add(store.name, store.directory)
+    except InotifyUnavailable as e:
+        logger.warning("inotify unavailable (%s), falling back to polling", e)
+        watcher.close()
+        return None
+
+    watcher.start()
+    return watcher
 
 
-async def poll_all_items(app: FastAPI, interval_in_seconds: int) -> None:
-    """Periodically refresh all in-memory item caches from disk."""
+async def poll_all_items(app: FastAPI, interval_in_seconds: float) -> None:
+    """Periodically re-scan all stores and swap in any changed item lists."""
     while True:
+        await asyncio.sleep(interval_in_seconds)
+        stores: dict[str, FileStore] = app.state.stores
+        before: dict[str, int] = {name: s.generation for name, s in stores.items()}
         try:
-            logger.info("Refreshing all items")
-            app.state.media_items = parse_all_media(app.state.media_dir)
-            app.state.workout_items = parse_all_workouts(app.state.workout_dir)
-            app.state.template_items = parse_all_templates(app.state.template_dir)
-            app.state.habit_items = parse_all_habits(app.state.habits_dir)
-            app.state.activity_items = parse_all_activities(app.state.activities_dir)
-            app.state.preset_items = parse_all_presets(app.state.presets_dir)
-            app.state.task_items = parse_all_tasks(app.state.tasks_dir)
+            await reload_items(app)
         except Exception:
             logger.exception("Error during poll")
-        await asyncio.sleep(interval_in_seconds)
+        await broadcast_store_changes(
+            name for name, s in stores.items() if s.generation != before[name]
+        )
 
 
 # workout parsing
 
 
+def parse_workout_set(data: dict) -> WorkoutSet:
+    """Parse one set; weights become floats, as WorkoutSetModel makes them."""
+    weight: Any = data.get("weight")
+    return WorkoutSet(
+        reps=data.get("reps"), weight=None if weight is None else float(weight)
+    )
+
+
 def parse_md_to_workout(md_path: Path) -> Workout:
     """Parse a markdown file into a Workout dataclass."""
     try:
-        with md_path.open("r", encoding="utf-8") as f:
-            post: frontmatter.Post = frontmatter.load(f)
+        post, content = bodies.load(md_path, flat=False)
 
         date_val: Any = post.get("date")
         if isinstance(date_val, str):
@@ -134,7 +326,7 @@ def parse_md_to_workout(md_path: Path) -> Workout:
             for e in g.get("exercises", []):
                 sets = []
                 for s in e.get("sets", []):
-                    sets.append(WorkoutSet(reps=s.get("reps"), weight=s.get("weight")))
+                    sets.append(parse_workout_set(s))
                 exercises.append(Exercise(name=e.get("name", ""), sets=sets))
             groups.append(
                 ExerciseGroup(
@@ -148,32 +340,20 @@ def parse_md_to_workout(md_path: Path) -> Workout:
             date=date_val,
             time=time_val,
             groups=groups,
-            content=post.content,
+            content=content,
         )
     except Exception:
         logger.exception("Failed to parse %s", md_path)
         raise HTTPException(status_code=404, detail=f"failed to parse {md_path}")
 
 
-def parse_all_workouts(workout_dir: Path) -> list[Workout]:
-    """Parse all markdown files in the workout directory into Workout objects."""
-    if not workout_dir.exists():
-        return []
-    return [
-        parse_md_to_workout(p)
-        for p in workout_dir.iterdir()
-        if p.is_file() and p.suffix == ".md"
-    ]
-
-
 # template parsing
 
 
 def parse_md_to_template(md_path: Path) -> WorkoutTemplate:
     """Parse a markdown file into a WorkoutTemplate dataclass."""
     try:
-        with md_path.open("r", encoding="utf-8") as f:
-            post: frontmatter.Post = frontmatter.load(f)
+        post: frontmatter.Post = fast_frontmatter.load(md_path, flat=False)
 
         groups_data: Any = post.get("groups", [])
         groups: list[ExerciseGroup] = []
@@ -182,7 +362,7 @@ def parse_md_to_template(md_path: Path) -> WorkoutTemplate:
             for e in g.get("exercises", []):
                 sets = []
                 for s in e.get("sets", []):
-                    sets.append(WorkoutSet(reps=s.get("reps"), weight=s.get("weight")))
+                    sets.append(parse_workout_set(s))
                 exercises.append(Exercise(name=e.get("name", ""), sets=sets))
             groups.append(
                 ExerciseGroup(
@@ -201,25 +381,13 @@ def parse_md_to_template(md_path: Path) -> WorkoutTemplate:
         raise HTTPException(status_code=404, detail=f"failed to parse {md_path}")
 
 
-def parse_all_templates(template_dir: Path) -> list[WorkoutTemplate]:
-    """Parse all markdown files in the template directory."""
-    if not template_dir.exists():
-        return []
-    return [
-        parse_md_to_template(p)
-        for p in template_dir.iterdir()
-        if p.is_file() and p.suffix == ".md"
-    ]
-
-
 # habit parsing
 
 
 def parse_md_to_habit(md_path: Path) -> Habit:
     """Parse a markdown file into a Habit dataclass."""
     try:
-        with md_path.open("r", encoding="utf-8") as f:
-            post: frontmatter.Post = frontmatter.load(f)
+        post: frontmatter.Post = fast_frontmatter.load(md_path, flat=False)
         days_data: Any = post.get("days", [])
         completions_data: Any = post.get("completions", [])
         shifts_data: Any = post.get("shifts", []) or []
@@ -231,11 +399,20 @@ def parse_md_to_habit(md_path: Path) -> Habit:
             for s in shifts_data
             if isinstance(s, dict) and "from" in s
         ]
+        completions: CompletionSet = CompletionSet.from_iso(completions_data or [])
+        if completions.unparsed:
+            logger.warning(
+                "%s: keeping completions that are not YYYY-MM-DD dates: %s",
+                md_path,
+                ", ".join(completions.unparsed),
+            )
+        if len(completions) + len(completions.unparsed) < len(completions_data or []):
+            logger.warning("%s: dropping duplicate completion dates", md_path)
         return Habit(
             name=str(post.get("name", "")),
             days=list(days_data),
             color=str(post.get("color", "#605dff")),
-            completions=list(completions_data),
+            completions=completions,
             shifts=shifts,
         )
     except Exception:
@@ -243,25 +420,13 @@ def parse_md_to_habit(md_path: Path) -> Habit:
         raise HTTPException(status_code=404, detail=f"failed to parse {md_path}")
 
 
-def parse_all_habits(habits_dir: Path) -> list[Habit]:
-    """Parse all markdown files in the habits directory."""
-    if not habits_dir.exists():
-        return []
-    return [
-        parse_md_to_habit(p)
-        for p in habits_dir.iterdir()
-        if p.is_file() and p.suffix == ".md"
-    ]
-
-
 # activity parsing
 
 
 def parse_md_to_activity(md_path: Path) -> Activity:
     """Parse a markdown file into an Activity dataclass."""
     try:
-        with md_path.open("r", encoding="utf-8") as f:
-            post: frontmatter.Post = frontmatter.load(f)
+        post: frontmatter.Post = fast_frontmatter.load(md_path)
 
         date_val: Any = post.get("date")
         if isinstance(date_val, str):
@@ -276,50 +441,26 @@ def parse_md_to_activity(md_path: Path) -> Activity:
         raise HTTPException(status_code=404, detail=f"failed to parse {md_path}")
 
 
-def parse_all_activities(activities_dir: Path) -> list[Activity]:
-    """Parse all markdown files in the activities directory."""
-    if not activities_dir.exists():
-        return []
-    return [
-        parse_md_to_activity(p)
-        for p in activities_dir.iterdir()
-        if p.is_file() and p.suffix == ".md"
-    ]
-
-
 # preset parsing
 
 
 def parse_md_to_preset(md_path: Path) -> Preset:
     """Parse a markdown file into a Preset dataclass."""
     try:
-        with md_path.open("r", encoding="utf-8") as f:
-            post: frontmatter.Post = frontmatter.load(f)
+        post: frontmatter.Post = fast_frontmatter.load(md_path)
         return Preset(name=str(post.get("name", "")))
     except Exception:
         logger.exception("Failed to parse %s", md_path)
         raise HTTPException(status_code=404, detail=f"failed to parse {md_path}")
 
 
-def parse_all_presets(presets_dir: Path) -> list[Preset]:
-    """Parse all markdown files in the presets directory."""
-    if not presets_dir.exists():
-        return []
-    return [
-        parse_md_to_preset(p)
-        for p in presets_dir.iterdir()
-        if p.is_file() and p.suffix == ".md"
-    ]
-
-
 # task parsing
 
 
 def parse_md_to_task(md_path: Path) -> Task:
     """Parse a markdown file into a Task dataclass."""
     try:
-        with md_path.open("r", encoding="utf-8") as f:
-            post: frontmatter.Post = frontmatter.load(f)
+        post, notes = bodies.load(md_path)
 
         do_date_val: Any = post.get("do_date")
         if isinstance(do_date_val, str):
@@ -348,7 +489,7 @@ def parse_md_to_task(md_path: Path) -> Task:
             status=str(post.get("status", "open")),
             do_date=do_date_val,
             parent=parent_val,
-            notes=post.content,
+            notes=notes,
             created_at=created_at_val,
             completed_at=completed_at_val,
         )
@@ -357,15 +498,11 @@ def parse_md_to_task(md_path: Path) -> Task:
         raise HTTPException(status_code=404, detail=f"failed to parse {md_path}")
 
 
-def parse_all_tasks(tasks_dir: Path) -> list[Task]:
-    """Parse all markdown files in the tasks directory."""
-    if not tasks_dir.exists():
-        return []
-    return [
-        parse_md_to_task(p)
-        for p in tasks_dir.iterdir()
-        if p.is_file() and p.suffix == ".md"
-    ]
+def exercise_text(groups: list[ExerciseGroup]) -> str:
+    """Return the group and exercise names of a workout or template, one per line."""
+    return "\n".join(
+        name for g in groups for name in (g.name, *(e.name for e in g.exercises))
+    )
 
 
 @asynccontextmanager
@@ -381,44 +518,186 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     app.state.template_dir = get_dir_from_config("./config.toml", "template_dir")
     validate_dir(app.state.template_dir)
 
-    # store parsing functions in app.state
-    app.state.parse_md_to_media = parse_md_to_media
-    app.state.parse_all_media = lambda: parse_all_media(app.state.media_dir)
-    app.state.parse_md_to_workout = parse_md_to_workout
-    app.state.parse_all_workouts = lambda: parse_all_workouts(app.state.workout_dir)
-    app.state.parse_md_to_template = parse_md_to_template
-    app.state.parse_all_templates = lambda: parse_all_templates(app.state.template_dir)
-
-    # initial load of templates
-    app.state.template_items = parse_all_templates(app.state.template_dir)
-
     app.state.habits_dir = get_dir_from_config("./config.toml", "habits_dir")
     validate_dir(app.state.habits_dir)
     app.state.activities_dir = get_dir_from_config("./config.toml", "activities_dir")
     validate_dir(app.state.activities_dir)
     app.state.presets_dir = get_dir_from_config("./config.toml", "presets_dir")
     validate_dir(app.state.presets_dir)
+    app.state.tasks_dir = get_dir_from_config("./config.toml", "tasks_dir")
+    validate_dir(app.state.tasks_dir)
 
-    app.state.parse_md_to_habit = parse_md_to_habit
-    app.state.parse_all_habits = lambda: parse_all_habits(app.state.habits_dir)
-    app.state.parse_md_to_activity = parse_md_to_activity
-    app.state.parse_all_activities = lambda: parse_all_activities(
-        app.state.activities_dir
+    # keep markdown bodies on disk and read them on demand through an LRU cache
+    lazy_bodies: bool = get_option_from_config("./config.toml", "lazy_bodies", False)
+    body_cache_chars: int = get_option_from_config(
+        "./config.toml", "body_cache_chars", 8 * 1024 * 1024
+    )
+    bodies.configure(lazy_bodies, body_cache_chars)
+
+    # parsed items persisted across restarts; an empty path disables it
+    parse_cache_path: str = get_option_from_config(
+        "./config.toml", "parse_cache", "./contents/.parse-cache.sqlite"
+    )
+    app.state.parse_cache = (
+        ParseCache(
+            Path(parse_cache_path),
+            source_fingerprint(
+                sys.modules[__name__],
+                models,
+                completions,
+                fast_frontmatter,
+                bodies,
+                records,
+                salt=f"lazy_bodies={lazy_bodies}",
+            ),
+        )
+        if parse_cache_path
+        else None
     )
-    app.state.parse_md_to_preset = parse_md_to_preset
-    app.state.parse_all_presets = lambda: parse_all_presets(app.state.presets_dir)
 
-    # initial load of habits, activities and presets
-    app.state.habit_items = parse_all_habits(app.state.habits_dir)
-    app.state.activity_items = parse_all_activities(app.state.activities_dir)
-    app.state.preset_items = parse_all_presets(app.state.presets_dir)
+    # one incrementally scanned store per content directory, keyed by the
+    # prefix of the matching app.state.*_items attribute
+    app.state.stores = {
+        store.name: store
+        for store in (
+            FileStore("media", app.state.media_dir, parse_md_to_media, suffix=None),
+            FileStore("workout", app.state.workout_dir, parse_md_to_workout),
+            FileStore("template", app.state.template_dir, parse_md_to_template),
+            FileStore("habit", app.state.habits_dir, parse_md_to_habit),
+            FileStore("activity", app.state.activities_dir, parse_md_to_activity),
+            FileStore("preset", app.state.presets_dir, parse_md_to_preset),
+            FileStore("task", app.state.tasks_dir, parse_md_to_task),
+        )
+    }
 
-    # tasks
-    app.state.tasks_dir = get_dir_from_config("./config.toml", "tasks_dir")
-    validate_dir(app.state.tasks_dir)
+    # derived indexes, kept in sync as their store publishes changes
+    app.state.ids = {name: IdIndex() for name in app.state.stores}
+    for name, store in app.state.stores.items():
+        store.cache = app.state.parse_cache
+        store.codec = ITEM_CODECS[name]
+        store.indexes.append(app.state.ids[name])
+    app.state.task_tree = TaskTree()
+    app.state.stores["task"].indexes.append(app.state.task_tree)
+    # list orders for range and cursor pagination (IDs break ties), media
+    # filter facets and workout calendar dates, answered by the query backend
+    query_specs: dict[str, QuerySpec] = {
+        "media": QuerySpec(
+            key=lambda m: (m.status_str, m.id),
+            facets={
+                "status": lambda m: m.status_str,
+                "type": lambda m: m.type_str,
+                "country": lambda m: m.country_str,
+            },
+        ),
+        "workout": QuerySpec(key=lambda w: (w.id,), date_of=lambda w: w.date),
+        "habit": QuerySpec(key=lambda h: (h.name, h.id)),
+        "activity": QuerySpec(key=lambda a: (a.id,)),
+    }
+    index_backend: str = get_option_from_config(
+        "./config.toml", "index_backend", "memory"
+    )
+    if index_backend == "sqlite":
+        index_db: str = get_option_from_config(
+            "./config.toml", "index_db", "./contents/.index.sqlite"
+        )
+        app.state.query = SqliteBackend(Path(index_db), app.state.ids)
+    else:
+        if index_backend != "memory":
+            logger.warning(
+                "Unknown index_backend %r, using the in-memory one", index_backend
+            )
+        app.state.query = MemoryBackend()
+    for name, spec in query_specs.items():
+        app.state.stores[name].indexes.extend(
+            app.state.query.add_collection(name, spec)
+        )
+    # distinct names -> item counts, for the habit preset picker
+    app.state.names = {
+        "activity": NameCounter(name_of=lambda a: a.name),
+        "preset": NameCounter(name_of=lambda p: p.name),
+    }
+    for name, index in app.state.names.items():
+        app.state.stores[name].indexes.append(index)
+    # exercise name -> per-session time series
+    app.state.progression = ProgressionIndex()
+    app.state.stores["workout"].indexes.append(app.state.progression)
+    # every workout set as columns, for vectorized stats
+    app.state.workout_sets = WorkoutSetStore()
+    app.state.stores["workout"].indexes.append(app.state.workout_sets)
+    # full-text search over titles and bodies: collection -> (title, body)
+    search_fields: dict[str, tuple[Callable[[Any], str], Callable[[Any], str]]] = {
+        "media": (lambda m: m.name, lambda m: bodies.text(m.review)),
+        "workout": (
+            lambda w: w.date.isoformat(),
+            lambda w: f"{exercise_text(w.groups)}\n{bodies.text(w.content)}",
+        ),
+        "template": (lambda t: t.name, lambda t: exercise_text(t.groups)),
+        "habit": (lambda h: h.name, lambda h: ""),
+        "activity": (lambda a: a.name, lambda a: ""),
+        "preset": (lambda p: p.name, lambda p: ""),
+        "task": (lambda t: t.title, lambda t: bodies.text(t.notes)),
+    }
+    app.state.search = SearchIndex()
+    app.state.search_collections = list(search_fields)
+    for name, (title_of, body_of) in search_fields.items():
+        app.state.stores[name].indexes.append(
+            SearchSource(app.state.search, name, title_of, body_of)
+        )
+
+    # bounded worker pool for directory scans and frontmatter parsing
+    reload_workers: int = get_option_from_config("./config.toml", "reload_workers", 4)
+    app.state.reload_executor = ThreadPoolExecutor(
+        max_workers=reload_workers, thread_name_prefix="shelf-reload"
+    )
+
+    # encoded JSON bodies of collection views, validated by store generation
+    response_cache_size: int = get_option_from_config(
+        "./config.toml", "response_cache_size", 256
+    )
+    app.state.response_cache = ResponseCache(response_cache_size)
+
+    # per-habit streak and completion-rate results
+    app.state.habit_stats = HabitStatsCache()
+
+    # atomic writes, flushed to disk according to the durability mode
+    write_durability: str = get_option_from_config(
+        "./config.toml", "write_durability", "group"
+    )
+    group_commit_ms: int = get_option_from_config(
+        "./config.toml", "write_group_commit_ms", 50
+    )
+    writer.configure_durability(write_durability, group_commit_ms / 1000)
+
+    # per-file locks serializing mutations, held until their writes are flushed
+    app.state.entity_locks = EntityLocks()
+
+    # deferred, per-file coalesced disk writes for route mutations
+    write_flush_ms: int = get_option_from_config("./config.toml", "write_flush_ms", 50)
+    app.state.write_wait = get_option_from_config("./config.toml", "write_wait", False)
+    app.state.write_queue = WriteQueue(
+        on_flushed=lambda name, written, failed: settle_writes(
+            app, name, written, failed
+        ),
+        delay_seconds=write_flush_ms / 1000,
+    )
+
+    # store parsing functions in app.state
+    app.state.parse_md_to_media = parse_md_to_media
+    app.state.parse_md_to_workout = parse_md_to_workout
+    app.state.parse_md_to_template = parse_md_to_template
+    app.state.parse_md_to_habit = parse_md_to_habit
+    app.state.parse_md_to_activity = parse_md_to_activity
+    app.state.parse_md_to_preset = parse_md_to_preset
     app.state.parse_md_to_task = parse_md_to_task
-    app.state.parse_all_tasks = lambda: parse_all_tasks(app.state.tasks_dir)
-    app.state.task_items = parse_all_tasks(app.state.tasks_dir)
+    app.state.reload_items = lambda *names: reload_items(app, *names)
+    app.state.apply_writes = lambda name, upserts=None, removes=(): apply_writes(
+        app, name, upserts, removes
+    )
+    app.state.broadcast_store_changes = broadcast_store_changes
+
+    # initial load of every store
+    await reload_items(app)
+    app.state.query.loaded()
 
     # Google GenAI client for AI chat (optional)
     import os
@@ -439,14 +718,43 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         app.state.gemini_model = None
         logger.warning("GEMINI_API_KEY not set — AI chat disabled")
 
-    # start polling task for manual file edits
-    logger.info("Starting background polling task")
-    poll_task = asyncio.create_task(poll_all_items(app, interval_in_seconds=5))
+    # watch for manual file edits with inotify, or fall back to polling
+    watch_mode: str = get_option_from_config("./config.toml", "watch_mode", "inotify")
+    watcher: InotifyWatcher | None = None
+    if watch_mode == "inotify":
+        debounce_ms: int = get_option_from_config(
+            "./config.toml", "watch_debounce_ms", 100
+        )
+        watcher = start_watcher(app, debounce_ms / 1000)
+    elif watch_mode != "poll":
+        logger.warning("Unknown watch_mode %r, falling back to polling", watch_mode)
+
+    if watcher is not None:
+        # inotify can miss changes (e.g. network filesystems), so still
+        # reconcile with a slow full scan
+        interval: float = get_option_from_config(
+            "./config.toml", "reconcile_interval", 300
+        )
+        logger.info("Watching content directories with inotify")
+    else:
+        interval = get_option_from_config("./config.toml", "poll_interval", 5)
+    logger.info("Starting background polling task (every %ss)", interval)
+    poll_task = asyncio.create_task(poll_all_items(app, interval_in_seconds=interval))
 
     yield
 
     logger.info("Shutting down background task")
     poll_task.cancel()
+    if watcher is not None:
+        watcher.close()
+    await app.state.write_queue.close()
+    if app.state.parse_cache is not None:
+        for store in app.state.stores.values():
+            store.save_cache()
+        app.state.parse_cache.close()
+    app.state.query.close()
+    app.state.reload_executor.shutdown(wait=False, cancel_futures=True)
+    writer.close_durability()
 
 
 app: FastAPI = FastAPI(lifespan=lifespan)
@@ -456,6 +764,7 @@ app.add_middleware(
     allow_origins=["http://localhost:5173"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 app.mount(
@@ -468,6 +777,8 @@ app.include_router(media_routes.router, prefix="/api")
 app.include_router(workout_routes.router, prefix="/api")
 app.include_router(habits_routes.router, prefix="/api")
 app.include_router(tasks_routes.router, prefix="/api")
+app.include_router(batch_routes.router, prefix="/api")
+app.include_router(search_routes.router, prefix="/api")
 
 
 @app.get("/api/meta/enums")
@@ -480,6 +791,25 @@ async def get_enums() -> dict[str, list[str]]:
     }
 
 
+@app.get("/api/meta/reload")
+async def get_reload_stats() -> dict[str, dict[str, int]]:
+    """Return per-store counters from the most recent scan."""
+    return {name: store.last_scan.to_dict() for name, store in app.state.stores.items()}
+
+
+@app.exception_handler(WriteFailed)
+async def write_failed_handler(request: Request, exc: WriteFailed) -> JSONResponse:
+    """Report a mutation whose file could not be written as a server error."""
+    return JSONResponse(status_code=500, content={"detail": str(exc)})
+
+
+@app.get("/api/meta/writes")
+async def get_write_stats() -> dict[str, int | float | str | None]:
+    """Return the write queue's depth and flush counters."""
+    queue: WriteQueue = app.state.write_queue
+    return queue.stats.to_dict(queue.depth)
+
+
 @app.get("/events")
 async def sse_endpoint(request: Request) -> StreamingResponse:
     """Stream server-sent events to the client for real-time cache invalidation."""
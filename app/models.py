@@ -5,6 +5,9 @@ from enum import IntEnum
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 from slugify import slugify
 
+from app.bodies import BodyRef
+from app.completions import CompletionSet
+
 
 # media
 
@@ -66,7 +69,7 @@ class MediaStatus(IntEnum):
         return [m.name for m in MediaStatus]
 
 
-@dataclass
+@dataclass(slots=True)
 class Media:
     """Internal representation of a media item parsed from markdown."""
 
@@ -75,12 +78,24 @@ class Media:
     type: MediaType
     status: MediaStatus
     rating: str
-    review: str
+    review: str | BodyRef
+    id: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def id(self) -> str:
-        """Generate a URL-safe slug from the media name."""
-        return slugify(self.name).lower()
+    def __post_init__(self) -> None:
+        """Precompute the URL-safe slug ID from the media name."""
+        self.id = slugify(self.name).lower()
+
+    @classmethod
+    def from_model(cls, model: "MediaModel") -> "Media":
+        """Build the parsed form of a media item written from API input."""
+        return cls(
+            name=model.name,
+            country=MediaCountry.get(model.country),
+            type=MediaType.get(model.type),
+            status=MediaStatus.get(model.status),
+            rating=model.rating or "",
+            review=(model.review or "").strip(),
+        )
 
     @property
     def country_str(self) -> str:
@@ -117,7 +132,7 @@ class MediaModel(BaseModel):
 # workout
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkoutSet:
     """A single set within an exercise (reps and/or weight)."""
 
@@ -125,7 +140,7 @@ class WorkoutSet:
     weight: float | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Exercise:
     """A named exercise with its sets."""
 
@@ -133,7 +148,7 @@ class Exercise:
     sets: list[WorkoutSet]
 
 
-@dataclass
+@dataclass(slots=True)
 class ExerciseGroup:
     """A group of exercises performed together with a shared rest period."""
 
@@ -141,20 +156,48 @@ class ExerciseGroup:
     rest_seconds: int
     exercises: list[Exercise]
 
-
-@dataclass
+    @classmethod
+    def from_models(cls, models: list["ExerciseGroupModel"]) -> list["ExerciseGroup"]:
+        """Build parsed exercise groups from API input."""
+        return [
+            cls(
+                name=g.name,
+                rest_seconds=g.rest_seconds,
+                exercises=[
+                    Exercise(
+                        name=e.name,
+                        sets=[WorkoutSet(reps=s.reps, weight=s.weight) for s in e.sets],
+                    )
+                    for e in g.exercises
+                ],
+            )
+            for g in models
+        ]
+
+
+@dataclass(slots=True)
 class Workout:
     """Internal representation of a workout parsed from markdown."""
 
     date: date
     time: time
     groups: list[ExerciseGroup]
-    content: str
+    content: str | BodyRef
+    id: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def id(self) -> str:
-        """Generate a timestamp-based ID from date and time."""
-        return f"{self.date.strftime('%Y%m%d')}-{self.time.strftime('%H%M%S')}"
+    def __post_init__(self) -> None:
+        """Precompute the timestamp-based ID from date and time."""
+        self.id = f"{self.date.strftime('%Y%m%d')}-{self.time.strftime('%H%M%S')}"
+
+    @classmethod
+    def from_model(cls, model: "WorkoutModel") -> "Workout":
+        """Build the parsed form of a workout written from API input."""
+        return cls(
+            date=model.date,
+            time=model.time.replace(microsecond=0),
+            groups=ExerciseGroup.from_models(model.groups),
+            content=(model.content or "").strip(),
+        )
 
 
 class WorkoutSetModel(BaseModel):
@@ -196,17 +239,22 @@ class WorkoutModel(BaseModel):
 # workout templates
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkoutTemplate:
     """Internal representation of a workout template parsed from markdown."""
 
     name: str
     groups: list[ExerciseGroup]
+    id: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def id(self) -> str:
-        """Generate a URL-safe slug from the template name."""
-        return slugify(self.name).lower()
+    def __post_init__(self) -> None:
+        """Precompute the URL-safe slug ID from the template name."""
+        self.id = slugify(self.name).lower()
+
+    @classmethod
+    def from_model(cls, model: "WorkoutTemplateModel") -> "WorkoutTemplate":
+        """Build the parsed form of a workout template written from API input."""
+        return cls(name=model.name, groups=ExerciseGroup.from_models(model.groups))
 
 
 class WorkoutTemplateModel(BaseModel):
@@ -224,7 +272,7 @@ class WorkoutTemplateModel(BaseModel):
 # habits
 
 
-@dataclass
+@dataclass(slots=True)
 class HabitShift:
     """A date shift for a habit occurrence (reschedule or skip)."""
 
@@ -239,33 +287,54 @@ class HabitShiftModel(BaseModel):
     to_date: str | None = None  # YYYY-MM-DD — new date, or None = skip
 
 
-@dataclass
+@dataclass(slots=True)
 class Habit:
     """Internal representation of a habit parsed from markdown."""
 
     name: str
     days: list[int]  # 0=Sun … 6=Sat
     color: str  # hex color string
-    completions: list[str]  # YYYY-MM-DD strings
+    completions: CompletionSet
     shifts: list[HabitShift] = field(default_factory=list)
+    id: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def id(self) -> str:
-        """Generate a URL-safe slug from the habit name."""
-        return slugify(self.name).lower()
+    def __post_init__(self) -> None:
+        """Precompute the URL-safe slug ID from the habit name."""
+        self.id = slugify(self.name).lower()
+
+    @classmethod
+    def from_model(cls, model: "HabitModel") -> "Habit":
+        """Build the parsed form of a habit written from API input."""
+        return cls(
+            name=model.name,
+            days=list(model.days),
+            color=model.color,
+            completions=CompletionSet.from_iso(model.completions),
+            shifts=[
+                HabitShift(from_date=s.from_date, to_date=s.to_date or None)
+                for s in model.shifts
+            ],
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class Activity:
     """Internal representation of an activity parsed from markdown."""
 
     name: str
     date: date
+    slug: str = field(init=False, repr=False, compare=False)
+    id: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def id(self) -> str:
-        """Generate an ID from date and slugified name."""
-        return f"{self.date.isoformat()}-{slugify(self.name).lower()}"
+    def __post_init__(self) -> None:
+        """Precompute the slugified name and the date + slug ID."""
+        self.slug = slugify(self.name).lower()
+        self.id = f"{self.date.isoformat()}-{self.slug}"
+
+    @classmethod
+    def from_model(cls, model: "ActivityModel") -> "Activity":
+        """Build the parsed form of an activity written from API input."""
+        return cls(name=model.name, date=model.date)
 
 
 class HabitModel(BaseModel):
@@ -295,16 +364,21 @@ class ActivityModel(BaseModel):
         return f"{self.date.isoformat()}-{slugify(self.name).lower()}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Preset:
     """Internal representation of an activity preset parsed from markdown."""
 
     name: str
+    id: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def id(self) -> str:
-        """Generate a URL-safe slug from the preset name."""
-        return slugify(self.name).lower()
+    def __post_init__(self) -> None:
+        """Precompute the URL-safe slug ID from the preset name."""
+        self.id = slugify(self.name).lower()
+
+    @classmethod
+    def from_model(cls, model: "PresetModel") -> "Preset":
+        """Build the parsed form of a preset written from API input."""
+        return cls(name=model.name)
 
 
 class PresetModel(BaseModel):
@@ -321,7 +395,7 @@ class PresetModel(BaseModel):
 # tasks
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """Internal representation of a task parsed from markdown."""
 
@@ -329,15 +403,33 @@ class Task:
     status: str  # "open" or "closed"
     do_date: date | None
     parent: str | None
-    notes: str
+    notes: str | BodyRef
     created_at: datetime
     completed_at: datetime | None
+    slug: str = field(init=False, repr=False, compare=False)
+    id: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def id(self) -> str:
-        """Generate a timestamp + slug ID from created_at and title."""
-        return (
-            f"{self.created_at.strftime('%Y%m%d-%H%M%S')}-{slugify(self.title).lower()}"
+    def __post_init__(self) -> None:
+        """Precompute the slugified title and the timestamp + slug ID."""
+        self.slug = slugify(self.title).lower()
+        self.id = f"{self.created_at.strftime('%Y%m%d-%H%M%S')}-{self.slug}"
+
+    @classmethod
+    def from_model(
+        cls,
+        model: "TaskModel",
+        created_at: datetime,
+        completed_at: datetime | None = None,
+    ) -> "Task":
+        """Build the parsed form of a task written from API input."""
+        return cls(
+            title=model.title,
+            status=model.status,
+            do_date=model.do_date,
+            parent=model.parent,
+            notes=(model.notes or "").strip(),
+            created_at=created_at,
+            completed_at=completed_at,
         )
 
 
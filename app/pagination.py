@@ -0,0 +1,77 @@
+import base64
+import binascii
+import bisect
+import json
+from collections.abc import Callable, Sequence
+from typing import TypeVar
+
+from fastapi import HTTPException
+
+from app.indexes import SortKey
+
+T = TypeVar("T")
+
+# sorts after any character an ID or date can contain, for inclusive upper bounds
+KEY_MAX: str = "\uffff"
+
+
+def encode_cursor(key: SortKey) -> str:
+    """Encode a sort key as an opaque URL-safe cursor string."""
+    raw: bytes = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Decode a cursor produced by encode_cursor, raising 400 if malformed."""
+    try:
+        raw: bytes = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    return tuple(value)
+
+
+def paginate(
+    items: Sequence[T],
+    key: Callable[[T], SortKey],
+    *,
+    lo: SortKey | None = None,
+    hi: SortKey | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+    descending: bool = False,
+    where: Callable[[T], bool] | None = None,
+) -> tuple[list[T], str | None]:
+    """Return one page of a key-sorted sequence and the cursor for the next page.
+
+    Items are restricted to lo <= key <= hi and to those after the cursor (the
+    key of the previous page's last item) by bisecting, so a page costs
+    O(log n + page) unless the where filter skips items.
+    """
+    start: int = 0 if lo is None else bisect.bisect_left(items, lo, key=key)
+    stop: int = len(items) if hi is None else bisect.bisect_right(items, hi, key=key)
+    if cursor is not None:
+        after: SortKey = decode_cursor(cursor)
+        if descending:
+            stop = min(stop, bisect.bisect_left(items, after, key=key))
+        else:
+            start = max(start, bisect.bisect_right(items, after, key=key))
+
+    indices = range(stop - 1, start - 1, -1) if descending else range(start, stop)
+    page: list[T] = []
+    for i in indices:
+        item = items[i]
+        if where is not None and not where(item):
+            continue
+        if limit is not None and len(page) == limit:
+            return page, encode_cursor(key(page[-1]))
+        page.append(item)
+    return page, None
+
+
+def set_next_cursor(headers: dict[str, str], cursor: str | None) -> None:
+    """Expose the next-page cursor to the client in the X-Next-Cursor header."""
+    if cursor is not None:
+        headers["X-Next-Cursor"] = cursor
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Generic, TypeVar
+
+logger: logging.Logger = logging.getLogger("uvicorn.error")
+
+# (mtime_ns, size, inode) of a file, as recorded by FileStore
+Signature = tuple[int, int, int]
+
+T = TypeVar("T")
+
+# version of the JSON record format, part of every fingerprint
+RECORD_FORMAT: int = 2
+
+# coarsest mtime resolution expected of a filesystem: a file read less than
+# this long after its mtime could be rewritten without its stat changing
+MTIME_GRANULARITY_NS: int = 2_000_000_000
+# digest of a file recorded within the granularity without hashing its
+# content; such entries are never cached
+UNVERIFIED: str = ""
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    store TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    digest TEXT,
+    item TEXT NOT NULL,
+    PRIMARY KEY (store, path)
+) WITHOUT ROWID;
+"""
+
+
+def source_fingerprint(*modules: ModuleType, salt: str = "") -> str:
+    """Hash the source of the modules that parse and define cached items.
+
+    Any edit to them, a different Python or a different salt (for settings
+    that change what parsing produces) invalidates the whole cache so records
+    of changed dataclasses are never loaded.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{sys.version}:{RECORD_FORMAT}:{salt}".encode())
+    for module in modules:
+        digest.update(Path(module.__file__ or "").read_bytes())
+    return digest.hexdigest()
+
+
+def is_racy(mtime_ns: int) -> bool:
+    """Return True if a file with this mtime could change without its stat."""
+    return time.time_ns() - mtime_ns < MTIME_GRANULARITY_NS
+
+
+def content_digest(path: Path) -> str:
+    """Return a hash of a file's bytes, for checking entries with a racy stat."""
+    return hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class ItemCodec(Generic[T]):
+    """Converts a store's items to JSON records and back.
+
+    Records hold plain data only, so loading a cache entry never runs code
+    chosen by the file's contents; from_record also gets the entry's path.
+    """
+
+    to_record: Callable[[T], dict[str, Any]]
+    from_record: Callable[[dict[str, Any], Path], T]
+
+    def dumps(self, item: T, path: Path) -> str | None:
+        """Encode an item, or log the error and return None if it cannot be."""
+        try:
+            return json.dumps(
+                self.to_record(item), ensure_ascii=False, separators=(",", ":")
+            )
+        except Exception:
+            logger.exception("Not caching %s", path)
+            return None
+
+    def loads(self, text: str, path: Path) -> T:
+        """Rebuild an item from its encoded record."""
+        return self.from_record(json.loads(text), path)
+
+
+class ParseCache:
+    """SQLite sidecar holding a JSON record of every content file's item.
+
+    Entries are keyed by store and path and carry the stat signature the
+    item was parsed from, so a cold start only re-parses files whose
+    signature changed. A file parsed within MTIME_GRANULARITY_NS of its
+    mtime also carries a digest of its content, checked before its entry is
+    trusted, since a rewrite in the same tick keeps the stat. Any database
+    error disables the cache after logging it; callers then simply parse
+    every file.
+    """
+
+    def __init__(self, path: Path, fingerprint: str) -> None:
+        self.path: Path = path
+        self._lock: threading.Lock = threading.Lock()
+        # signatures and digests already in the database, per store, for diffs
+        self._synced: dict[str, dict[str, tuple[Signature, str | None]]] = {}
+        self._db: sqlite3.Connection | None = None
+        try:
+            self._db = self._open(fingerprint)
+        except sqlite3.DatabaseError as e:
+            logger.warning("Parse cache %s unreadable (%s), rebuilding", path, e)
+            try:
+                path.unlink(missing_ok=True)
+                self._db = self._open(fingerprint)
+            except (OSError, sqlite3.DatabaseError) as e:
+                logger.warning("Parse cache disabled: %s", e)
+
+    def _open(self, fingerprint: str) -> sqlite3.Connection:
+        """Open the database, clearing it if written by different code."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            row = db.execute(
+                "SELECT value FROM meta WHERE key = 'fingerprint'"
+            ).fetchone()
+            if row is None or row[0] != fingerprint:
+                # recreated rather than emptied, in case its columns changed
+                db.execute("DROP TABLE entries")
+                db.executescript(SCHEMA)
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)",
+                        (fingerprint,),
+                    )
+        except sqlite3.DatabaseError:
+            db.close()
+            raise
+        return db
+
+    def _disable(self, error: Exception) -> None:
+        """Stop using the database after an error; callers hold the lock."""
+        logger.warning("Parse cache disabled: %s", error)
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def load(self, store: str) -> dict[str, tuple[Signature, str | None, str]]:
+        """Return the cached signature, digest and record of each file of a store."""
+        with self._lock:
+            if self._db is None:
+                return {}
+            try:
+                rows = self._db.execute(
+                    "SELECT path, mtime_ns, size, inode, digest, item FROM entries "
+                    "WHERE store = ?",
+                    (store,),
+                ).fetchall()
+            except sqlite3.DatabaseError as e:
+                self._disable(e)
+                return {}
+        entries: dict[str, tuple[Signature, str | None, str]] = {
+            path: ((mtime_ns, size, inode), digest, item)
+            for path, mtime_ns, size, inode, digest, item in rows
+        }
+        self._synced[store] = {
+            path: (sig, digest) for path, (sig, digest, _) in entries.items()
+        }
+        return entries
+
+    def sync(
+        self,
+        store: str,
+        items: dict[str, tuple[Signature, str | None, Any]],
+        encode: Callable[[Any, Path], str | None],
+    ) -> None:
+        """Write the entries that changed since the last sync and drop gone ones.
+
+        Unverified items and those encode() returns None for are left out, so
+        they are parsed again on the next start.
+        """
+        synced: dict[str, tuple[Signature, str | None]] = self._synced.setdefault(
+            store, {}
+        )
+        upserts: list[tuple] = []
+        # recorded as synced without a row, so they are not encoded again
+        skipped: dict[str, tuple[Signature, str | None]] = {}
+        for path, (sig, digest, item) in items.items():
+            if synced.get(path) == (sig, digest):
+                continue
+            text: str | None = (
+                None if digest == UNVERIFIED else encode(item, Path(path))
+            )
+            if text is not None:
+                upserts.append((store, path, *sig, digest, text))
+            else:
+                skipped[path] = (sig, digest)
+        removes: list[tuple[str, str]] = [
+            (store, path)
+            for path in (synced.keys() - items.keys())
+            | (skipped.keys() & synced.keys())
+        ]
+        if not upserts and not removes:
+            synced.update(skipped)
+            return
+
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        upserts,
+                    )
+                    self._db.executemany(
+                        "DELETE FROM entries WHERE store = ? AND path = ?", removes
+                    )
+            except sqlite3.DatabaseError as e:
+                self._disable(e)
+                return
+        for _, path in removes:
+            del synced[path]
+        synced.update(skipped)
+        for _, path, mtime_ns, size, inode, digest, _ in upserts:
+            synced[path] = ((mtime_ns, size, inode), digest)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,190 @@
+import bisect
+import math
+from array import array
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date
+
+from app.models import Workout, WorkoutSet
+from app.store import StoreIndex
+
+
+def exercise_key(name: str) -> str:
+    """Normalize an exercise name so case and spacing variants share a series."""
+    return " ".join(name.lower().split())
+
+
+def estimated_1rm(reps: int, weight: float) -> float:
+    """Estimate a one-rep max from a set with the Epley formula."""
+    return weight if reps == 1 else weight * (1 + reps / 30)
+
+
+@dataclass(slots=True)
+class SessionSummary:
+    """One exercise's sets within one workout, reduced to the tracked figures.
+
+    Weights are NaN when no set of the exercise had a weight.
+    """
+
+    best_weight: float
+    best_reps: int
+    volume: float
+    e1rm: float
+    sets: int
+
+    @classmethod
+    def of(cls, sets: Iterable[WorkoutSet]) -> "SessionSummary":
+        """Summarize sets: heaviest set (most reps on ties), volume and e1RM."""
+        best: tuple[float, int] = (math.nan, 0)
+        volume: float = 0.0
+        e1rm: float = math.nan
+        count: int = 0
+        for s in sets:
+            count += 1
+            reps: int = s.reps or 0
+            if s.weight is None:
+                if math.isnan(best[0]):
+                    best = (math.nan, max(best[1], reps))
+                continue
+            if math.isnan(best[0]) or (s.weight, reps) > best:
+                best = (s.weight, reps)
+            volume += reps * s.weight
+            if reps > 0:
+                estimate: float = estimated_1rm(reps, s.weight)
+                e1rm = estimate if math.isnan(e1rm) else max(e1rm, estimate)
+        return cls(best[0], best[1], volume, e1rm, count)
+
+
+def summarize_workout(workout: Workout) -> dict[str, tuple[str, SessionSummary]]:
+    """Return each exercise's display name and summary within a workout."""
+    sets: dict[str, tuple[str, list[WorkoutSet]]] = {}
+    for group in workout.groups:
+        for exercise in group.exercises:
+            key: str = exercise_key(exercise.name)
+            if key:
+                sets.setdefault(key, (exercise.name.strip(), []))[1].extend(
+                    exercise.sets
+                )
+    return {
+        key: (name, SessionSummary.of(exercise_sets))
+        for key, (name, exercise_sets) in sets.items()
+    }
+
+
+def _nullable(values: Iterable[float]) -> list[float | None]:
+    """Convert NaN to None for JSON output."""
+    return [None if math.isnan(v) else v for v in values]
+
+
+@dataclass
+class ExerciseSeries:
+    """Per-session figures for one exercise as parallel arrays sorted by date.
+
+    Rows are ordered by (date, workout ID); a date range is two bisections
+    and a slice of each column.
+    """
+
+    name: str
+    ordinals: array = field(default_factory=lambda: array("q"))
+    workout_ids: list[str] = field(default_factory=list)
+    best_weight: array = field(default_factory=lambda: array("d"))
+    best_reps: array = field(default_factory=lambda: array("q"))
+    volume: array = field(default_factory=lambda: array("d"))
+    e1rm: array = field(default_factory=lambda: array("d"))
+    sets: array = field(default_factory=lambda: array("q"))
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def _find(self, ordinal: int, workout_id: str) -> tuple[int, bool]:
+        """Return the row position for a session and whether it is present."""
+        i: int = bisect.bisect_left(self.ordinals, ordinal)
+        hi: int = bisect.bisect_right(self.ordinals, ordinal, lo=i)
+        i = bisect.bisect_left(self.workout_ids, workout_id, lo=i, hi=hi)
+        return i, i < hi and self.workout_ids[i] == workout_id
+
+    def insert(
+        self, ordinal: int, workout_id: str, name: str, summary: SessionSummary
+    ) -> None:
+        """Add a session's row in date order."""
+        i, _ = self._find(ordinal, workout_id)
+        if i == len(self.ordinals):
+            # the latest session's spelling names the series
+            self.name = name
+        self.ordinals.insert(i, ordinal)
+        self.workout_ids.insert(i, workout_id)
+        self.best_weight.insert(i, summary.best_weight)
+        self.best_reps.insert(i, summary.best_reps)
+        self.volume.insert(i, summary.volume)
+        self.e1rm.insert(i, summary.e1rm)
+        self.sets.insert(i, summary.sets)
+
+    def remove(self, ordinal: int, workout_id: str) -> None:
+        """Drop a session's row if present."""
+        i, found = self._find(ordinal, workout_id)
+        if not found:
+            return
+        for column in (
+            self.ordinals,
+            self.workout_ids,
+            self.best_weight,
+            self.best_reps,
+            self.volume,
+            self.e1rm,
+            self.sets,
+        ):
+            del column[i]
+
+    def window(self, start: date | None, end: date | None) -> slice:
+        """Return the rows dated within the inclusive [start, end] range."""
+        lo: int = (
+            0 if start is None else bisect.bisect_left(self.ordinals, start.toordinal())
+        )
+        hi: int = (
+            len(self.ordinals)
+            if end is None
+            else bisect.bisect_right(self.ordinals, end.toordinal())
+        )
+        return slice(lo, hi)
+
+    def to_dict(self, start: date | None = None, end: date | None = None) -> dict:
+        """Return the rows within a date range as JSON-serializable columns."""
+        rows: slice = self.window(start, end)
+        return {
+            "name": self.name,
+            "dates": [date.fromordinal(o).isoformat() for o in self.ordinals[rows]],
+            "workout_ids": self.workout_ids[rows],
+            "best_weight": _nullable(self.best_weight[rows]),
+            "best_reps": self.best_reps[rows].tolist(),
+            "volume": self.volume[rows].tolist(),
+            "e1rm": _nullable(self.e1rm[rows]),
+            "sets": self.sets[rows].tolist(),
+        }
+
+
+@dataclass
+class ProgressionIndex(StoreIndex[Workout]):
+    """Exercise name -> time series of per-session best set, volume and e1RM."""
+
+    series: dict[str, ExerciseSeries] = field(default_factory=dict)
+
+    def update(self, removed: list[Workout], added: list[Workout]) -> None:
+        """Drop the sessions of removed workouts and add those of added ones."""
+        for workout in removed:
+            ordinal: int = workout.date.toordinal()
+            for key in summarize_workout(workout):
+                series = self.series.get(key)
+                if series is None:
+                    continue
+                series.remove(ordinal, workout.id)
+                if not series:
+                    del self.series[key]
+        for workout in added:
+            ordinal = workout.date.toordinal()
+            for key, (name, summary) in summarize_workout(workout).items():
+                series = self.series.setdefault(key, ExerciseSeries(name=name))
+                series.insert(ordinal, workout.id, name, summary)
+
+    def get(self, name: str) -> ExerciseSeries | None:
+        """Return the series of an exercise by (unnormalized) name."""
+        return self.series.get(exercise_key(name))
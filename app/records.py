@@ -0,0 +1,204 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from app.bodies import BodyRef
+from app.models import (
+    Activity,
+    ActivityModel,
+    ExerciseGroup,
+    Habit,
+    HabitModel,
+    Media,
+    MediaModel,
+    Preset,
+    PresetModel,
+    Task,
+    TaskModel,
+    Workout,
+    WorkoutModel,
+    WorkoutTemplate,
+    WorkoutTemplateModel,
+)
+from app.parse_cache import ItemCodec
+
+# Data-only records of parsed items, as the parse cache stores them: an
+# item's fields as its API model takes them, plus what the model does not
+# carry (the body, which may be a lazy BodyRef, and task timestamps).
+# Records are rebuilt through the items' from_model constructors.
+
+
+def body_record(body: str | BodyRef) -> dict[str, Any]:
+    """Return the record of a body: its text, or where it sits in its file."""
+    if isinstance(body, str):
+        return {"text": body}
+    return {
+        "offset": body.offset,
+        "length": body.length,
+        "mtime_ns": body.mtime_ns,
+        "size": body.size,
+        "inode": body.inode,
+    }
+
+
+def body_from_record(record: dict[str, Any], path: Path) -> str | BodyRef:
+    """Rebuild a body; a BodyRef always points into the cached file itself."""
+    if "text" in record:
+        return str(record["text"])
+    return BodyRef(
+        path=path,
+        offset=int(record["offset"]),
+        length=int(record["length"]),
+        mtime_ns=int(record["mtime_ns"]),
+        size=int(record["size"]),
+        inode=int(record["inode"]),
+    )
+
+
+def groups_record(groups: list[ExerciseGroup]) -> list[dict[str, Any]]:
+    """Return the model fields of exercise groups."""
+    return [
+        {
+            "name": g.name,
+            "rest_seconds": g.rest_seconds,
+            "exercises": [
+                {
+                    "name": e.name,
+                    "sets": [{"reps": s.reps, "weight": s.weight} for s in e.sets],
+                }
+                for e in g.exercises
+            ],
+        }
+        for g in groups
+    ]
+
+
+def media_record(media: Media) -> dict[str, Any]:
+    """Return the record of a media item."""
+    return {
+        "model": {
+            "name": media.name,
+            "country": media.country_str,
+            "type": media.type_str,
+            "status": media.status_str,
+            "rating": media.rating,
+        },
+        "body": body_record(media.review),
+    }
+
+
+def media_from_record(record: dict[str, Any], path: Path) -> Media:
+    """Rebuild a media item from its record."""
+    media = Media.from_model(MediaModel.model_validate(record["model"]))
+    media.review = body_from_record(record["body"], path)
+    return media
+
+
+def workout_record(workout: Workout) -> dict[str, Any]:
+    """Return the record of a workout."""
+    return {
+        "model": {
+            "date": workout.date.isoformat(),
+            "time": workout.time.isoformat(),
+            "groups": groups_record(workout.groups),
+        },
+        "body": body_record(workout.content),
+    }
+
+
+def workout_from_record(record: dict[str, Any], path: Path) -> Workout:
+    """Rebuild a workout from its record."""
+    workout = Workout.from_model(WorkoutModel.model_validate(record["model"]))
+    workout.content = body_from_record(record["body"], path)
+    return workout
+
+
+def template_record(template: WorkoutTemplate) -> dict[str, Any]:
+    """Return the record of a workout template."""
+    return {"model": {"name": template.name, "groups": groups_record(template.groups)}}
+
+
+def template_from_record(record: dict[str, Any], path: Path) -> WorkoutTemplate:
+    """Rebuild a workout template from its record."""
+    return WorkoutTemplate.from_model(
+        WorkoutTemplateModel.model_validate(record["model"])
+    )
+
+
+def habit_record(habit: Habit) -> dict[str, Any]:
+    """Return the record of a habit."""
+    return {
+        "model": {
+            "name": habit.name,
+            "days": habit.days,
+            "color": habit.color,
+            "completions": habit.completions.values(),
+            "shifts": [
+                {"from_date": s.from_date, "to_date": s.to_date} for s in habit.shifts
+            ],
+        }
+    }
+
+
+def habit_from_record(record: dict[str, Any], path: Path) -> Habit:
+    """Rebuild a habit from its record."""
+    return Habit.from_model(HabitModel.model_validate(record["model"]))
+
+
+def activity_record(activity: Activity) -> dict[str, Any]:
+    """Return the record of an activity."""
+    return {"model": {"name": activity.name, "date": activity.date.isoformat()}}
+
+
+def activity_from_record(record: dict[str, Any], path: Path) -> Activity:
+    """Rebuild an activity from its record."""
+    return Activity.from_model(ActivityModel.model_validate(record["model"]))
+
+
+def preset_record(preset: Preset) -> dict[str, Any]:
+    """Return the record of a preset."""
+    return {"model": {"name": preset.name}}
+
+
+def preset_from_record(record: dict[str, Any], path: Path) -> Preset:
+    """Rebuild a preset from its record."""
+    return Preset.from_model(PresetModel.model_validate(record["model"]))
+
+
+def task_record(task: Task) -> dict[str, Any]:
+    """Return the record of a task."""
+    return {
+        "model": {
+            "title": task.title,
+            "status": task.status,
+            "do_date": task.do_date.isoformat() if task.do_date else None,
+            "parent": task.parent,
+        },
+        "created_at": task.created_at.isoformat(),
+        "completed_at": task.completed_at.isoformat() if task.completed_at else None,
+        "body": body_record(task.notes),
+    }
+
+
+def task_from_record(record: dict[str, Any], path: Path) -> Task:
+    """Rebuild a task from its record."""
+    completed_at: str | None = record["completed_at"]
+    task = Task.from_model(
+        TaskModel.model_validate(record["model"]),
+        datetime.fromisoformat(record["created_at"]),
+        datetime.fromisoformat(completed_at) if completed_at else None,
+    )
+    task.notes = body_from_record(record["body"], path)
+    return task
+
+
+# codec of each store's items, keyed by store name
+ITEM_CODECS: dict[str, ItemCodec] = {
+    "media": ItemCodec(media_record, media_from_record),
+    "workout": ItemCodec(workout_record, workout_from_record),
+    "template": ItemCodec(template_record, template_from_record),
+    "habit": ItemCodec(habit_record, habit_from_record),
+    "activity": ItemCodec(activity_record, activity_from_record),
+    "preset": ItemCodec(preset_record, preset_from_record),
+    "task": ItemCodec(task_record, task_from_record),
+}
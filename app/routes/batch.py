@@ -0,0 +1,321 @@
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+
+import frontmatter
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field, ValidationError
+
+from app.http_cache import entity_etag, etag_matches
+from app.models import (
+    Activity,
+    ActivityModel,
+    Habit,
+    HabitModel,
+    MediaModel,
+    Preset,
+    PresetModel,
+    Task,
+    TaskModel,
+    Workout,
+    WorkoutModel,
+)
+from app.routes.habits import parse_activity_to_dict, parse_habit_to_dict
+from app.routes.media import parse_media_to_dict, to_media
+from app.routes.tasks import (
+    apply_task_create,
+    apply_task_delete,
+    apply_task_update,
+    parse_task_to_dict,
+)
+from app.routes.workout import parse_workout_to_dict
+from app.writer import activity_post, habit_post, media_post, preset_post, workout_post
+
+router = APIRouter()
+
+MAX_BATCH_OPERATIONS: int = 5000
+
+
+class BatchOperation(BaseModel):
+    """One create, update or delete in a batch request."""
+
+    op: Literal["create", "update", "delete"]
+    collection: Literal["media", "workout", "habit", "activity", "preset", "task"]
+    id: str | None = None
+    data: dict[str, Any] | None = None
+    # ETag the targeted item must still have, as with an If-Match header
+    if_match: str | None = None
+
+
+class BatchRequest(BaseModel):
+    """Pydantic model for batch mutation input."""
+
+    operations: list[BatchOperation] = Field(
+        min_length=1, max_length=MAX_BATCH_OPERATIONS
+    )
+
+
+@dataclass(frozen=True)
+class FileCollection:
+    """How a collection keyed by its model's id is validated, parsed and written."""
+
+    model: type[BaseModel]
+    parse: Callable[[Any], Any]
+    post: Callable[[Any], frontmatter.Post]
+    to_dict: Callable[[Any], dict]
+
+
+FILE_COLLECTIONS: dict[str, FileCollection] = {
+    "media": FileCollection(MediaModel, to_media, media_post, parse_media_to_dict),
+    "workout": FileCollection(
+        WorkoutModel, Workout.from_model, workout_post, parse_workout_to_dict
+    ),
+    "habit": FileCollection(
+        HabitModel, Habit.from_model, habit_post, parse_habit_to_dict
+    ),
+    "activity": FileCollection(
+        ActivityModel, Activity.from_model, activity_post, parse_activity_to_dict
+    ),
+    "preset": FileCollection(
+        PresetModel,
+        Preset.from_model,
+        preset_post,
+        lambda p: {"id": p.id, "name": p.name},
+    ),
+}
+
+
+@dataclass
+class BatchPlan:
+    """The validated effect of a batch, built before anything is applied.
+
+    The overlay holds the item each touched file will have after the
+    operations so far (None once deleted), so later operations are validated
+    against the batch's own earlier changes as well as the stores.
+    """
+
+    request: Request
+    # creation time of the batch's new tasks, kept when the batch is re-planned
+    now: datetime = field(default_factory=datetime.now)
+    overlay: dict[Path, Any] = field(default_factory=dict)
+    # net file changes per one-file-per-item store: (item, post), or None to delete
+    changes: dict[str, dict[Path, tuple[Any, frontmatter.Post] | None]] = field(
+        default_factory=dict
+    )
+    # task operations, applied in order so each cascade sees the updated tree;
+    # each returns its task (if any) and the future of its writes
+    task_steps: list[Callable[[], tuple[Task | None, asyncio.Future]]] = field(
+        default_factory=list
+    )
+    # each operation's response, or the index of the task step whose task it returns
+    results: list[dict | int] = field(default_factory=list)
+
+    def directory(self, name: str) -> Path:
+        """Return the directory of the named store."""
+        return self.request.app.state.stores[name].directory
+
+    def get(self, name: str, path: Path) -> Any:
+        """Return a file's item as of the operations planned so far."""
+        if path in self.overlay:
+            return self.overlay[path]
+        return self.request.app.state.stores[name].get(path)
+
+    def existing(self, name: str, op: BatchOperation) -> Path:
+        """Return the path of the item an operation targets.
+
+        Raises 404 if it is missing and 412 if it fails the operation's
+        if_match ETag.
+        """
+        if not op.id:
+            raise HTTPException(status_code=422, detail="id is required")
+        path: Path = self.directory(name) / f"{op.id}.md"
+        item: Any = self.get(name, path)
+        if item is None:
+            raise HTTPException(status_code=404, detail=f"{op.id}.md not found")
+        if op.if_match is not None and not etag_matches(
+            op.if_match, entity_etag(item), strong=True
+        ):
+            raise HTTPException(status_code=412, detail="item has been modified")
+        return path
+
+    def stage(
+        self, name: str, path: Path, change: tuple[Any, frontmatter.Post] | None
+    ) -> None:
+        """Record the latest change to a file of a one-file-per-item store."""
+        self.overlay[path] = change[0] if change else None
+        self.changes.setdefault(name, {})[path] = change
+
+    def task_children(self, task_id: str) -> list[tuple[Path, Task]]:
+        """Return the sub-tasks of a task as of the operations planned so far."""
+        tasks_dir: Path = self.directory("task")
+        children: dict[Path, Task] = {
+            tasks_dir / f"{node.id}.md": node.task
+            for node in self.request.app.state.task_tree.children_of(task_id)
+        }
+        for path, task in self.overlay.items():
+            if path.parent != tasks_dir:
+                continue
+            if task is not None and task.parent == task_id:
+                children[path] = task
+            else:
+                children.pop(path, None)
+        return list(children.items())
+
+
+def _validate(model: type[BaseModel], data: dict[str, Any] | None) -> Any:
+    """Validate an operation's data, raising 422 with pydantic's errors."""
+    try:
+        return model.model_validate(data or {})
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=e.errors(include_url=False, include_context=False),
+        )
+
+
+def _plan_file_op(plan: BatchPlan, name: str, op: BatchOperation) -> None:
+    """Validate and stage one operation on a one-file-per-item store."""
+    if op.op == "delete":
+        plan.stage(name, plan.existing(name, op), None)
+        plan.results.append({"ok": True})
+        return
+
+    collection: FileCollection = FILE_COLLECTIONS[name]
+    model: Any = _validate(collection.model, op.data)
+    item: Any = collection.parse(model)
+    new_path: Path = plan.directory(name) / f"{model.id}.md"
+    old_path: Path | None = plan.existing(name, op) if op.op == "update" else None
+    if new_path != old_path and plan.get(name, new_path) is not None:
+        raise HTTPException(status_code=409, detail=f"{name} already exists")
+
+    if old_path is not None and old_path != new_path:
+        plan.stage(name, old_path, None)
+    plan.stage(name, new_path, (item, collection.post(model)))
+    plan.results.append(collection.to_dict(item))
+
+
+def _plan_task_op(plan: BatchPlan, op: BatchOperation) -> None:
+    """Validate one task operation and queue it to run after validation."""
+    request: Request = plan.request
+    tasks_dir: Path = plan.directory("task")
+
+    if op.op == "delete":
+        path: Path = plan.existing("task", op)
+        pending: list[Path] = [path]
+        while pending:
+            current: Path = pending.pop()
+            plan.overlay[current] = None
+            pending.extend(p for p, _ in plan.task_children(current.stem))
+        task_id: str = op.id
+        plan.task_steps.append(lambda: (None, apply_task_delete(request, task_id)))
+        plan.results.append({"ok": True})
+        return
+
+    task: TaskModel = _validate(TaskModel, op.data)
+    if op.op == "create":
+        now: datetime = plan.now
+        path = tasks_dir / f"{task.make_id(now)}.md"
+        if plan.get("task", path) is not None:
+            raise HTTPException(status_code=409, detail="task already exists")
+        if task.parent:
+            parent: Task | None = plan.get("task", tasks_dir / f"{task.parent}.md")
+            if parent and parent.parent:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Sub-tasks of sub-tasks are not allowed",
+                )
+        plan.overlay[path] = Task.from_model(task, now)
+        plan.results.append(len(plan.task_steps))
+        plan.task_steps.append(lambda: apply_task_create(request, task, now))
+        return
+
+    old_path: Path = plan.existing("task", op)
+    existing: Task = plan.get("task", old_path)
+    new_id: str = task.make_id(existing.created_at)
+    new_path: Path = tasks_dir / f"{new_id}.md"
+    if new_path != old_path:
+        if plan.get("task", new_path) is not None:
+            raise HTTPException(status_code=409, detail="task already exists")
+        for child_path, child in plan.task_children(old_path.stem):
+            plan.overlay[child_path] = replace(child, parent=new_id)
+        plan.overlay[old_path] = None
+    plan.overlay[new_path] = Task.from_model(
+        task, existing.created_at, existing.completed_at
+    )
+    task_id = op.id
+    plan.results.append(len(plan.task_steps))
+    plan.task_steps.append(lambda: apply_task_update(request, task_id, task))
+
+
+def _plan_batch(plan: BatchPlan, batch: BatchRequest) -> BatchPlan:
+    """Validate every operation of a batch into the plan.
+
+    Raises 422 listing each failing operation's index, status and detail.
+    """
+    errors: list[dict[str, Any]] = []
+    for index, op in enumerate(batch.operations):
+        try:
+            if op.collection == "task":
+                _plan_task_op(plan, op)
+            else:
+                _plan_file_op(plan, op.collection, op)
+        except HTTPException as e:
+            errors.append({"index": index, "status": e.status_code, "detail": e.detail})
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    return plan
+
+
+@router.post("/batch")
+async def apply_batch(request: Request, batch: BatchRequest) -> dict:
+    """Apply a list of create, update and delete operations across collections.
+
+    Every operation is validated first, in order and against the effect of
+    the ones before it; if any fails nothing is applied and the response is
+    a 422 listing each failing operation's index, status and detail. A valid
+    batch is applied to the in-memory stores with one publish per store
+    (task operations run one by one so their cascades see the updated tree),
+    its files go out in the write queue's next flush, which the response
+    waits for as apply_writes does, and one SSE invalidate covers every
+    affected collection. The entity locks of every touched file are held
+    from validation until that flush, as for single-item mutations.
+    """
+    plan: BatchPlan = _plan_batch(BatchPlan(request=request), batch)
+    while True:
+        paths: set[Path] = set(plan.overlay)
+        async with request.app.state.entity_locks.hold(*paths):
+            # the stores may have changed while waiting for the locks
+            plan = _plan_batch(BatchPlan(request=request, now=plan.now), batch)
+            if not set(plan.overlay) <= paths:
+                continue
+
+            written: list[asyncio.Future] = [
+                request.app.state.apply_writes(
+                    name,
+                    {p: change for p, change in changes.items() if change is not None},
+                    [p for p, change in changes.items() if change is None],
+                )
+                for name, changes in plan.changes.items()
+            ]
+            tasks: list[Task | None] = []
+            for step in plan.task_steps:
+                task, task_written = step()
+                tasks.append(task)
+                written.append(task_written)
+            await asyncio.gather(*written)
+            break
+
+    changed: set[str] = set(plan.changes)
+    if tasks:
+        changed.add("task")
+    await request.app.state.broadcast_store_changes(changed)
+    tree = request.app.state.task_tree
+    return {
+        "results": [
+            parse_task_to_dict(tasks[r], tree) if isinstance(r, int) else r
+            for r in plan.results
+        ]
+    }
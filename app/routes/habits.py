@@ -1,10 +1,14 @@
 from datetime import date as date_cls
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
-from slugify import slugify
 
+from app.backends import QueryBackend
+from app.completions import CompletionSet
+from app.habit_stats import HabitStatsCache
+from app.http_cache import check_if_match, collection_response, entity_etag
+from app.indexes import NameCounter
 from app.models import (
     Activity,
     ActivityModel,
@@ -14,8 +18,9 @@ from app.models import (
     Preset,
     PresetModel,
 )
-from app.writer import write_activity, write_habit, write_preset
+from app.pagination import KEY_MAX, set_next_cursor
 from app.sse import manager
+from app.writer import activity_post, habit_post, preset_post
 
 
 class ShiftRequestModel(BaseModel):
@@ -47,7 +52,7 @@ def get_presets_dir(request: Request) -> Path:
 def try_get_habit_md(request: Request, habit_id: str) -> Path:
     """Return the markdown file path for a habit, raising 404 if missing."""
     md_path = get_habits_dir(request) / f"{habit_id}.md"
-    if not md_path.exists():
+    if request.app.state.stores["habit"].get(md_path) is None:
         raise HTTPException(status_code=404, detail=f"{habit_id}.md not found")
     return md_path
 
@@ -55,7 +60,7 @@ def try_get_habit_md(request: Request, habit_id: str) -> Path:
 def try_get_activity_md(request: Request, activity_id: str) -> Path:
     """Return the markdown file path for an activity, raising 404 if missing."""
     md_path = get_activities_dir(request) / f"{activity_id}.md"
-    if not md_path.exists():
+    if request.app.state.stores["activity"].get(md_path) is None:
         raise HTTPException(status_code=404, detail=f"{activity_id}.md not found")
     return md_path
 
@@ -63,19 +68,30 @@ def try_get_activity_md(request: Request, activity_id: str) -> Path:
 def try_get_preset_md(request: Request, preset_id: str) -> Path:
     """Return the markdown file path for a preset, raising 404 if missing."""
     md_path = get_presets_dir(request) / f"{preset_id}.md"
-    if not md_path.exists():
+    if request.app.state.stores["preset"].get(md_path) is None:
         raise HTTPException(status_code=404, detail=f"{preset_id}.md not found")
     return md_path
 
 
-def parse_habit_to_dict(habit: Habit) -> dict:
-    """Convert a Habit dataclass to a JSON-serializable dict."""
+def parse_habit_to_dict(
+    habit: Habit, start: date_cls | None = None, end: date_cls | None = None
+) -> dict:
+    """Convert a Habit dataclass to a JSON-serializable dict.
+
+    Completions are limited to the inclusive [start, end] window when given;
+    without one, values that are not valid dates are listed after the dates.
+    """
+    completions: list[str] = (
+        habit.completions.values()
+        if start is None and end is None
+        else habit.completions.isoformats(start, end)
+    )
     return {
         "id": habit.id,
         "name": habit.name,
         "days": habit.days,
         "color": habit.color,
-        "completions": habit.completions,
+        "completions": completions,
         "shifts": [{"from": s.from_date, "to": s.to_date} for s in habit.shifts],
     }
 
@@ -93,64 +109,140 @@ def parse_activity_to_dict(activity: Activity) -> dict:
 
 
 @router.get("/habits")
-async def get_habits(request: Request) -> list[dict]:
-    """Return all habits sorted by name."""
-    habits: list[Habit] = sorted(request.app.state.habit_items, key=lambda h: h.name)
-    return [parse_habit_to_dict(h) for h in habits]
+async def get_habits(
+    request: Request,
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = None,
+    start: date_cls | None = None,
+    end: date_cls | None = None,
+) -> Response:
+    """Return habits sorted by name, optionally paged.
+
+    With start and/or end, each habit only lists its completions in that
+    inclusive window (the range a calendar view renders).
+    """
+
+    async def build(headers: dict[str, str]) -> list[dict]:
+        query: QueryBackend = request.app.state.query
+        habits, next_cursor = await query.page("habit", cursor=cursor, limit=limit)
+        set_next_cursor(headers, next_cursor)
+        return [parse_habit_to_dict(h, start, end) for h in habits]
+
+    return await collection_response(request, ["habit"], build)
 
 
 @router.get("/habit/{habit_id}")
-async def get_habit(request: Request, habit_id: str) -> dict:
-    """Return a single habit by ID."""
-    habit: Habit = request.app.state.parse_md_to_habit(
+async def get_habit(
+    request: Request,
+    response: Response,
+    habit_id: str,
+    start: date_cls | None = None,
+    end: date_cls | None = None,
+) -> dict:
+    """Return a single habit by ID, with completions limited to [start, end]."""
+    habit: Habit = request.app.state.stores["habit"].get(
+        try_get_habit_md(request, habit_id)
+    )
+    response.headers["ETag"] = entity_etag(habit)
+    return parse_habit_to_dict(habit, start, end)
+
+
+@router.get("/habit-stats")
+async def get_habit_stats(request: Request, today: date_cls | None = None) -> Response:
+    """Return streaks and weekly/monthly/yearly completion rates of every habit."""
+    today = today or date_cls.today()
+
+    async def build(headers: dict[str, str]) -> list[dict]:
+        stats: HabitStatsCache = request.app.state.habit_stats
+        query: QueryBackend = request.app.state.query
+        habits: list[Habit]
+        habits, _ = await query.page("habit")
+        stats.prune({h.id for h in habits})
+        return [
+            {"id": h.id, "name": h.name, **stats.get(h, today).to_dict()}
+            for h in habits
+        ]
+
+    return await collection_response(request, ["habit"], build, vary=today.isoformat())
+
+
+@router.get("/habit/{habit_id}/stats")
+async def get_single_habit_stats(
+    request: Request, habit_id: str, today: date_cls | None = None
+) -> dict:
+    """Return the streaks and completion rates of one habit."""
+    habit: Habit = request.app.state.stores["habit"].get(
         try_get_habit_md(request, habit_id)
     )
-    return parse_habit_to_dict(habit)
+    stats: HabitStatsCache = request.app.state.habit_stats
+    return {
+        "id": habit.id,
+        "name": habit.name,
+        **stats.get(habit, today or date_cls.today()).to_dict(),
+    }
 
 
 @router.post("/habit")
 async def create_habit(request: Request, habit: HabitModel) -> dict:
     """Create a new habit."""
     md_path: Path = get_habits_dir(request) / f"{habit.id}.md"
-    if md_path.exists():
-        raise HTTPException(status_code=409, detail="habit already exists")
+    async with request.app.state.entity_locks.hold(md_path):
+        if request.app.state.stores["habit"].get(md_path) is not None:
+            raise HTTPException(status_code=409, detail="habit already exists")
 
-    write_habit(habit, md_path)
-    request.app.state.habit_items = request.app.state.parse_all_habits()
+        parsed: Habit = Habit.from_model(habit)
+        await request.app.state.apply_writes(
+            "habit", {md_path: (parsed, habit_post(habit))}
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["habits"]})
-
-    parsed: Habit = request.app.state.parse_md_to_habit(md_path)
     return parse_habit_to_dict(parsed)
 
 
 @router.put("/habit/{habit_id}")
-async def update_habit(request: Request, habit_id: str, habit: HabitModel) -> dict:
+async def update_habit(
+    request: Request, response: Response, habit_id: str, habit: HabitModel
+) -> dict:
     """Update an existing habit, handling renames."""
-    old_md_path: Path = try_get_habit_md(request, habit_id)
     new_md_path: Path = get_habits_dir(request) / f"{habit.id}.md"
-
-    if habit_id != habit.id:
-        old_md_path.unlink()
-
-    write_habit(habit, new_md_path)
-    request.app.state.habit_items = request.app.state.parse_all_habits()
+    parsed: Habit = Habit.from_model(habit)
+
+    async with request.app.state.entity_locks.hold(
+        get_habits_dir(request) / f"{habit_id}.md", new_md_path
+    ):
+        old_md_path: Path = try_get_habit_md(request, habit_id)
+        check_if_match(request, request.app.state.stores["habit"].get(old_md_path))
+        if (
+            new_md_path != old_md_path
+            and request.app.state.stores["habit"].get(new_md_path) is not None
+        ):
+            raise HTTPException(status_code=409, detail="habit already exists")
+        await request.app.state.apply_writes(
+            "habit",
+            {new_md_path: (parsed, habit_post(habit))},
+            removes=[old_md_path] if habit_id != habit.id else [],
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["habits"]})
-
-    parsed: Habit = request.app.state.parse_md_to_habit(new_md_path)
+    response.headers["ETag"] = entity_etag(parsed)
     return parse_habit_to_dict(parsed)
 
 
 @router.delete("/habit/{habit_id}")
 async def delete_habit(request: Request, habit_id: str) -> dict[str, bool]:
     """Delete a habit by ID."""
-    try_get_habit_md(request, habit_id).unlink()
-    request.app.state.habit_items = request.app.state.parse_all_habits()
+    async with request.app.state.entity_locks.hold(
+        get_habits_dir(request) / f"{habit_id}.md"
+    ):
+        md_path: Path = try_get_habit_md(request, habit_id)
+        check_if_match(request, request.app.state.stores["habit"].get(md_path))
+        await request.app.state.apply_writes("habit", removes=[md_path])
     await manager.broadcast({"type": "invalidate", "keys": ["habits"]})
     return {"ok": True}
 
 
 @router.post("/habit/{habit_id}/toggle/{date}")
-async def toggle_habit_completion(request: Request, habit_id: str, date: str) -> dict:
+async def toggle_habit_completion(
+    request: Request, response: Response, habit_id: str, date: str
+) -> dict:
     """Toggle a habit's completion status for a given date."""
     try:
         date_cls.fromisoformat(date)
@@ -159,36 +251,44 @@ async def toggle_habit_completion(request: Request, habit_id: str, date: str) ->
             status_code=400, detail="invalid date format, use YYYY-MM-DD"
         )
 
-    md_path: Path = try_get_habit_md(request, habit_id)
-    habit: Habit = request.app.state.parse_md_to_habit(md_path)
-
-    completions = list(habit.completions)
-    if date in completions:
-        completions.remove(date)
-    else:
-        completions.append(date)
-
-    habit_model = HabitModel(
-        name=habit.name,
-        days=habit.days,
-        color=habit.color,
-        completions=completions,
-        shifts=[
-            HabitShiftModel(from_date=s.from_date, to_date=s.to_date)
-            for s in habit.shifts
-        ],
-    )
-    write_habit(habit_model, md_path)
-    request.app.state.habit_items = request.app.state.parse_all_habits()
+    async with request.app.state.entity_locks.hold(
+        get_habits_dir(request) / f"{habit_id}.md"
+    ):
+        md_path: Path = try_get_habit_md(request, habit_id)
+        habit: Habit = request.app.state.stores["habit"].get(md_path)
+        check_if_match(request, habit)
+
+        completions: CompletionSet = habit.completions.copy()
+        completions.toggle(date)
+
+        habit_model = HabitModel(
+            name=habit.name,
+            days=habit.days,
+            color=habit.color,
+            completions=completions.values(),
+            shifts=[
+                HabitShiftModel(from_date=s.from_date, to_date=s.to_date)
+                for s in habit.shifts
+            ],
+        )
+        parsed: Habit = Habit(
+            name=habit.name,
+            days=list(habit.days),
+            color=habit.color,
+            completions=completions,
+            shifts=list(habit.shifts),
+        )
+        await request.app.state.apply_writes(
+            "habit", {md_path: (parsed, habit_post(habit_model))}
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["habits"]})
-
-    parsed: Habit = request.app.state.parse_md_to_habit(md_path)
+    response.headers["ETag"] = entity_etag(parsed)
     return parse_habit_to_dict(parsed)
 
 
 @router.post("/habit/{habit_id}/shift")
 async def shift_habit(
-    request: Request, habit_id: str, shift: ShiftRequestModel
+    request: Request, response: Response, habit_id: str, shift: ShiftRequestModel
 ) -> dict:
     """Add or replace a date shift for a habit occurrence."""
     try:
@@ -200,36 +300,43 @@ async def shift_habit(
             status_code=400, detail="invalid date format, use YYYY-MM-DD"
         )
 
-    md_path: Path = try_get_habit_md(request, habit_id)
-    habit: Habit = request.app.state.parse_md_to_habit(md_path)
-
-    # Replace any existing shift with same from_date, then append the new one
-    updated_shifts = [
-        HabitShiftModel(from_date=s.from_date, to_date=s.to_date)
-        for s in habit.shifts
-        if s.from_date != shift.from_date
-    ]
-    updated_shifts.append(
-        HabitShiftModel(from_date=shift.from_date, to_date=shift.to_date)
-    )
+    async with request.app.state.entity_locks.hold(
+        get_habits_dir(request) / f"{habit_id}.md"
+    ):
+        md_path: Path = try_get_habit_md(request, habit_id)
+        habit: Habit = request.app.state.stores["habit"].get(md_path)
+        check_if_match(request, habit)
 
-    habit_model = HabitModel(
-        name=habit.name,
-        days=habit.days,
-        color=habit.color,
-        completions=habit.completions,
-        shifts=updated_shifts,
-    )
-    write_habit(habit_model, md_path)
-    request.app.state.habit_items = request.app.state.parse_all_habits()
-    await manager.broadcast({"type": "invalidate", "keys": ["habits"]})
+        # Replace any existing shift with same from_date, then append the new one
+        updated_shifts = [
+            HabitShiftModel(from_date=s.from_date, to_date=s.to_date)
+            for s in habit.shifts
+            if s.from_date != shift.from_date
+        ]
+        updated_shifts.append(
+            HabitShiftModel(from_date=shift.from_date, to_date=shift.to_date)
+        )
 
-    parsed: Habit = request.app.state.parse_md_to_habit(md_path)
+        habit_model = HabitModel(
+            name=habit.name,
+            days=habit.days,
+            color=habit.color,
+            completions=habit.completions.values(),
+            shifts=updated_shifts,
+        )
+        parsed: Habit = Habit.from_model(habit_model)
+        await request.app.state.apply_writes(
+            "habit", {md_path: (parsed, habit_post(habit_model))}
+        )
+    await manager.broadcast({"type": "invalidate", "keys": ["habits"]})
+    response.headers["ETag"] = entity_etag(parsed)
     return parse_habit_to_dict(parsed)
 
 
 @router.delete("/habit/{habit_id}/shift/{from_date}")
-async def cancel_habit_shift(request: Request, habit_id: str, from_date: str) -> dict:
+async def cancel_habit_shift(
+    request: Request, response: Response, habit_id: str, from_date: str
+) -> dict:
     """Remove a date shift from a habit."""
     try:
         date_cls.fromisoformat(from_date)
@@ -238,27 +345,32 @@ async def cancel_habit_shift(request: Request, habit_id: str, from_date: str) ->
             status_code=400, detail="invalid date format, use YYYY-MM-DD"
         )
 
-    md_path: Path = try_get_habit_md(request, habit_id)
-    habit: Habit = request.app.state.parse_md_to_habit(md_path)
-
-    remaining_shifts = [
-        HabitShiftModel(from_date=s.from_date, to_date=s.to_date)
-        for s in habit.shifts
-        if s.from_date != from_date
-    ]
-
-    habit_model = HabitModel(
-        name=habit.name,
-        days=habit.days,
-        color=habit.color,
-        completions=habit.completions,
-        shifts=remaining_shifts,
-    )
-    write_habit(habit_model, md_path)
-    request.app.state.habit_items = request.app.state.parse_all_habits()
-    await manager.broadcast({"type": "invalidate", "keys": ["habits"]})
+    async with request.app.state.entity_locks.hold(
+        get_habits_dir(request) / f"{habit_id}.md"
+    ):
+        md_path: Path = try_get_habit_md(request, habit_id)
+        habit: Habit = request.app.state.stores["habit"].get(md_path)
+        check_if_match(request, habit)
 
-    parsed: Habit = request.app.state.parse_md_to_habit(md_path)
+        remaining_shifts = [
+            HabitShiftModel(from_date=s.from_date, to_date=s.to_date)
+            for s in habit.shifts
+            if s.from_date != from_date
+        ]
+
+        habit_model = HabitModel(
+            name=habit.name,
+            days=habit.days,
+            color=habit.color,
+            completions=habit.completions.values(),
+            shifts=remaining_shifts,
+        )
+        parsed: Habit = Habit.from_model(habit_model)
+        await request.app.state.apply_writes(
+            "habit", {md_path: (parsed, habit_post(habit_model))}
+        )
+    await manager.broadcast({"type": "invalidate", "keys": ["habits"]})
+    response.headers["ETag"] = entity_etag(parsed)
     return parse_habit_to_dict(parsed)
 
 
@@ -266,104 +378,143 @@ async def cancel_habit_shift(request: Request, habit_id: str, from_date: str) ->
 
 
 @router.get("/activities")
-async def get_activities(request: Request, date: str | None = None) -> list[dict]:
-    """Return all activities, optionally filtered by date."""
-    items: list[Activity] = sorted(
-        request.app.state.activity_items, key=lambda a: a.date
-    )
+async def get_activities(
+    request: Request,
+    date: date_cls | None = None,
+    start: date_cls | None = None,
+    end: date_cls | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = None,
+) -> Response:
+    """Return activities sorted by date, optionally for a single date or range."""
     if date:
-        items = [a for a in items if a.date.isoformat() == date]
-    return [parse_activity_to_dict(a) for a in items]
+        start = end = date
+
+    async def build(headers: dict[str, str]) -> list[dict]:
+        query: QueryBackend = request.app.state.query
+        items, next_cursor = await query.page(
+            "activity",
+            lo=(start.isoformat(),) if start else None,
+            hi=(end.isoformat() + KEY_MAX,) if end else None,
+            cursor=cursor,
+            limit=limit,
+        )
+        set_next_cursor(headers, next_cursor)
+        return [parse_activity_to_dict(a) for a in items]
+
+    return await collection_response(request, ["activity"], build)
 
 
 @router.post("/activity")
 async def create_activity(request: Request, activity: ActivityModel) -> dict:
     """Create a new activity, raising 409 if one already exists for the same date/name."""
-    date_str = activity.date.isoformat()
-    slug = slugify(activity.name).lower()
-
-    existing = [
-        a
-        for a in request.app.state.activity_items
-        if a.date.isoformat() == date_str and slugify(a.name).lower() == slug
-    ]
-    if existing:
-        raise HTTPException(
-            status_code=409, detail="activity already exists for this date"
-        )
-
     md_path: Path = get_activities_dir(request) / f"{activity.id}.md"
-    write_activity(activity, md_path)
-    request.app.state.activity_items = request.app.state.parse_all_activities()
+    async with request.app.state.entity_locks.hold(md_path):
+        if activity.id in request.app.state.ids["activity"]:
+            raise HTTPException(
+                status_code=409, detail="activity already exists for this date"
+            )
+
+        parsed: Activity = Activity.from_model(activity)
+        await request.app.state.apply_writes(
+            "activity", {md_path: (parsed, activity_post(activity))}
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["activities", "habits"]})
-
-    parsed: Activity = request.app.state.parse_md_to_activity(md_path)
     return parse_activity_to_dict(parsed)
 
 
 @router.delete("/activity/{activity_id}")
 async def delete_activity(request: Request, activity_id: str) -> dict[str, bool]:
     """Delete an activity by ID."""
-    try_get_activity_md(request, activity_id).unlink()
-    request.app.state.activity_items = request.app.state.parse_all_activities()
+    async with request.app.state.entity_locks.hold(
+        get_activities_dir(request) / f"{activity_id}.md"
+    ):
+        md_path: Path = try_get_activity_md(request, activity_id)
+        check_if_match(request, request.app.state.stores["activity"].get(md_path))
+        await request.app.state.apply_writes("activity", removes=[md_path])
     await manager.broadcast({"type": "invalidate", "keys": ["activities", "habits"]})
     return {"ok": True}
 
 
 @router.get("/habit-presets")
-async def get_habit_presets(request: Request) -> list[str]:
+async def get_habit_presets(request: Request) -> Response:
     """Return merged list of activity names and explicit preset names."""
-    activity_names = {a.name for a in request.app.state.activity_items}
-    preset_names = {p.name for p in request.app.state.preset_items}
-    return sorted(activity_names | preset_names)
+
+    def build(headers: dict[str, str]) -> list[str]:
+        names: dict[str, NameCounter] = request.app.state.names
+        return sorted(names["activity"].names() | names["preset"].names())
+
+    return await collection_response(request, ["activity", "preset"], build)
 
 
 # explicit preset routes
 
 
 @router.get("/presets")
-async def get_presets(request: Request) -> list[dict]:
+async def get_presets(request: Request) -> Response:
     """Return all explicit presets sorted by name."""
-    presets: list[Preset] = sorted(request.app.state.preset_items, key=lambda p: p.name)
-    return [{"id": p.id, "name": p.name} for p in presets]
+
+    def build(headers: dict[str, str]) -> list[dict]:
+        presets: list[Preset] = sorted(
+            request.app.state.preset_items, key=lambda p: p.name
+        )
+        return [{"id": p.id, "name": p.name} for p in presets]
+
+    return await collection_response(request, ["preset"], build)
 
 
 @router.post("/preset")
 async def create_preset(request: Request, preset: PresetModel) -> dict:
     """Create a new activity preset."""
     md_path: Path = get_presets_dir(request) / f"{preset.id}.md"
-    if md_path.exists():
-        raise HTTPException(status_code=409, detail="preset already exists")
+    async with request.app.state.entity_locks.hold(md_path):
+        if request.app.state.stores["preset"].get(md_path) is not None:
+            raise HTTPException(status_code=409, detail="preset already exists")
 
-    write_preset(preset, md_path)
-    request.app.state.preset_items = request.app.state.parse_all_presets()
+        parsed: Preset = Preset.from_model(preset)
+        await request.app.state.apply_writes(
+            "preset", {md_path: (parsed, preset_post(preset))}
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["presets"]})
-
-    parsed: Preset = request.app.state.parse_md_to_preset(md_path)
     return {"id": parsed.id, "name": parsed.name}
 
 
 @router.put("/preset/{preset_id}")
-async def update_preset(request: Request, preset_id: str, preset: PresetModel) -> dict:
+async def update_preset(
+    request: Request, response: Response, preset_id: str, preset: PresetModel
+) -> dict:
     """Update an existing preset, handling renames."""
-    old_md_path: Path = try_get_preset_md(request, preset_id)
     new_md_path: Path = get_presets_dir(request) / f"{preset.id}.md"
-
-    if preset_id != preset.id:
-        old_md_path.unlink()
-
-    write_preset(preset, new_md_path)
-    request.app.state.preset_items = request.app.state.parse_all_presets()
+    parsed: Preset = Preset.from_model(preset)
+
+    async with request.app.state.entity_locks.hold(
+        get_presets_dir(request) / f"{preset_id}.md", new_md_path
+    ):
+        old_md_path: Path = try_get_preset_md(request, preset_id)
+        check_if_match(request, request.app.state.stores["preset"].get(old_md_path))
+        if (
+            new_md_path != old_md_path
+            and request.app.state.stores["preset"].get(new_md_path) is not None
+        ):
+            raise HTTPException(status_code=409, detail="preset already exists")
+        await request.app.state.apply_writes(
+            "preset",
+            {new_md_path: (parsed, preset_post(preset))},
+            removes=[old_md_path] if preset_id != preset.id else [],
+        )
+    response.headers["ETag"] = entity_etag(parsed)
     await manager.broadcast({"type": "invalidate", "keys": ["presets"]})
-
-    parsed: Preset = request.app.state.parse_md_to_preset(new_md_path)
     return {"id": parsed.id, "name": parsed.name}
 
 
 @router.delete("/preset/{preset_id}")
 async def delete_preset(request: Request, preset_id: str) -> dict[str, bool]:
     """Delete a preset by ID."""
-    try_get_preset_md(request, preset_id).unlink()
-    request.app.state.preset_items = request.app.state.parse_all_presets()
+    async with request.app.state.entity_locks.hold(
+        get_presets_dir(request) / f"{preset_id}.md"
+    ):
+        md_path: Path = try_get_preset_md(request, preset_id)
+        check_if_match(request, request.app.state.stores["preset"].get(md_path))
+        await request.app.state.apply_writes("preset", removes=[md_path])
     await manager.broadcast({"type": "invalidate", "keys": ["presets"]})
     return {"ok": True}
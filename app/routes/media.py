@@ -1,11 +1,17 @@
+from collections.abc import Callable
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from slugify import slugify
 
-from app.models import Media, MediaModel, MediaStatus
-from app.writer import write_media_item
+from app import bodies
+from app.bodies import BodyRef
+from app.backends import QueryBackend
+from app.http_cache import check_if_match, collection_response, entity_etag
+from app.models import Media, MediaCountry, MediaModel, MediaStatus, MediaType
+from app.pagination import KEY_MAX, set_next_cursor
 from app.sse import manager
+from app.writer import media_post
 
 router = APIRouter()
 
@@ -20,7 +26,7 @@ def try_get_media_md(request: Request, media_id: str) -> Path:
     media_dir: Path = get_media_dir(request)
     md_name: str = f"{media_id}.md"
     md_path: Path = media_dir / md_name
-    if not md_path.exists():
+    if request.app.state.stores["media"].get(md_path) is None:
         raise HTTPException(status_code=404, detail=f"{md_name} not found")
     return md_path
 
@@ -30,14 +36,24 @@ def is_duplicate_name(
 ) -> bool:
     """Check if a media item with the given name already exists."""
     new_id: str = slugify(name).lower()
-    for item in request.app.state.media_items:
-        if item.id == new_id and item.id != exclude_id:
-            return True
-    return False
+    return new_id != exclude_id and new_id in request.app.state.ids["media"]
 
 
-def parse_media_to_dict(media: Media) -> dict:
-    """Convert a Media dataclass to a JSON-serializable dict."""
+def to_media(media_item: MediaModel) -> Media:
+    """Build a Media item from API input, raising 422 on unknown enum values."""
+    try:
+        return Media.from_model(media_item)
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=f"invalid value {e}")
+
+
+def parse_media_to_dict(
+    media: Media, body_text: Callable[[str | BodyRef], str] = bodies.text
+) -> dict:
+    """Convert a Media dataclass to a JSON-serializable dict.
+
+    body_text reads the review, such as a lookup from bodies.resolve.
+    """
     return {
         "id": media.id,
         "name": media.name,
@@ -45,17 +61,53 @@ def parse_media_to_dict(media: Media) -> dict:
         "type": media.type_str,
         "status": media.status_str,
         "rating": media.rating,
-        "review": media.review,
+        "review": body_text(media.review),
     }
 
 
 @router.get("/media")
-async def get_media_items(request: Request, status: str = "queued") -> list[dict]:
-    """Return all media items filtered by status."""
-    items: list[Media] = [
-        i for i in request.app.state.media_items if i.status == MediaStatus.get(status)
-    ]
-    return [parse_media_to_dict(i) for i in items]
+async def get_media_items(
+    request: Request,
+    status: str = "queued",
+    type: str | None = None,
+    country: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = None,
+) -> Response:
+    """Return media items with the given status, optionally filtered and paged."""
+    try:
+        status = MediaStatus.get(status).name.lower()
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=f"invalid value {e}")
+    type = type.lower() if type else None
+    country = country.lower() if country else None
+
+    async def build(headers: dict[str, str]) -> list[dict]:
+        query: QueryBackend = request.app.state.query
+        if type is None and country is None:
+            items, next_cursor = await query.page(
+                "media",
+                lo=(status,),
+                hi=(status, KEY_MAX),
+                cursor=cursor,
+                limit=limit,
+            )
+        else:
+            filters: dict[str, str] = {"status": status}
+            if type is not None:
+                filters["type"] = type
+            if country is not None:
+                filters["country"] = country
+            items, next_cursor = await query.page(
+                "media", cursor=cursor, limit=limit, where=filters
+            )
+        set_next_cursor(headers, next_cursor)
+        body_text = await bodies.resolve(
+            request.app.state.reload_executor, [i.review for i in items]
+        )
+        return [parse_media_to_dict(i, body_text) for i in items]
+
+    return await collection_response(request, ["media"], build)
 
 
 @router.get("/media/check-name")
@@ -66,67 +118,100 @@ async def check_name(
     return {"duplicate": is_duplicate_name(request, name, exclude_id=exclude)}
 
 
+@router.get("/media/facets")
+async def get_media_facets(request: Request) -> Response:
+    """Return the number of media items per status, type and country."""
+
+    async def build(headers: dict[str, str]) -> dict[str, dict[str, int]]:
+        query: QueryBackend = request.app.state.query
+        defined: dict[str, list[str]] = {
+            "status": MediaStatus.get_defined_names(),
+            "type": MediaType.get_defined_names(),
+            "country": MediaCountry.get_defined_names(),
+        }
+        result: dict[str, dict[str, int]] = {}
+        for facet, names in defined.items():
+            counts: dict[str, int] = await query.facet_counts("media", facet)
+            result[facet] = {n.lower(): counts.get(n.lower(), 0) for n in names}
+        return result
+
+    return await collection_response(request, ["media"], build)
+
+
 @router.get("/media/{media_id}")
-async def get_media_item(request: Request, media_id: str) -> dict:
+async def get_media_item(request: Request, response: Response, media_id: str) -> dict:
     """Return a single media item by ID."""
-    media: Media = request.app.state.parse_md_to_media(
+    media: Media = request.app.state.stores["media"].get(
         try_get_media_md(request, media_id)
     )
+    response.headers["ETag"] = entity_etag(media)
     return parse_media_to_dict(media)
 
 
 @router.post("/media")
-async def create_media_item(request: Request, media_item: MediaModel) -> dict:
+async def create_media_item(
+    request: Request, response: Response, media_item: MediaModel
+) -> dict:
     """Create a new media item."""
-    if is_duplicate_name(request, media_item.name):
-        raise HTTPException(
-            status_code=422, detail="a media item with this name already exists"
-        )
-
+    media: Media = to_media(media_item)
     media_dir: Path = get_media_dir(request)
     md_path: Path = media_dir / f"{media_item.id}.md"
-    write_media_item(media_item, md_path)
 
-    request.app.state.media_items = request.app.state.parse_all_media()
+    async with request.app.state.entity_locks.hold(md_path):
+        if is_duplicate_name(request, media_item.name):
+            raise HTTPException(
+                status_code=422, detail="a media item with this name already exists"
+            )
+        await request.app.state.apply_writes(
+            "media", {md_path: (media, media_post(media_item))}
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["media"]})
-
-    media: Media = request.app.state.parse_md_to_media(md_path)
+    response.headers["ETag"] = entity_etag(media)
     return parse_media_to_dict(media)
 
 
 @router.put("/media/{media_id}")
 async def update_media_item(
-    request: Request, media_id: str, media_item: MediaModel
+    request: Request, response: Response, media_id: str, media_item: MediaModel
 ) -> dict:
     """Update an existing media item, handling renames."""
-    if is_duplicate_name(request, media_item.name, exclude_id=media_id):
-        raise HTTPException(
-            status_code=422, detail="a media item with this name already exists"
-        )
-
+    media: Media = to_media(media_item)
     media_dir: Path = get_media_dir(request)
-    old_md_path: Path = try_get_media_md(request, media_id)
     new_id: str = media_item.id
-
-    if media_id != new_id:
-        old_md_path.unlink()
-        new_md_path: Path = media_dir / f"{new_id}.md"
-        write_media_item(media_item, new_md_path)
-    else:
-        write_media_item(media_item, old_md_path)
-
-    request.app.state.media_items = request.app.state.parse_all_media()
+    new_md_path: Path = media_dir / f"{new_id}.md"
+
+    async with request.app.state.entity_locks.hold(
+        media_dir / f"{media_id}.md", new_md_path
+    ):
+        if is_duplicate_name(request, media_item.name, exclude_id=media_id):
+            raise HTTPException(
+                status_code=422, detail="a media item with this name already exists"
+            )
+        old_md_path: Path = try_get_media_md(request, media_id)
+        check_if_match(request, request.app.state.stores["media"].get(old_md_path))
+        if (
+            new_md_path != old_md_path
+            and request.app.state.stores["media"].get(new_md_path) is not None
+        ):
+            raise HTTPException(status_code=409, detail="media already exists")
+        await request.app.state.apply_writes(
+            "media",
+            {new_md_path: (media, media_post(media_item))},
+            removes=[old_md_path] if media_id != new_id else [],
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["media"]})
-
-    result_path: Path = media_dir / f"{new_id}.md"
-    media: Media = request.app.state.parse_md_to_media(result_path)
+    response.headers["ETag"] = entity_etag(media)
     return parse_media_to_dict(media)
 
 
 @router.delete("/media/{media_id}")
 async def delete_media_item(request: Request, media_id: str) -> dict[str, bool]:
     """Delete a media item by ID."""
-    try_get_media_md(request, media_id).unlink()
-    request.app.state.media_items = request.app.state.parse_all_media()
+    async with request.app.state.entity_locks.hold(
+        get_media_dir(request) / f"{media_id}.md"
+    ):
+        md_path: Path = try_get_media_md(request, media_id)
+        check_if_match(request, request.app.state.stores["media"].get(md_path))
+        await request.app.state.apply_writes("media", removes=[md_path])
     await manager.broadcast({"type": "invalidate", "keys": ["media"]})
     return {"ok": True}
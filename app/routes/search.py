@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from app.http_cache import collection_response
+from app.search import SearchIndex
+
+router = APIRouter()
+
+
+@router.get("/search")
+async def search(
+    request: Request,
+    q: str,
+    collection: list[str] | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> Response:
+    """Return the items whose title or body match every query word, best first."""
+    searchable: list[str] = request.app.state.search_collections
+    if collection:
+        unknown: list[str] = sorted(set(collection) - set(searchable))
+        if unknown:
+            raise HTTPException(
+                status_code=422, detail=f"unknown collection {', '.join(unknown)}"
+            )
+    names: list[str] = sorted(set(collection)) if collection else searchable
+
+    def build(headers: dict[str, str]) -> list[dict]:
+        index: SearchIndex = request.app.state.search
+        return [hit.to_dict() for hit in index.search(q, names, limit)]
+
+    return await collection_response(request, names, build)
@@ -1,16 +1,26 @@
+import asyncio
 import logging
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager
 from datetime import date, datetime
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Request
+import frontmatter
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from google.genai import errors as genai_errors
 from google.genai import types
 from pydantic import BaseModel
 from slugify import slugify
 
+from app import bodies
+from app.bodies import BodyRef
+from app.http_cache import check_if_match, collection_response, entity_etag
+from app.indexes import IdIndex, TaskNode, TaskTree, task_node_key
 from app.models import Task, TaskModel
-from app.writer import write_task
+from app.pagination import paginate, set_next_cursor
 from app.sse import manager
+from app.store import FileStore
+from app.writer import task_post
 
 logger: logging.Logger = logging.getLogger("uvicorn.error")
 
@@ -25,183 +35,337 @@ def get_tasks_dir(request: Request) -> Path:
 def try_get_task_md(request: Request, task_id: str) -> Path:
     """Return the markdown file path for a task, raising 404 if missing."""
     md_path = get_tasks_dir(request) / f"{task_id}.md"
-    if not md_path.exists():
+    if request.app.state.stores["task"].get(md_path) is None:
         raise HTTPException(status_code=404, detail=f"{task_id}.md not found")
     return md_path
 
 
-def _cascade_delete(task_id: str, all_tasks: list[Task], tasks_dir: Path) -> None:
-    """Recursively delete all descendant sub-tasks of a given task."""
-    children = [t for t in all_tasks if t.parent == task_id]
-    for child in children:
-        _cascade_delete(child.id, all_tasks, tasks_dir)
-        child_path = tasks_dir / f"{child.id}.md"
-        if child_path.exists():
-            child_path.unlink()
+def _cascade_delete(task_id: str, tree: TaskTree, tasks_dir: Path) -> list[Path]:
+    """Recursively collect the files of all descendant sub-tasks to delete."""
+    removed: list[Path] = []
+    for child in list(tree.children_of(task_id)):
+        removed.extend(_cascade_delete(child.id, tree, tasks_dir))
+        removed.append(tasks_dir / f"{child.id}.md")
+    return removed
+
+
+@asynccontextmanager
+async def _hold_subtree(
+    request: Request, task_id: str, *paths: Path
+) -> AsyncIterator[None]:
+    """Hold the locks of a task's file, its sub-tasks' files and any extra paths.
+
+    Sub-tasks are collected before locking; if one was added while waiting
+    for the locks, they are released and taken again with it.
+    """
+    tasks_dir: Path = get_tasks_dir(request)
+    while True:
+        children: list[Path] = _cascade_delete(
+            task_id, request.app.state.task_tree, tasks_dir
+        )
+        async with request.app.state.entity_locks.hold(
+            tasks_dir / f"{task_id}.md", *children, *paths
+        ):
+            added: set[Path] = set(
+                _cascade_delete(task_id, request.app.state.task_tree, tasks_dir)
+            )
+            if added <= set(children):
+                yield
+                return
 
 
 def _cascade_close(
-    task_id: str, all_tasks: list[Task], tasks_dir: Path, completed_at_iso: str | None
-) -> None:
-    """Recursively close all descendant sub-tasks of a given task."""
-    children = [t for t in all_tasks if t.parent == task_id]
-    for child in children:
-        _cascade_close(child.id, all_tasks, tasks_dir, completed_at_iso)
+    task_id: str,
+    tree: TaskTree,
+    tasks_dir: Path,
+    completed_at: datetime | None,
+) -> dict[Path, tuple[Task, frontmatter.Post]]:
+    """Recursively close all descendant sub-tasks, returning the rewritten tasks."""
+    closed: dict[Path, tuple[Task, frontmatter.Post]] = {}
+    for node in list(tree.children_of(task_id)):
+        closed.update(_cascade_close(node.id, tree, tasks_dir, completed_at))
+        child = node.task
         if child.status != "closed":
-            child_path = tasks_dir / f"{child.id}.md"
+            child_path = tasks_dir / f"{node.id}.md"
             child_model = TaskModel(
                 title=child.title,
                 status="closed",
                 do_date=child.do_date,
                 parent=child.parent,
-                notes=child.notes,
+                notes=bodies.text(child.notes),
             )
-            write_task(
+            closed[child_path] = (
+                Task.from_model(child_model, child.created_at, completed_at),
+                task_post(
+                    child_model,
+                    child.created_at.isoformat(),
+                    completed_at.isoformat() if completed_at else None,
+                ),
+            )
+    return closed
+
+
+def _rename_children(
+    task_id: str, new_id: str, tree: TaskTree, tasks_dir: Path
+) -> dict[Path, tuple[Task, frontmatter.Post]]:
+    """Point the direct sub-tasks of a renamed task at its new ID."""
+    renamed: dict[Path, tuple[Task, frontmatter.Post]] = {}
+    for node in list(tree.children_of(task_id)):
+        child = node.task
+        child_path = tasks_dir / f"{node.id}.md"
+        child_model = TaskModel(
+            title=child.title,
+            status=child.status,
+            do_date=child.do_date,
+            parent=new_id,
+            notes=bodies.text(child.notes),
+        )
+        renamed[child_path] = (
+            Task.from_model(child_model, child.created_at, child.completed_at),
+            task_post(
                 child_model,
-                child_path,
                 child.created_at.isoformat(),
-                completed_at_iso,
-            )
+                child.completed_at.isoformat() if child.completed_at else None,
+            ),
+        )
+    return renamed
 
 
-def parse_task_to_dict(task: Task, all_tasks: list[Task]) -> dict:
-    """Convert a Task dataclass to a JSON-serializable dict with subtasks."""
-    subtasks = [
-        parse_task_to_dict(t, all_tasks)
-        for t in sorted(
-            [t for t in all_tasks if t.parent == task.id],
-            key=lambda t: t.title.lower(),
-        )
-    ]
+def _completed_at_for(status: str, existing: Task) -> datetime | None:
+    """Return the completed_at timestamp for a task moving to the given status."""
+    if status == "closed" and existing.status != "closed":
+        return datetime.now()
+    if status != "closed":
+        return None
+    return existing.completed_at
+
+
+def _subtree_notes(tree: TaskTree, nodes: list[TaskNode]) -> Iterator[str | BodyRef]:
+    """Yield the notes of the given tasks and of all their sub-tasks."""
+    for node in nodes:
+        yield node.task.notes
+        yield from _subtree_notes(tree, tree.children_of(node.id))
+
+
+def parse_task_to_dict(
+    task: Task,
+    tree: TaskTree,
+    task_id: str | None = None,
+    body_text: Callable[[str | BodyRef], str] = bodies.text,
+) -> dict:
+    """Convert a Task dataclass to a JSON-serializable dict with subtasks.
+
+    body_text reads the notes, such as a lookup from bodies.resolve.
+    """
+    task_id = task_id or task.id
     return {
-        "id": task.id,
+        "id": task_id,
         "title": task.title,
         "status": task.status,
         "doDate": task.do_date.isoformat() if task.do_date else None,
         "parent": task.parent,
-        "notes": task.notes,
+        "notes": body_text(task.notes),
         "created_at": task.created_at.isoformat(),
         "completed_at": task.completed_at.isoformat() if task.completed_at else None,
-        "subtasks": subtasks,
+        "subtasks": [
+            parse_task_to_dict(n.task, tree, n.id, body_text)
+            for n in tree.children_of(task_id)
+        ],
     }
 
 
 @router.get("/tasks")
-async def get_tasks(request: Request) -> list[dict]:
-    """Return all top-level tasks with nested subtasks, sorted by title."""
-    all_tasks: list[Task] = request.app.state.task_items
-    top_level = sorted(
-        [t for t in all_tasks if not t.parent],
-        key=lambda t: t.title.lower(),
-    )
-    return [parse_task_to_dict(t, all_tasks) for t in top_level]
+async def get_tasks(
+    request: Request,
+    status: str | None = None,
+    do_start: date | None = None,
+    do_end: date | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = None,
+) -> Response:
+    """Return top-level tasks with nested subtasks, sorted by title.
+
+    Filters apply to the top-level tasks; a task without a do date never
+    matches a do date range.
+    """
+
+    def matches(node: TaskNode) -> bool:
+        task: Task = node.task
+        if status is not None and task.status != status:
+            return False
+        if do_start is None and do_end is None:
+            return True
+        if task.do_date is None:
+            return False
+        return (do_start is None or task.do_date >= do_start) and (
+            do_end is None or task.do_date <= do_end
+        )
+
+    async def build(headers: dict[str, str]) -> list[dict]:
+        tree: TaskTree = request.app.state.task_tree
+        nodes, next_cursor = paginate(
+            tree.children_of(None),
+            task_node_key,
+            cursor=cursor,
+            limit=limit,
+            where=matches,
+        )
+        set_next_cursor(headers, next_cursor)
+        body_text = await bodies.resolve(
+            request.app.state.reload_executor, list(_subtree_notes(tree, nodes))
+        )
+        return [parse_task_to_dict(n.task, tree, n.id, body_text) for n in nodes]
+
+    return await collection_response(request, ["task"], build)
 
 
 @router.get("/task/{task_id}")
-async def get_task(request: Request, task_id: str) -> dict:
+async def get_task(request: Request, response: Response, task_id: str) -> dict:
     """Return a single task by ID with subtasks."""
     md_path = try_get_task_md(request, task_id)
-    task: Task = request.app.state.parse_md_to_task(md_path)
-    all_tasks: list[Task] = request.app.state.task_items
-    return parse_task_to_dict(task, all_tasks)
-
-
-@router.post("/task")
-async def create_task(request: Request, task: TaskModel) -> dict:
-    """Create a new task."""
-    now = datetime.now()
-    task_id = task.make_id(now)
-    md_path: Path = get_tasks_dir(request) / f"{task_id}.md"
-    if md_path.exists():
-        raise HTTPException(status_code=409, detail="task already exists")
-
-    # Prevent sub-sub-tasks: parent must be a top-level task
-    if task.parent:
-        all_tasks: list[Task] = request.app.state.task_items
-        parent = next((t for t in all_tasks if t.id == task.parent), None)
-        if parent and parent.parent:
-            raise HTTPException(
-                status_code=400,
-                detail="Sub-tasks of sub-tasks are not allowed",
-            )
-
-    created_at_iso = now.isoformat()
-    write_task(task, md_path, created_at_iso)
-    request.app.state.task_items = request.app.state.parse_all_tasks()
-    await manager.broadcast({"type": "invalidate", "keys": ["tasks"]})
+    task: Task = request.app.state.stores["task"].get(md_path)
+    response.headers["ETag"] = entity_etag(task)
+    return parse_task_to_dict(task, request.app.state.task_tree)
+
+
+def apply_task_create(
+    request: Request, task: TaskModel, now: datetime
+) -> tuple[Task, asyncio.Future]:
+    """Add a new task created at the given time and queue its file write.
+
+    Returns the task and the future of its write, as apply_writes.
+    """
+    md_path: Path = get_tasks_dir(request) / f"{task.make_id(now)}.md"
+    parsed: Task = Task.from_model(task, now)
+    written: asyncio.Future = request.app.state.apply_writes(
+        "task", {md_path: (parsed, task_post(task, now.isoformat()))}
+    )
+    return parsed, written
 
-    parsed: Task = request.app.state.parse_md_to_task(md_path)
-    all_tasks: list[Task] = request.app.state.task_items
-    return parse_task_to_dict(parsed, all_tasks)
 
+def apply_task_update(
+    request: Request, task_id: str, task: TaskModel
+) -> tuple[Task, asyncio.Future]:
+    """Update an existing task, renaming and closing its sub-tasks as needed.
 
-@router.put("/task/{task_id}")
-async def update_task(request: Request, task_id: str, task: TaskModel) -> dict:
-    """Update an existing task, handling renames."""
-    old_md_path: Path = try_get_task_md(request, task_id)
+    Returns the task and the future of its writes, as apply_writes.
+    """
+    old_md_path: Path = get_tasks_dir(request) / f"{task_id}.md"
 
     # Read existing task to preserve created_at
-    existing: Task = request.app.state.parse_md_to_task(old_md_path)
+    existing: Task = request.app.state.stores["task"].get(old_md_path)
     new_id = task.make_id(existing.created_at)
     new_md_path: Path = get_tasks_dir(request) / f"{new_id}.md"
 
+    upserts: dict[Path, tuple[Task, frontmatter.Post]] = {}
+    removes: list[Path] = []
     if task_id != new_id:
         # Update children that reference the old ID
-        all_tasks: list[Task] = request.app.state.task_items
-        for child in [t for t in all_tasks if t.parent == task_id]:
-            child_path = get_tasks_dir(request) / f"{child.id}.md"
-            child_model = TaskModel(
-                title=child.title,
-                status=child.status,
-                do_date=child.do_date,
-                parent=new_id,
-                notes=child.notes,
-            )
-            write_task(
-                child_model,
-                child_path,
-                child.created_at.isoformat(),
-                child.completed_at.isoformat() if child.completed_at else None,
+        upserts.update(
+            _rename_children(
+                task_id, new_id, request.app.state.task_tree, get_tasks_dir(request)
             )
-        old_md_path.unlink()
-
-    # Determine completed_at
-    if task.status == "closed" and existing.status != "closed":
-        completed_at_iso: str | None = datetime.now().isoformat()
-    elif task.status != "closed":
-        completed_at_iso = None
-    else:
-        completed_at_iso = (
-            existing.completed_at.isoformat() if existing.completed_at else None
         )
-
-    write_task(task, new_md_path, existing.created_at.isoformat(), completed_at_iso)
+        removes.append(old_md_path)
+
+    completed_at: datetime | None = _completed_at_for(task.status, existing)
+    parsed: Task = Task.from_model(task, existing.created_at, completed_at)
+    upserts[new_md_path] = (
+        parsed,
+        task_post(
+            task,
+            existing.created_at.isoformat(),
+            completed_at.isoformat() if completed_at else None,
+        ),
+    )
+    written: list[asyncio.Future] = [
+        request.app.state.apply_writes("task", upserts, removes)
+    ]
 
     # Cascade close sub-tasks when parent is closed
     if task.status == "closed" and existing.status != "closed":
-        all_tasks_for_cascade: list[Task] = request.app.state.parse_all_tasks()
-        _cascade_close(
-            new_id, all_tasks_for_cascade, get_tasks_dir(request), completed_at_iso
+        written.append(
+            request.app.state.apply_writes(
+                "task",
+                _cascade_close(
+                    new_id,
+                    request.app.state.task_tree,
+                    get_tasks_dir(request),
+                    completed_at,
+                ),
+            )
         )
+    return parsed, asyncio.gather(*written)
+
+
+def apply_task_delete(request: Request, task_id: str) -> asyncio.Future:
+    """Delete a task and cascade delete its sub-tasks.
+
+    Returns the future of the deletions, as apply_writes.
+    """
+    # Cascade delete sub-tasks (recursive to handle grandchildren)
+    removes: list[Path] = [get_tasks_dir(request) / f"{task_id}.md"]
+    removes.extend(
+        _cascade_delete(task_id, request.app.state.task_tree, get_tasks_dir(request))
+    )
+    return request.app.state.apply_writes("task", removes=removes)
+
+
+@router.post("/task")
+async def create_task(request: Request, response: Response, task: TaskModel) -> dict:
+    """Create a new task."""
+    now = datetime.now()
+    task_id = task.make_id(now)
+    md_path: Path = get_tasks_dir(request) / f"{task_id}.md"
+    async with request.app.state.entity_locks.hold(md_path):
+        if request.app.state.stores["task"].get(md_path) is not None:
+            raise HTTPException(status_code=409, detail="task already exists")
+
+        # Prevent sub-sub-tasks: parent must be a top-level task
+        if task.parent:
+            parent = request.app.state.ids["task"].get(task.parent)
+            if parent and parent.parent:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Sub-tasks of sub-tasks are not allowed",
+                )
 
-    request.app.state.task_items = request.app.state.parse_all_tasks()
+        parsed, written = apply_task_create(request, task, now)
+        await written
     await manager.broadcast({"type": "invalidate", "keys": ["tasks"]})
+    response.headers["ETag"] = entity_etag(parsed)
+    return parse_task_to_dict(parsed, request.app.state.task_tree)
 
-    parsed: Task = request.app.state.parse_md_to_task(new_md_path)
-    all_tasks_updated: list[Task] = request.app.state.task_items
-    return parse_task_to_dict(parsed, all_tasks_updated)
+
+@router.put("/task/{task_id}")
+async def update_task(
+    request: Request, response: Response, task_id: str, task: TaskModel
+) -> dict:
+    """Update an existing task, handling renames."""
+    task_store: FileStore[Task] = request.app.state.stores["task"]
+    # a task's id follows from its title and creation time, which never changes
+    created_at: datetime = task_store.get(try_get_task_md(request, task_id)).created_at
+    new_md_path: Path = get_tasks_dir(request) / f"{task.make_id(created_at)}.md"
+
+    async with _hold_subtree(request, task_id, new_md_path):
+        md_path: Path = try_get_task_md(request, task_id)
+        check_if_match(request, task_store.get(md_path))
+        if new_md_path != md_path and task_store.get(new_md_path) is not None:
+            raise HTTPException(status_code=409, detail="task already exists")
+        parsed, written = apply_task_update(request, task_id, task)
+        await written
+    await manager.broadcast({"type": "invalidate", "keys": ["tasks"]})
+    response.headers["ETag"] = entity_etag(parsed)
+    return parse_task_to_dict(parsed, request.app.state.task_tree)
 
 
 @router.delete("/task/{task_id}")
 async def delete_task(request: Request, task_id: str) -> dict[str, bool]:
     """Delete a task and cascade delete its sub-tasks."""
-    try_get_task_md(request, task_id).unlink()
-
-    # Cascade delete sub-tasks (recursive to handle grandchildren)
-    all_tasks: list[Task] = request.app.state.task_items
-    _cascade_delete(task_id, all_tasks, get_tasks_dir(request))
-
-    request.app.state.task_items = request.app.state.parse_all_tasks()
+    async with _hold_subtree(request, task_id):
+        md_path: Path = try_get_task_md(request, task_id)
+        check_if_match(request, request.app.state.stores["task"].get(md_path))
+        await apply_task_delete(request, task_id)
     await manager.broadcast({"type": "invalidate", "keys": ["tasks"]})
     return {"ok": True}
 
@@ -332,12 +496,25 @@ def _build_chat_tools() -> list[types.Tool]:
     ]
 
 
-def _execute_tool(
+def _tasks_containing(tasks: list[Task], query: str) -> list[Task]:
+    """Return the tasks whose title or notes contain the query, ignoring case."""
+    query = query.lower()
+    return [
+        t
+        for t in tasks
+        if query in t.title.lower() or query in bodies.text(t.notes).lower()
+    ]
+
+
+async def _execute_tool(
     tool_name: str, tool_input: dict, request: Request
 ) -> tuple[str, bool]:
     """Execute a chat tool and return (result_text, tasks_changed)."""
     tasks_dir = get_tasks_dir(request)
     all_tasks: list[Task] = request.app.state.task_items
+    tree: TaskTree = request.app.state.task_tree
+    task_ids: IdIndex[Task] = request.app.state.ids["task"]
+    task_store: FileStore[Task] = request.app.state.stores["task"]
 
     if tool_name == "create_task":
         title = tool_input["title"]
@@ -345,17 +522,13 @@ def _execute_tool(
 
         # Check for duplicates among open tasks with the same parent
         parent_id = tool_input.get("parent_id")
-        for t in all_tasks:
-            if (
-                slugify(t.title).lower() == slug
-                and t.status == "open"
-                and t.parent == parent_id
-            ):
-                return (
-                    f"A task with a similar title already exists: '{t.title}' (ID: {t.id}). "
-                    "Not creating a duplicate.",
-                    False,
-                )
+        duplicate = tree.find_open(parent_id, slug)
+        if duplicate is not None:
+            return (
+                f"A task with a similar title already exists: '{duplicate.title}' "
+                f"(ID: {duplicate.id}). Not creating a duplicate.",
+                False,
+            )
 
         now = datetime.now()
         do_date = None
@@ -364,7 +537,7 @@ def _execute_tool(
 
         # Validate parent exists and is not itself a sub-task
         if parent_id:
-            parent_task = next((t for t in all_tasks if t.id == parent_id), None)
+            parent_task = task_ids.get(parent_id)
             if not parent_task:
                 return (
                     f"Parent task with ID '{parent_id}' not found. "
@@ -393,8 +566,15 @@ def _execute_tool(
         )
         task_id = task_model.make_id(now)
         md_path = tasks_dir / f"{task_id}.md"
-        write_task(task_model, md_path, now.isoformat())
-        request.app.state.task_items = request.app.state.parse_all_tasks()
+        await request.app.state.apply_writes(
+            "task",
+            {
+                md_path: (
+                    Task.from_model(task_model, now),
+                    task_post(task_model, now.isoformat()),
+                )
+            },
+        )
         return (
             f"Created task '{title}' (ID: {task_id})"
             + (f" do date {tool_input['doDate']}" if tool_input.get("doDate") else "")
@@ -409,10 +589,10 @@ def _execute_tool(
     elif tool_name == "update_task":
         task_id = tool_input["task_id"]
         md_path = tasks_dir / f"{task_id}.md"
-        if not md_path.exists():
+        if task_store.get(md_path) is None:
             return f"Task '{task_id}' not found.", False
 
-        existing: Task = request.app.state.parse_md_to_task(md_path)
+        existing: Task = task_store.get(md_path)
         title = tool_input.get("title", existing.title)
         status = tool_input.get("status", existing.status)
         do_date = existing.do_date
@@ -422,14 +602,12 @@ def _execute_tool(
                 if tool_input["doDate"]
                 else None
             )
-        notes = tool_input.get("notes", existing.notes)
+        notes = tool_input.get("notes", bodies.text(existing.notes))
         parent = existing.parent
         if "parent_id" in tool_input:
             new_parent_id = tool_input["parent_id"] or None
             if new_parent_id:
-                parent_task = next(
-                    (t for t in all_tasks if t.id == new_parent_id), None
-                )
+                parent_task = task_ids.get(new_parent_id)
                 if not parent_task:
                     return (
                         f"Parent task with ID '{new_parent_id}' not found. "
@@ -459,69 +637,80 @@ def _execute_tool(
         )
         new_id = task_model.make_id(existing.created_at)
         new_md_path = tasks_dir / f"{new_id}.md"
+        if new_id != task_id and task_store.get(new_md_path) is not None:
+            return f"A task with ID '{new_id}' already exists.", False
 
+        upserts: dict[Path, tuple[Task, frontmatter.Post]] = {}
+        removes: list[Path] = []
         if task_id != new_id:
             # Update children references
-            for child in [t for t in all_tasks if t.parent == task_id]:
-                child_path = tasks_dir / f"{child.id}.md"
-                child_model = TaskModel(
-                    title=child.title,
-                    status=child.status,
-                    do_date=child.do_date,
-                    parent=new_id,
-                    notes=child.notes,
-                )
-                write_task(
-                    child_model,
-                    child_path,
-                    child.created_at.isoformat(),
-                    child.completed_at.isoformat() if child.completed_at else None,
-                )
-            md_path.unlink()
-
-        if status == "closed" and existing.status != "closed":
-            tool_completed_at_iso: str | None = datetime.now().isoformat()
-        elif status != "closed":
-            tool_completed_at_iso = None
-        else:
-            tool_completed_at_iso = (
-                existing.completed_at.isoformat() if existing.completed_at else None
-            )
-        write_task(
-            task_model,
-            new_md_path,
-            existing.created_at.isoformat(),
-            tool_completed_at_iso,
+            upserts.update(_rename_children(task_id, new_id, tree, tasks_dir))
+            removes.append(md_path)
+
+        completed_at: datetime | None = _completed_at_for(status, existing)
+        upserts[new_md_path] = (
+            Task.from_model(task_model, existing.created_at, completed_at),
+            task_post(
+                task_model,
+                existing.created_at.isoformat(),
+                completed_at.isoformat() if completed_at else None,
+            ),
         )
+        written: list[asyncio.Future] = [
+            request.app.state.apply_writes("task", upserts, removes)
+        ]
+
         # Cascade close sub-tasks if status changed to closed
         if status == "closed" and existing.status != "closed":
-            updated_tasks = request.app.state.parse_all_tasks()
-            _cascade_close(new_id, updated_tasks, tasks_dir, tool_completed_at_iso)
-        request.app.state.task_items = request.app.state.parse_all_tasks()
+            written.append(
+                request.app.state.apply_writes(
+                    "task",
+                    _cascade_close(
+                        new_id, request.app.state.task_tree, tasks_dir, completed_at
+                    ),
+                )
+            )
+        await asyncio.gather(*written)
         return f"Updated task '{title}' (ID: {new_id})", True
 
     elif tool_name == "close_task":
         task_id = tool_input["task_id"]
         md_path = tasks_dir / f"{task_id}.md"
-        if not md_path.exists():
+        if task_store.get(md_path) is None:
             return f"Task '{task_id}' not found.", False
 
-        existing = request.app.state.parse_md_to_task(md_path)
+        existing = task_store.get(md_path)
         task_model = TaskModel(
             title=existing.title,
             status="closed",
             do_date=existing.do_date,
             parent=existing.parent,
-            notes=existing.notes,
+            notes=bodies.text(existing.notes),
         )
-        close_completed_at_iso = datetime.now().isoformat()
-        write_task(
-            task_model, md_path, existing.created_at.isoformat(), close_completed_at_iso
+        close_completed_at = datetime.now()
+        closed: asyncio.Future = request.app.state.apply_writes(
+            "task",
+            {
+                md_path: (
+                    Task.from_model(
+                        task_model, existing.created_at, close_completed_at
+                    ),
+                    task_post(
+                        task_model,
+                        existing.created_at.isoformat(),
+                        close_completed_at.isoformat(),
+                    ),
+                )
+            },
         )
         # Cascade close sub-tasks
-        all_tasks = request.app.state.parse_all_tasks()
-        _cascade_close(task_id, all_tasks, tasks_dir, close_completed_at_iso)
-        request.app.state.task_items = request.app.state.parse_all_tasks()
+        cascaded: asyncio.Future = request.app.state.apply_writes(
+            "task",
+            _cascade_close(
+                task_id, request.app.state.task_tree, tasks_dir, close_completed_at
+            ),
+        )
+        await asyncio.gather(closed, cascaded)
         return f"Closed task '{existing.title}' (ID: {task_id})", True
 
     elif tool_name == "list_tasks":
@@ -546,12 +735,14 @@ def _execute_tool(
         return "\n".join(lines), False
 
     elif tool_name == "search_tasks":
-        query = tool_input["query"].lower()
-        matches = [
-            t
-            for t in all_tasks
-            if query in t.title.lower() or query in (t.notes or "").lower()
-        ]
+        # substring match, so a fragment such as "ork" still finds "workout";
+        # in the reload pool, as lazily loaded notes are read from disk
+        matches = await asyncio.get_running_loop().run_in_executor(
+            request.app.state.reload_executor,
+            _tasks_containing,
+            all_tasks,
+            tool_input["query"],
+        )
         if not matches:
             return f"No tasks matching '{tool_input['query']}'.", False
 
@@ -635,9 +826,16 @@ async def chat(request: Request, body: ChatRequest) -> dict:
                     tool_input = (
                         dict(part.function_call.args) if part.function_call.args else {}
                     )
-                    result_text, changed = _execute_tool(
-                        part.function_call.name, tool_input, request
-                    )
+                    # hold the locks of the task a tool rewrites and its sub-tasks
+                    task_id = tool_input.get("task_id")
+                    async with (
+                        _hold_subtree(request, task_id)
+                        if task_id
+                        else request.app.state.entity_locks.hold()
+                    ):
+                        result_text, changed = await _execute_tool(
+                            part.function_call.name, tool_input, request
+                        )
                     if changed:
                         tasks_changed = True
                     function_response_parts.append(
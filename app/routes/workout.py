@@ -1,17 +1,25 @@
 import calendar
+from collections.abc import Callable
 from datetime import date
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
+from app import bodies
+from app.bodies import BodyRef
+from app.backends import QueryBackend
+from app.http_cache import check_if_match, collection_response, entity_etag
 from app.models import (
     Workout,
     WorkoutModel,
     WorkoutTemplate,
     WorkoutTemplateModel,
 )
-from app.writer import write_template, write_workout
+from app.pagination import KEY_MAX, set_next_cursor
+from app.progression import ExerciseSeries, ProgressionIndex
 from app.sse import manager
+from app.workout_sets import WorkoutSetStore
+from app.writer import template_post, workout_post
 
 router = APIRouter()
 
@@ -29,7 +37,7 @@ def get_template_dir(request: Request) -> Path:
 def try_get_workout_md(request: Request, workout_id: str) -> Path:
     """Return the markdown file path for a workout, raising 404 if missing."""
     md_path = get_workout_dir(request) / f"{workout_id}.md"
-    if not md_path.exists():
+    if request.app.state.stores["workout"].get(md_path) is None:
         raise HTTPException(status_code=404, detail=f"{workout_id}.md not found")
     return md_path
 
@@ -37,7 +45,7 @@ def try_get_workout_md(request: Request, workout_id: str) -> Path:
 def try_get_template_md(request: Request, template_id: str) -> Path:
     """Return the markdown file path for a template, raising 404 if missing."""
     md_path = get_template_dir(request) / f"{template_id}.md"
-    if not md_path.exists():
+    if request.app.state.stores["template"].get(md_path) is None:
         raise HTTPException(status_code=404, detail=f"{template_id}.md not found")
     return md_path
 
@@ -64,13 +72,18 @@ def parse_template_to_dict(template: WorkoutTemplate) -> dict:
     }
 
 
-def parse_workout_to_dict(workout: Workout) -> dict:
-    """Convert a Workout dataclass to a JSON-serializable dict."""
+def parse_workout_to_dict(
+    workout: Workout, body_text: Callable[[str | BodyRef], str] = bodies.text
+) -> dict:
+    """Convert a Workout dataclass to a JSON-serializable dict.
+
+    body_text reads the content, such as a lookup from bodies.resolve.
+    """
     return {
         "id": workout.id,
         "date": workout.date.isoformat(),
         "time": workout.time.strftime("%H:%M:%S"),
-        "content": workout.content,
+        "content": body_text(workout.content),
         "groups": [
             {
                 "name": g.name,
@@ -92,20 +105,41 @@ def parse_workout_to_dict(workout: Workout) -> dict:
 
 
 @router.get("/workouts")
-async def get_workouts(request: Request) -> list[dict]:
-    """Return all workouts sorted by date and time descending."""
-    workouts: list[Workout] = sorted(
-        request.app.state.workout_items, key=lambda w: (w.date, w.time), reverse=True
-    )
-    return [parse_workout_to_dict(w) for w in workouts]
+async def get_workouts(
+    request: Request,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = None,
+) -> Response:
+    """Return workouts between start and end sorted by date and time descending."""
+
+    async def build(headers: dict[str, str]) -> list[dict]:
+        query: QueryBackend = request.app.state.query
+        workouts, next_cursor = await query.page(
+            "workout",
+            lo=(start.strftime("%Y%m%d"),) if start else None,
+            hi=(end.strftime("%Y%m%d") + KEY_MAX,) if end else None,
+            cursor=cursor,
+            limit=limit,
+            descending=True,
+        )
+        set_next_cursor(headers, next_cursor)
+        body_text = await bodies.resolve(
+            request.app.state.reload_executor, [w.content for w in workouts]
+        )
+        return [parse_workout_to_dict(w, body_text) for w in workouts]
+
+    return await collection_response(request, ["workout"], build)
 
 
 @router.get("/workout/{workout_id}")
-async def get_workout(request: Request, workout_id: str) -> dict:
+async def get_workout(request: Request, response: Response, workout_id: str) -> dict:
     """Return a single workout by ID."""
-    workout: Workout = request.app.state.parse_md_to_workout(
+    workout: Workout = request.app.state.stores["workout"].get(
         try_get_workout_md(request, workout_id)
     )
+    response.headers["ETag"] = entity_etag(workout)
     return parse_workout_to_dict(workout)
 
 
@@ -113,62 +147,77 @@ async def get_workout(request: Request, workout_id: str) -> dict:
 async def create_workout(request: Request, workout: WorkoutModel) -> dict:
     """Create a new workout."""
     md_path: Path = get_workout_dir(request) / f"{workout.id}.md"
-    if md_path.exists():
-        raise HTTPException(status_code=409, detail="workout already exists")
+    async with request.app.state.entity_locks.hold(md_path):
+        if request.app.state.stores["workout"].get(md_path) is not None:
+            raise HTTPException(status_code=409, detail="workout already exists")
 
-    write_workout(workout, md_path)
-    request.app.state.workout_items = request.app.state.parse_all_workouts()
+        parsed: Workout = Workout.from_model(workout)
+        await request.app.state.apply_writes(
+            "workout", {md_path: (parsed, workout_post(workout))}
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["workouts", "calendar"]})
-
-    parsed: Workout = request.app.state.parse_md_to_workout(md_path)
     return parse_workout_to_dict(parsed)
 
 
 @router.put("/workout/{workout_id}")
 async def update_workout(
-    request: Request, workout_id: str, workout: WorkoutModel
+    request: Request, response: Response, workout_id: str, workout: WorkoutModel
 ) -> dict:
     """Update an existing workout, handling ID changes from date/time edits."""
-    old_md_path: Path = try_get_workout_md(request, workout_id)
     new_md_path: Path = get_workout_dir(request) / f"{workout.id}.md"
-
-    if workout_id != workout.id:
-        old_md_path.unlink()
-
-    write_workout(workout, new_md_path)
-    request.app.state.workout_items = request.app.state.parse_all_workouts()
+    parsed: Workout = Workout.from_model(workout)
+
+    async with request.app.state.entity_locks.hold(
+        get_workout_dir(request) / f"{workout_id}.md", new_md_path
+    ):
+        old_md_path: Path = try_get_workout_md(request, workout_id)
+        check_if_match(request, request.app.state.stores["workout"].get(old_md_path))
+        if (
+            new_md_path != old_md_path
+            and request.app.state.stores["workout"].get(new_md_path) is not None
+        ):
+            raise HTTPException(status_code=409, detail="workout already exists")
+        await request.app.state.apply_writes(
+            "workout",
+            {new_md_path: (parsed, workout_post(workout))},
+            removes=[old_md_path] if workout_id != workout.id else [],
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["workouts", "calendar"]})
-
-    parsed: Workout = request.app.state.parse_md_to_workout(new_md_path)
+    response.headers["ETag"] = entity_etag(parsed)
     return parse_workout_to_dict(parsed)
 
 
 @router.delete("/workout/{workout_id}")
 async def delete_workout(request: Request, workout_id: str) -> dict[str, bool]:
     """Delete a workout by ID."""
-    try_get_workout_md(request, workout_id).unlink()
-    request.app.state.workout_items = request.app.state.parse_all_workouts()
+    async with request.app.state.entity_locks.hold(
+        get_workout_dir(request) / f"{workout_id}.md"
+    ):
+        md_path: Path = try_get_workout_md(request, workout_id)
+        check_if_match(request, request.app.state.stores["workout"].get(md_path))
+        await request.app.state.apply_writes("workout", removes=[md_path])
     await manager.broadcast({"type": "invalidate", "keys": ["workouts", "calendar"]})
     return {"ok": True}
 
 
-@router.get("/workout-calendar")
-async def get_workout_calendar(
-    request: Request, year: int | None = None, month: int | None = None
-) -> dict:
-    """Return calendar metadata and workout dates for a given month."""
-    today: date = date.today()
-    year = year or today.year
-    month = month or today.month
+MAX_CALENDAR_MONTHS: int = 24
+
+
+def _parse_month(value: str) -> tuple[int, int]:
+    """Parse a YYYY-MM string, raising 422 if it is not a valid month."""
+    try:
+        year, month = (int(part) for part in value.split("-"))
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"invalid month {value!r}")
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=422, detail=f"invalid month {value!r}")
+    return year, month
 
-    workout_dates: set[str] = {
-        w.date.isoformat()
-        for w in request.app.state.workout_items
-        if w.date.year == year and w.date.month == month
-    }
 
-    first_weekday: int = (calendar.monthrange(year, month)[0] + 1) % 7  # sunday-start
-    days_in_month: int = calendar.monthrange(year, month)[1]
+async def calendar_month(request: Request, year: int, month: int, today: date) -> dict:
+    """Return calendar metadata and workout dates for one month."""
+    weekday, days_in_month = calendar.monthrange(year, month)
+    query: QueryBackend = request.app.state.query
 
     prev_year, prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
     next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
@@ -177,9 +226,11 @@ async def get_workout_calendar(
         "year": year,
         "month": month,
         "month_name": calendar.month_abbr[month].lower(),
-        "first_weekday": first_weekday,
+        "first_weekday": (weekday + 1) % 7,  # sunday-start
         "days_in_month": days_in_month,
-        "workout_dates": sorted(workout_dates),
+        "workout_dates": [
+            d.isoformat() for d in await query.month_dates("workout", year, month)
+        ],
         "today": today.isoformat(),
         "prev_year": prev_year,
         "prev_month": prev_month,
@@ -188,13 +239,129 @@ async def get_workout_calendar(
     }
 
 
+@router.get("/workout-calendar")
+async def get_workout_calendar(
+    request: Request,
+    year: int | None = None,
+    month: int | None = Query(default=None, ge=1, le=12),
+) -> Response:
+    """Return calendar metadata and workout dates for a given month."""
+    today: date = date.today()
+    year = year or today.year
+    month = month or today.month
+    return await collection_response(
+        request,
+        ["workout"],
+        lambda headers: calendar_month(request, year, month, today),
+        vary=today.isoformat(),
+    )
+
+
+@router.get("/workout-calendar/range")
+async def get_workout_calendar_range(
+    request: Request, start: str, end: str
+) -> Response:
+    """Return the calendar of every month from start to end (YYYY-MM, inclusive).
+
+    Lets the client prefetch the months around the one it shows in one call.
+    """
+    today: date = date.today()
+    first: tuple[int, int] = _parse_month(start)
+    last: tuple[int, int] = _parse_month(end)
+    count: int = (last[0] - first[0]) * 12 + last[1] - first[1] + 1
+    if not 1 <= count <= MAX_CALENDAR_MONTHS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"range must cover 1 to {MAX_CALENDAR_MONTHS} months",
+        )
+
+    async def build(headers: dict[str, str]) -> list[dict]:
+        months: list[dict] = []
+        for i in range(count):
+            year, month = divmod(first[0] * 12 + first[1] - 1 + i, 12)
+            months.append(await calendar_month(request, year, month + 1, today))
+        return months
+
+    return await collection_response(
+        request, ["workout"], build, vary=today.isoformat()
+    )
+
+
+# exercise progression routes
+
+
+@router.get("/exercises")
+async def get_exercises(request: Request) -> Response:
+    """Return every exercise logged in a workout with its session count and span."""
+
+    def build(headers: dict[str, str]) -> list[dict]:
+        index: ProgressionIndex = request.app.state.progression
+        return [
+            {
+                "name": series.name,
+                "sessions": len(series),
+                "first": date.fromordinal(series.ordinals[0]).isoformat(),
+                "last": date.fromordinal(series.ordinals[-1]).isoformat(),
+            }
+            for _, series in sorted(index.series.items())
+        ]
+
+    return await collection_response(request, ["workout"], build)
+
+
+@router.get("/exercises/progression")
+async def get_exercise_progression(
+    request: Request,
+    name: str,
+    start: date | None = None,
+    end: date | None = None,
+) -> Response:
+    """Return an exercise's per-session best set, volume and estimated 1RM.
+
+    The series is returned as parallel arrays (one entry per workout the
+    exercise was in) between the optional start and end dates.
+    """
+    series: ExerciseSeries | None = request.app.state.progression.get(name)
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"no sessions of {name!r}")
+    return await collection_response(
+        request, ["workout"], lambda headers: series.to_dict(start, end)
+    )
+
+
+@router.get("/workout-stats")
+async def get_workout_stats(
+    request: Request, start: date | None = None, end: date | None = None
+) -> Response:
+    """Return weekly tonnage, sets per group name and PRs between start and end."""
+
+    def build(headers: dict[str, str]) -> dict:
+        sets: WorkoutSetStore = request.app.state.workout_sets
+        return {
+            "weekly_tonnage": [
+                {"week": week.isoformat(), "tonnage": tonnage}
+                for week, tonnage in sets.weekly_tonnage(start, end)
+            ],
+            "sets_per_group": sets.sets_per_group(start, end),
+            "personal_records": sets.personal_records(start, end),
+        }
+
+    return await collection_response(request, ["workout"], build)
+
+
 # template routes
 
 
 @router.get("/templates")
-async def get_templates(request: Request) -> list[dict]:
+async def get_templates(request: Request) -> Response:
     """Return all workout templates."""
-    return [parse_template_to_dict(t) for t in request.app.state.template_items]
+    return await collection_response(
+        request,
+        ["template"],
+        lambda headers: [
+            parse_template_to_dict(t) for t in request.app.state.template_items
+        ],
+    )
 
 
 @router.post("/template")
@@ -207,34 +374,54 @@ async def create_template(request: Request, template: WorkoutTemplateModel) -> d
         )
 
     md_path: Path = get_template_dir(request) / f"{template.id}.md"
-    write_template(template, md_path)
-    request.app.state.template_items = request.app.state.parse_all_templates()
+    parsed: WorkoutTemplate = WorkoutTemplate.from_model(template)
+    async with request.app.state.entity_locks.hold(md_path):
+        await request.app.state.apply_writes(
+            "template", {md_path: (parsed, template_post(template))}
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["templates"]})
-
-    parsed: WorkoutTemplate = request.app.state.parse_md_to_template(md_path)
     return parse_template_to_dict(parsed)
 
 
 @router.put("/template/{template_id}")
 async def update_template(
-    request: Request, template_id: str, template: WorkoutTemplateModel
+    request: Request,
+    response: Response,
+    template_id: str,
+    template: WorkoutTemplateModel,
 ) -> dict:
     """Update an existing workout template, handling renames."""
-    old_md_path: Path = try_get_template_md(request, template_id)
     new_md_path: Path = get_template_dir(request) / f"{template.id}.md"
-    if template_id != template.id:
-        old_md_path.unlink()
-    write_template(template, new_md_path)
-    request.app.state.template_items = request.app.state.parse_all_templates()
+    parsed: WorkoutTemplate = WorkoutTemplate.from_model(template)
+
+    async with request.app.state.entity_locks.hold(
+        get_template_dir(request) / f"{template_id}.md", new_md_path
+    ):
+        old_md_path: Path = try_get_template_md(request, template_id)
+        check_if_match(request, request.app.state.stores["template"].get(old_md_path))
+        if (
+            new_md_path != old_md_path
+            and request.app.state.stores["template"].get(new_md_path) is not None
+        ):
+            raise HTTPException(status_code=409, detail="template already exists")
+        await request.app.state.apply_writes(
+            "template",
+            {new_md_path: (parsed, template_post(template))},
+            removes=[old_md_path] if template_id != template.id else [],
+        )
     await manager.broadcast({"type": "invalidate", "keys": ["templates"]})
-    parsed: WorkoutTemplate = request.app.state.parse_md_to_template(new_md_path)
+    response.headers["ETag"] = entity_etag(parsed)
     return parse_template_to_dict(parsed)
 
 
 @router.delete("/template/{template_id}")
 async def delete_template(request: Request, template_id: str) -> dict[str, bool]:
     """Delete a workout template by ID."""
-    try_get_template_md(request, template_id).unlink()
-    request.app.state.template_items = request.app.state.parse_all_templates()
+    async with request.app.state.entity_locks.hold(
+        get_template_dir(request) / f"{template_id}.md"
+    ):
+        md_path: Path = try_get_template_md(request, template_id)
+        check_if_match(request, request.app.state.stores["template"].get(md_path))
+        await request.app.state.apply_writes("template", removes=[md_path])
     await manager.broadcast({"type": "invalidate", "keys": ["templates"]})
     return {"ok": True}
@@ -0,0 +1,405 @@
+import bisect
+import heapq
+import itertools
+import math
+import re
+import sys
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Generic
+
+from app.indexes import HasId, ItemT
+from app.store import StoreIndex
+
+TOKEN_RE: re.Pattern[str] = re.compile(r"\w+")
+# a title token counts as this many body tokens
+TITLE_WEIGHT: int = 3
+# a query token this long or longer also matches terms it prefixes, up to
+# MAX_PREFIX_TERMS of them; shorter ones only match exactly
+MIN_PREFIX_CHARS: int = 2
+MAX_PREFIX_TERMS: int = 64
+# score factor for terms matched by prefix rather than exactly
+PREFIX_FACTOR: float = 0.5
+# BM25 term-frequency saturation and length normalization
+K1: float = 1.2
+B: float = 0.75
+SNIPPET_CHARS: int = 160
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into casefolded word tokens."""
+    return TOKEN_RE.findall(text.casefold())
+
+
+def count_terms(title: str, body: str) -> Counter[str]:
+    """Return the weighted term counts of a document's title and body."""
+    # interned so postings keys and every document's terms share strings
+    terms: Counter[str] = Counter(map(sys.intern, tokenize(body)))
+    for token in map(sys.intern, tokenize(title)):
+        terms[token] += TITLE_WEIGHT
+    return terms
+
+
+@dataclass(slots=True)
+class SearchDoc:
+    """One indexed item: its display title, distinct terms and weighted length.
+
+    The body itself is not kept; snippets re-read it through body_of.
+    """
+
+    collection: str
+    item: HasId
+    title: str
+    body_of: Callable[[HasId], str]
+    terms: tuple[str, ...]
+    length: int
+
+
+@dataclass(slots=True)
+class SearchSegment:
+    """Documents numbered and inverted apart from the index, to be merged in."""
+
+    docs: dict[int, SearchDoc] = field(default_factory=dict)
+    postings: dict[str, dict[int, int]] = field(default_factory=dict)
+
+    def discard(self, number: int) -> None:
+        """Leave a document out of the merge."""
+        doc: SearchDoc = self.docs.pop(number)
+        for term in doc.terms:
+            postings = self.postings[term]
+            del postings[number]
+            if not postings:
+                del self.postings[term]
+
+
+@dataclass(slots=True)
+class SearchHit:
+    """A ranked search result."""
+
+    collection: str
+    item: HasId
+    title: str
+    snippet: str
+    score: float
+
+    def to_dict(self) -> dict:
+        """Convert the hit to a JSON-serializable dict."""
+        return {
+            "collection": self.collection,
+            "id": self.item.id,
+            "title": self.title,
+            "snippet": self.snippet,
+            "score": round(self.score, 4),
+        }
+
+
+class SearchIndex:
+    """Inverted index over the titles and bodies of items in several stores.
+
+    Each term maps to the documents containing it with a weighted term
+    count; the terms are also kept sorted so a query token matches every
+    term it prefixes by bisection. Documents are added and removed one item
+    at a time, or as segments built off the event loop, through a
+    SearchSource attached to each store; terms they add or drop are merged
+    into the sorted list once, by the next prefix query.
+    """
+
+    def __init__(self) -> None:
+        self._docs: dict[int, SearchDoc] = {}
+        self._lengths: dict[int, int] = {}
+        self._numbers: dict[tuple[str, str], int] = {}
+        self._postings: dict[str, dict[int, int]] = {}
+        self._terms: list[str] = []
+        # terms not yet merged into _terms, and merged ones left without documents
+        self._new_terms: list[str] = []
+        self._dropped_terms: set[str] = set()
+        # next() on a count is atomic, so segments can be built in any thread
+        self._numbering: Iterator[int] = itertools.count()
+        self._total_length: int = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(
+        self,
+        collection: str,
+        item: ItemT,
+        title: str,
+        terms: Counter[str],
+        body_of: Callable[[ItemT], str],
+    ) -> None:
+        """Index an item, replacing any document with the same collection and ID.
+
+        terms are the document's counts from count_terms(); body_of returns
+        the body again when a snippet is needed.
+        """
+        self.merge(self.segment(collection, [(item, title, terms)], body_of))
+
+    def segment(
+        self,
+        collection: str,
+        entries: Iterable[tuple[ItemT, str, Counter[str]]],
+        body_of: Callable[[ItemT], str],
+    ) -> SearchSegment:
+        """Number and invert (item, title, terms) documents without indexing them.
+
+        Safe to call from any thread; merge() adds the result to the index.
+        """
+        segment = SearchSegment()
+        for item, title, terms in entries:
+            number: int = next(self._numbering)
+            segment.docs[number] = SearchDoc(
+                collection,
+                item,
+                title,
+                body_of,
+                tuple(terms),
+                sum(terms.values()),
+            )
+            for term, count in terms.items():
+                postings = segment.postings.get(term)
+                if postings is None:
+                    postings = segment.postings[term] = {}
+                postings[number] = count
+        return segment
+
+    def merge(self, segment: SearchSegment) -> None:
+        """Add a segment's documents, replacing those with the same collection and ID.
+
+        The segment's dicts become the index's, so it is emptied.
+        """
+        for number, doc in segment.docs.items():
+            key: tuple[str, str] = (doc.collection, doc.item.id)
+            if key in self._numbers:
+                self._drop(self._numbers[key])
+            self._numbers[key] = number
+            self._docs[number] = doc
+            self._lengths[number] = doc.length
+            self._total_length += doc.length
+        for term, postings in segment.postings.items():
+            existing = self._postings.get(term)
+            if existing is not None:
+                existing.update(postings)
+                continue
+            self._postings[term] = postings
+            if term in self._dropped_terms:
+                self._dropped_terms.discard(term)
+            else:
+                self._new_terms.append(term)
+        segment.docs = {}
+        segment.postings = {}
+
+    def remove(self, collection: str, item: ItemT) -> None:
+        """Drop an item's document if it is the one indexed under its ID."""
+        number: int | None = self._numbers.get((collection, item.id))
+        if number is not None and self._docs[number].item is item:
+            self._drop(number)
+
+    def _drop(self, number: int) -> None:
+        """Remove a document and any terms left without documents."""
+        doc: SearchDoc = self._docs.pop(number)
+        del self._lengths[number]
+        del self._numbers[(doc.collection, doc.item.id)]
+        self._total_length -= doc.length
+        for term in doc.terms:
+            postings = self._postings[term]
+            del postings[number]
+            if not postings:
+                del self._postings[term]
+                self._dropped_terms.add(term)
+
+    def _sorted_terms(self) -> list[str]:
+        """Return every term in order, merging in the changes since the last call."""
+        if self._new_terms or self._dropped_terms:
+            dropped: set[str] = self._dropped_terms
+            terms: list[str] = [t for t in self._terms if t not in dropped]
+            terms.extend(sorted(t for t in self._new_terms if t not in dropped))
+            # two sorted runs, which timsort merges in linear time
+            terms.sort()
+            self._terms = terms
+            self._new_terms = []
+            self._dropped_terms = set()
+        return self._terms
+
+    def _expand(self, token: str) -> list[tuple[str, float]]:
+        """Return the terms a query token matches with their score factors."""
+        if len(token) < MIN_PREFIX_CHARS:
+            return [(token, 1.0)] if token in self._postings else []
+        terms: list[str] = self._sorted_terms()
+        matches: list[tuple[str, float]] = []
+        i: int = bisect.bisect_left(terms, token)
+        while (
+            i < len(terms)
+            and len(matches) < MAX_PREFIX_TERMS
+            and terms[i].startswith(token)
+        ):
+            term: str = terms[i]
+            matches.append((term, 1.0 if term == token else PREFIX_FACTOR))
+            i += 1
+        return matches
+
+    def _scores(
+        self, token: str, candidates: dict[int, float] | None
+    ) -> dict[int, float]:
+        """Return BM25 scores of the documents matching a token, best term each.
+
+        With candidates, only those documents are scored.
+        """
+        n: int = len(self._docs)
+        lengths: dict[int, int] = self._lengths
+        # BM25 denominator: count + base + slope * document length
+        base: float = K1 * (1 - B)
+        slope: float = K1 * B * n / max(self._total_length, 1)
+        scores: dict[int, float] = {}
+        for term, factor in self._expand(token):
+            postings: dict[int, int] = self._postings[term]
+            idf: float = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            weight: float = factor * idf * (K1 + 1)
+            if candidates is not None and len(candidates) < len(postings):
+                matched = (
+                    (number, postings[number])
+                    for number in candidates
+                    if number in postings
+                )
+            elif candidates is not None:
+                matched = (
+                    (number, count)
+                    for number, count in postings.items()
+                    if number in candidates
+                )
+            else:
+                matched = postings.items()
+            for number, count in matched:
+                score: float = weight * count / (count + base + slope * lengths[number])
+                if score > scores.get(number, 0.0):
+                    scores[number] = score
+        return scores
+
+    def search(
+        self,
+        query: str,
+        collections: Iterable[str] | None = None,
+        limit: int | None = 20,
+    ) -> list[SearchHit]:
+        """Return the best documents matching every query token, by any prefix.
+
+        Results are ordered by descending score, then title.
+        """
+        tokens: list[str] = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self._docs:
+            return []
+        wanted: set[str] | None = None if collections is None else set(collections)
+
+        # score the rarest token first so later ones only score its matches
+        sizes: dict[str, int] = {
+            t: sum(len(self._postings[term]) for term, _ in self._expand(t))
+            for t in tokens
+        }
+        totals: dict[int, float] | None = None
+        for token in sorted(tokens, key=sizes.__getitem__):
+            scores: dict[int, float] = self._scores(token, totals)
+            if totals is None:
+                totals = {
+                    number: score
+                    for number, score in scores.items()
+                    if wanted is None or self._docs[number].collection in wanted
+                }
+            else:
+                totals = {number: totals[number] + scores[number] for number in scores}
+            if not totals:
+                return []
+
+        numbers: list[int] = (
+            list(totals)
+            if limit is None
+            else heapq.nlargest(limit, totals, key=totals.__getitem__)
+        )
+        numbers.sort(key=lambda n: (-totals[n], self._docs[n].title.casefold()))
+        pattern: re.Pattern[str] = re.compile(
+            r"\b(?:" + "|".join(map(re.escape, tokens)) + ")", re.IGNORECASE
+        )
+        return [
+            SearchHit(
+                collection=self._docs[number].collection,
+                item=self._docs[number].item,
+                title=self._docs[number].title,
+                snippet=snippet(
+                    self._docs[number].body_of(self._docs[number].item), pattern
+                ),
+                score=totals[number],
+            )
+            for number in numbers
+        ]
+
+
+def snippet(body: str, pattern: re.Pattern[str]) -> str:
+    """Return a whitespace-collapsed excerpt of body around the first match."""
+    match: re.Match[str] | None = pattern.search(body)
+    start: int = 0 if match is None else max(0, match.start() - SNIPPET_CHARS // 4)
+    excerpt: str = " ".join(body[start : start + SNIPPET_CHARS].split())
+    prefix: str = "…" if start > 0 else ""
+    suffix: str = "…" if start + SNIPPET_CHARS < len(body) else ""
+    return f"{prefix}{excerpt}{suffix}" if excerpt else ""
+
+
+@dataclass
+class SearchSource(StoreIndex[ItemT], Generic[ItemT]):
+    """Feeds one store's item changes into a shared SearchIndex.
+
+    Scanned items are tokenized and inverted into a segment in the scan's
+    worker thread by prepare(), so the event loop never reads a lazy body to
+    index it and only merges postings; items written through the API, whose
+    bodies are in memory, are indexed one by one in update().
+    """
+
+    index: SearchIndex
+    collection: str
+    title_of: Callable[[ItemT], str]
+    body_of: Callable[[ItemT], str]
+    # item ID -> (item, segment holding its document) built by prepare(); an
+    # entry whose item never gets published is replaced by the next one
+    _prepared: dict[str, tuple[ItemT, SearchSegment]] = field(
+        default_factory=dict, repr=False
+    )
+
+    def prepare(self, items: list[ItemT]) -> None:
+        """Build a segment of newly parsed items, reading their bodies."""
+        entries: list[tuple[ItemT, str, Counter[str]]] = []
+        for item in items:
+            title: str = self.title_of(item)
+            entries.append((item, title, count_terms(title, self.body_of(item))))
+        segment: SearchSegment = self.index.segment(
+            self.collection, entries, self.body_of
+        )
+        self._prepared.update((item.id, (item, segment)) for item in items)
+
+    def update(self, removed: list[ItemT], added: list[ItemT]) -> None:
+        """Drop the documents of removed items and index added ones."""
+        for item in removed:
+            self.index.remove(self.collection, item)
+        segments: dict[int, SearchSegment] = {}
+        prepared_items: set[int] = set()
+        for item in added:
+            prepared = self._prepared.pop(item.id, None)
+            if prepared is not None and prepared[0] is item:
+                segments[id(prepared[1])] = prepared[1]
+                prepared_items.add(id(item))
+                continue
+            title: str = self.title_of(item)
+            self.index.add(
+                self.collection,
+                item,
+                title,
+                count_terms(title, self.body_of(item)),
+                self.body_of,
+            )
+        for segment in segments.values():
+            # items a write replaced while their scan ran are never published
+            for number in [
+                n
+                for n, doc in segment.docs.items()
+                if id(doc.item) not in prepared_items
+            ]:
+                segment.discard(number)
+            self.index.merge(segment)
@@ -0,0 +1,487 @@
+import logging
+import os
+import stat
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Generic, TypeVar
+
+from app.parse_cache import (
+    UNVERIFIED,
+    ItemCodec,
+    ParseCache,
+    Signature,
+    content_digest,
+    is_racy,
+)
+
+logger: logging.Logger = logging.getLogger("uvicorn.error")
+
+T = TypeVar("T")
+
+
+@dataclass
+class FileState(Generic[T]):
+    """Stat signature of a markdown file along with its parsed item."""
+
+    mtime_ns: int
+    size: int
+    inode: int
+    item: T
+    # content hash for the parse cache when the stat was too recent to trust
+    digest: str | None = None
+
+    def matches(self, st: os.stat_result) -> bool:
+        """Return True if the stat result matches this recorded signature."""
+        return (
+            self.mtime_ns == st.st_mtime_ns
+            and self.size == st.st_size
+            and self.inode == st.st_ino
+        )
+
+
+@dataclass
+class ScanStats:
+    """Counters describing the work done by a single store scan."""
+
+    statted: int = 0
+    parsed: int = 0
+    removed: int = 0
+    # items loaded from the parse cache instead of parsed
+    cached: int = 0
+
+    @property
+    def changed(self) -> bool:
+        """Return True if the scan added, updated, or removed any item."""
+        return bool(self.parsed or self.removed or self.cached)
+
+    def to_dict(self) -> dict[str, int]:
+        """Convert the counters to a JSON-serializable dict."""
+        return {
+            "statted": self.statted,
+            "parsed": self.parsed,
+            "removed": self.removed,
+            "cached": self.cached,
+        }
+
+
+class StoreIndex(ABC, Generic[T]):
+    """A derived index over a store's items, maintained from item-level deltas."""
+
+    @abstractmethod
+    def update(self, removed: list[T], added: list[T]) -> None:
+        """Drop the removed items from the index and add the added ones.
+
+        An edited file shows up as its old item removed and new item added.
+        """
+
+    def prepare(self, items: list[T]) -> None:
+        """Precompute what update() will need for newly parsed items.
+
+        Scans call this from their worker thread before the items are
+        published, so costly per-item work stays off the event loop.
+        """
+
+
+@dataclass
+class FileStore(Generic[T]):
+    """In-memory cache of the parsed markdown files in a single directory.
+
+    Each scan only stats the directory entries and re-parses files whose
+    mtime, size, or inode changed since the previous scan. Routes that write
+    a file apply the change directly with apply(), which records the new stat
+    so the next scan does not re-parse it. With a parse cache, the first scan
+    takes unchanged files' items from it and changed scans are written back.
+    """
+
+    name: str
+    directory: Path
+    parse: Callable[[Path], T]
+    suffix: str | None = ".md"
+    items: list[T] = field(default_factory=list)
+    last_scan: ScanStats = field(default_factory=ScanStats)
+    # bumped each time publish() feeds changes to the indexes; items itself
+    # is patched in place by apply(), so compare generations, not lists
+    generation: int = 0
+    indexes: list["StoreIndex[T]"] = field(default_factory=list)
+    cache: ParseCache | None = None
+    # how items are stored in the cache; without one the cache is not used
+    codec: ItemCodec[T] | None = None
+    # cache entries by path, until the first scan has consumed them
+    _cached: dict[str, tuple[Signature, str | None, str]] | None = field(
+        default=None, repr=False
+    )
+    _files: dict[Path, FileState[T]] = field(default_factory=dict)
+    # path of each entry of items, and the position of each path in items,
+    # so single-file changes patch items in place
+    _paths: list[Path] = field(default_factory=list, repr=False)
+    _positions: dict[Path, int] = field(default_factory=dict, repr=False)
+    # guards changes to _files/items; only ever held briefly
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    # serializes scans and refreshes, which parse while holding it
+    _scan_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    # paths written through apply() while a scan was running
+    _applied: set[Path] = field(default_factory=set, repr=False)
+    # paths applied in memory whose disk write has not been flushed yet
+    _pending: set[Path] = field(default_factory=set, repr=False)
+    # (removed, added) item batches not yet fed to the indexes
+    _changes: list[tuple[list[T], list[T]]] = field(default_factory=list, repr=False)
+
+    def _owns(self, filename: str) -> bool:
+        """Return True if a file with this name belongs to the store.
+
+        Hidden files, such as the temp files writes are staged in, never do.
+        """
+        if filename.startswith("."):
+            return False
+        return self.suffix is None or filename.endswith(self.suffix)
+
+    def _iter_entries(self) -> list[os.DirEntry]:
+        """Return the directory entries this store is responsible for."""
+        if not self.directory.exists():
+            return []
+        with os.scandir(self.directory) as it:
+            return [e for e in it if e.is_file() and self._owns(e.name)]
+
+    def _parse_if_changed(
+        self,
+        base: dict[Path, FileState[T]],
+        path: Path,
+        st: os.stat_result,
+        stats: ScanStats,
+    ) -> FileState[T]:
+        """Return the recorded state for a file, re-parsing it if its stat changed."""
+        stats.statted += 1
+        state = base.get(path)
+        if state is None or not state.matches(st):
+            digest: str | None = None
+            cached = self._from_cache(path, st)
+            if cached is not None:
+                item, digest = cached
+                stats.cached += 1
+            else:
+                if self.cache is not None and is_racy(st.st_mtime_ns):
+                    # hashed before parsing, so an edit racing the parse
+                    # fails the check on the next start
+                    digest = content_digest(path)
+                item = self.parse(path)
+                stats.parsed += 1
+            state = FileState(
+                mtime_ns=st.st_mtime_ns,
+                size=st.st_size,
+                inode=st.st_ino,
+                item=item,
+                digest=digest,
+            )
+        return state
+
+    def _from_cache(
+        self, path: Path, st: os.stat_result
+    ) -> tuple[T, str | None] | None:
+        """Return a file's cached item and digest if its signature still matches.
+
+        An entry with a digest is only used if the file's content hashes to it.
+        """
+        if not self._cached or self.codec is None:
+            return None
+        entry = self._cached.pop(str(path), None)
+        if entry is None or entry[0] != (st.st_mtime_ns, st.st_size, st.st_ino):
+            return None
+        _, digest, text = entry
+        try:
+            if digest is not None and content_digest(path) != digest:
+                return None
+            return self.codec.loads(text, path), digest
+        except Exception as e:
+            logger.warning("Ignoring unreadable parse cache entry %s: %s", path, e)
+            return None
+
+    def save_cache(self) -> None:
+        """Write the current items to the parse cache, if one is attached.
+
+        Files with unflushed writes are skipped until settle() records them.
+        """
+        if self.cache is None or self.codec is None:
+            return
+        with self._scan_lock:
+            with self._lock:
+                files = dict(self._files)
+            self.cache.sync(
+                self.name,
+                {
+                    str(p): ((s.mtime_ns, s.size, s.inode), s.digest, s.item)
+                    for p, s in files.items()
+                    if s.size >= 0
+                },
+                self.codec.dumps,
+            )
+
+    def _begin(self) -> tuple[dict[Path, FileState[T]], set[Path]]:
+        """Snapshot the file index and pending writes before a scan or refresh.
+
+        The snapshot is a copy, since apply() and settle() change the live
+        index in place while the scan runs.
+        """
+        with self._lock:
+            self._applied.clear()
+            return dict(self._files), set(self._pending)
+
+    def _prepare(self, items: list[T]) -> None:
+        """Let the indexes precompute their updates for newly parsed items."""
+        if items:
+            for index in self.indexes:
+                index.prepare(items)
+
+    def _commit(self, files: dict[Path, FileState[T]], stats: ScanStats) -> None:
+        """Swap in a scanned file index if the scan changed anything.
+
+        Writes applied while the scan ran win over what the scan observed.
+        """
+        with self._lock:
+            if stats.changed:
+                for path in self._applied:
+                    if path in self._files:
+                        files[path] = self._files[path]
+                    else:
+                        files.pop(path, None)
+                self._swap(files)
+            self._applied.clear()
+            self.last_scan = stats
+
+    def _swap(self, files: dict[Path, FileState[T]]) -> None:
+        """Replace the file index and item list; callers must hold the lock.
+
+        The items that left or entered the index are queued for publish().
+        """
+        old = self._files
+        removed = [
+            s.item
+            for p, s in old.items()
+            if (new := files.get(p)) is None or new.item is not s.item
+        ]
+        added = [
+            s.item
+            for p, s in files.items()
+            if (prev := old.get(p)) is None or prev.item is not s.item
+        ]
+        self._files = files
+        if removed or added:
+            self.items = [s.item for s in files.values()]
+            self._paths = list(files)
+            self._positions = {p: i for i, p in enumerate(self._paths)}
+            self._changes.append((removed, added))
+
+    def _put(self, path: Path, state: FileState[T]) -> T | None:
+        """Set one file's state, patching items in place; callers hold the lock.
+
+        Returns the item the file held before, if any.
+        """
+        prev = self._files.get(path)
+        self._files[path] = state
+        if prev is None:
+            self._positions[path] = len(self.items)
+            self._paths.append(path)
+            self.items.append(state.item)
+            return None
+        self.items[self._positions[path]] = state.item
+        return prev.item
+
+    def _pop(self, path: Path) -> T | None:
+        """Drop one file, moving the last item into its slot; callers hold the lock.
+
+        Returns the item the file held, if any.
+        """
+        prev = self._files.pop(path, None)
+        if prev is None:
+            return None
+        i = self._positions.pop(path)
+        last_path = self._paths.pop()
+        last_item = self.items.pop()
+        if i < len(self.items):
+            self._paths[i] = last_path
+            self.items[i] = last_item
+            self._positions[last_path] = i
+        return prev.item
+
+    def publish(self) -> list[T]:
+        """Feed queued item changes to the attached indexes and return the items.
+
+        Scans may run in worker threads, so indexes are only updated here,
+        from the event loop, keeping them consistent with the returned list.
+        """
+        with self._lock:
+            changes, self._changes = self._changes, []
+            items = self.items
+            if changes:
+                self.generation += 1
+        for removed, added in changes:
+            for index in self.indexes:
+                index.update(removed, added)
+        return items
+
+    def scan(self) -> ScanStats:
+        """Stat every file, re-parse the changed ones, and publish new items.
+
+        Safe to call from worker threads; concurrent scans are serialized.
+        """
+        with self._scan_lock:
+            base, pending = self._begin()
+            stats = ScanStats()
+            files: dict[Path, FileState[T]] = {}
+            if (
+                self.cache is not None
+                and self.codec is not None
+                and self._cached is None
+            ):
+                self._cached = self.cache.load(self.name)
+
+            fresh: list[T] = []
+            for entry in self._iter_entries():
+                path = Path(entry.path)
+                if path not in pending:
+                    state = self._parse_if_changed(base, path, entry.stat(), stats)
+                    if state is not base.get(path):
+                        fresh.append(state.item)
+                    files[path] = state
+            # files with unflushed writes keep their in-memory state
+            for path in pending:
+                if path in base:
+                    files[path] = base[path]
+
+            stats.removed = len(base.keys() - files.keys())
+
+            # swap in the new index only once every file parsed successfully
+            self._prepare(fresh)
+            self._commit(files, stats)
+            self._cached = {}
+        if stats.changed:
+            self.save_cache()
+        return stats
+
+    def refresh(self, paths: Iterable[Path]) -> ScanStats:
+        """Re-check only the given files, picking up creates, edits and deletes."""
+        with self._scan_lock:
+            base, pending = self._begin()
+            stats = ScanStats()
+            files: dict[Path, FileState[T]] = dict(base)
+            fresh: list[T] = []
+
+            for path in paths:
+                if path.parent != self.directory or not self._owns(path.name):
+                    continue
+                if path in pending:
+                    continue
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    if files.pop(path, None) is not None:
+                        stats.removed += 1
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    state = self._parse_if_changed(base, path, st, stats)
+                    if state is not base.get(path):
+                        fresh.append(state.item)
+                    files[path] = state
+
+            self._prepare(fresh)
+            self._commit(files, stats)
+        if stats.changed:
+            self.save_cache()
+        return stats
+
+    def load(self) -> list[T]:
+        """Scan the directory and return the current list of items."""
+        self.scan()
+        return self.items
+
+    def get(self, path: Path) -> T | None:
+        """Return the cached item for a file, or None if it is not loaded."""
+        state = self._files.get(path)
+        return state.item if state is not None else None
+
+    def apply(
+        self,
+        upserts: dict[Path, T] | None = None,
+        removes: Iterable[Path] = (),
+        pending: bool = False,
+    ) -> None:
+        """Write through changes the caller made, or is about to make, on disk.
+
+        Upserted files are stat'd to record their new signature alongside the
+        given item, so no file is re-read or re-parsed. With pending set the
+        disk write happens later: the paths are left out of scans until
+        settle() is called for them once they are flushed.
+        """
+        removes = list(removes)
+        states: dict[Path, FileState[T]] = {}
+        for path, item in (upserts or {}).items():
+            if pending:
+                states[path] = FileState(mtime_ns=0, size=-1, inode=0, item=item)
+                continue
+            st = path.stat()
+            states[path] = FileState(
+                mtime_ns=st.st_mtime_ns,
+                size=st.st_size,
+                inode=st.st_ino,
+                item=item,
+                digest=self._written_digest(st),
+            )
+
+        with self._lock:
+            removed: list[T] = []
+            for path in removes:
+                item = self._pop(path)
+                if item is not None:
+                    removed.append(item)
+                self._applied.add(path)
+            for path, state in states.items():
+                item = self._put(path, state)
+                if item is not None:
+                    removed.append(item)
+                self._applied.add(path)
+            if pending:
+                self._pending.update(states)
+                self._pending.update(removes)
+            added: list[T] = [state.item for state in states.values()]
+            if removed or added:
+                self._changes.append((removed, added))
+
+    def _written_digest(self, st: os.stat_result) -> str | None:
+        """Return the digest to record for a file the store has just written.
+
+        Its item was not parsed from the file, so a stat too recent to trust
+        cannot be vouched for by hashing it: the entry is left uncached.
+        """
+        return (
+            UNVERIFIED if self.cache is not None and is_racy(st.st_mtime_ns) else None
+        )
+
+    def settle(self, paths: Iterable[Path], failed: Iterable[Path] = ()) -> None:
+        """Record the on-disk signature of flushed writes and resume scanning them.
+
+        Failed writes keep an unknown signature so the next scan re-reads
+        whatever is actually on disk.
+        """
+        sigs: dict[Path, os.stat_result | None] = dict.fromkeys(failed)
+        for path in paths:
+            try:
+                sigs[path] = path.stat()
+            except FileNotFoundError:
+                sigs[path] = None
+
+        with self._lock:
+            for path, st in sigs.items():
+                self._pending.discard(path)
+                self._applied.add(path)
+                state = self._files.get(path)
+                if state is not None and st is not None:
+                    # same item, so items and the indexes are left alone
+                    self._files[path] = FileState(
+                        mtime_ns=st.st_mtime_ns,
+                        size=st.st_size,
+                        inode=st.st_ino,
+                        item=state.item,
+                        digest=self._written_digest(st),
+                    )
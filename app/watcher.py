@@ -0,0 +1,181 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+logger: logging.Logger = logging.getLogger("uvicorn.error")
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+
+EVENT_HEADER = struct.Struct("iIII")
+
+# (store name, touched paths); None paths means the whole directory is suspect
+ChangeCallback = Callable[[str, set[Path] | None], Awaitable[None]]
+
+
+class InotifyUnavailable(Exception):
+    """Raised when inotify cannot be used on this platform or for a directory."""
+
+
+def _load_libc() -> ctypes.CDLL:
+    """Load libc with errno support, raising InotifyUnavailable off Linux."""
+    if not sys.platform.startswith("linux"):
+        raise InotifyUnavailable(f"inotify is not available on {sys.platform}")
+    libc_name: str = ctypes.util.find_library("c") or "libc.so.6"
+    try:
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+    except (OSError, AttributeError) as e:
+        raise InotifyUnavailable(f"failed to load inotify from libc: {e}") from e
+    return libc
+
+
+class InotifyWatcher:
+    """Watches content directories with inotify and reports touched files.
+
+    Events are coalesced per directory: the first event for a directory opens
+    a debounce window, and every path touched within that window is delivered
+    to the callback in a single batch.
+    """
+
+    def __init__(self, on_change: ChangeCallback, debounce_seconds: float) -> None:
+        self._on_change: ChangeCallback = on_change
+        self._debounce: float = debounce_seconds
+        self._libc: ctypes.CDLL = _load_libc()
+        self._fd: int = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise InotifyUnavailable(f"inotify_init1 failed: {os.strerror(errno)}")
+        self._watches: dict[int, tuple[str, Path]] = {}
+        self._pending: dict[str, set[Path] | None] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def add(self, name: str, directory: Path) -> None:
+        """Start watching a directory, reporting its changes under the given name."""
+        wd: int = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), WATCH_MASK
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise InotifyUnavailable(
+                f"inotify_add_watch({directory}) failed: {os.strerror(errno)}"
+            )
+        self._watches[wd] = (name, directory)
+
+    def start(self) -> None:
+        """Begin reading events on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._fd, self._read_events)
+
+    def close(self) -> None:
+        """Stop reading events, cancel pending batches, and close the inotify fd."""
+        if self._loop is not None:
+            self._loop.remove_reader(self._fd)
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        os.close(self._fd)
+
+    def _read_events(self) -> None:
+        """Drain the inotify fd and queue touched paths per directory."""
+        try:
+            buf: bytes = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            raw_name: bytes = buf[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed, rescanning all directories")
+                for name, _ in self._watches.values():
+                    self._queue(name, None)
+                continue
+
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            name, directory = watch
+
+            if mask & IN_IGNORED:
+                logger.warning("inotify watch on %s was removed", directory)
+                del self._watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                self._queue(name, None)
+            elif raw_name:
+                self._queue(name, {directory / os.fsdecode(raw_name)})
+
+    def _queue(self, name: str, paths: set[Path] | None) -> None:
+        """Merge touched paths into the directory's batch and arm its timer."""
+        if name in self._pending:
+            current = self._pending[name]
+            self._pending[name] = (
+                None if current is None or paths is None else current | paths
+            )
+        else:
+            self._pending[name] = paths
+
+        if name not in self._timers:
+            assert self._loop is not None
+            self._timers[name] = self._loop.call_later(
+                self._debounce, self._flush, name
+            )
+
+    def _flush(self, name: str) -> None:
+        """Hand a directory's coalesced batch to the change callback."""
+        self._timers.pop(name, None)
+        paths = self._pending.pop(name, set())
+        task = asyncio.ensure_future(self._deliver(name, paths))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, name: str, paths: set[Path] | None) -> None:
+        """Run the change callback, logging instead of raising on failure."""
+        try:
+            await self._on_change(name, paths)
+        except Exception:
+            logger.exception("Error applying file changes for %s", name)
@@ -0,0 +1,324 @@
+import math
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+
+from app.models import Workout
+from app.progression import estimated_1rm, exercise_key
+from app.store import StoreIndex
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# compact the columns once this share of rows belongs to removed workouts
+COMPACT_RATIO: float = 0.25
+
+
+@dataclass
+class NameTable:
+    """Interns names as dense integer IDs."""
+
+    ids: dict[str, int] = field(default_factory=dict)
+    names: list[str] = field(default_factory=list)
+
+    def intern(self, name: str) -> int:
+        """Return the ID of a name, assigning the next one if it is new."""
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+
+@dataclass
+class WorkoutSetStore(StoreIndex[Workout]):
+    """Every logged set of every workout as parallel columns, one row per set.
+
+    Columns hold the workout's serial number and date ordinal, the interned
+    group and exercise names, reps (0 when missing) and weight (NaN when
+    missing). Sets of removed workouts are masked out and the columns are
+    compacted once enough of them pile up. Stats are computed in whole-column
+    passes with NumPy when it is installed, and with plain loops over the
+    same columns otherwise.
+    """
+
+    groups: NameTable = field(default_factory=NameTable)
+    exercises: NameTable = field(default_factory=NameTable)
+    workout: array = field(default_factory=lambda: array("q"))
+    ordinal: array = field(default_factory=lambda: array("q"))
+    group: array = field(default_factory=lambda: array("q"))
+    exercise: array = field(default_factory=lambda: array("q"))
+    reps: array = field(default_factory=lambda: array("q"))
+    weight: array = field(default_factory=lambda: array("d"))
+    alive: array = field(default_factory=lambda: array("b"))
+    # id() of each indexed Workout -> (serial, first row, end row)
+    spans: dict[int, tuple[int, int, int]] = field(default_factory=dict)
+    serials: int = 0
+    dead: int = 0
+
+    def __len__(self) -> int:
+        return len(self.alive) - self.dead
+
+    def update(self, removed: list[Workout], added: list[Workout]) -> None:
+        """Mask out the sets of removed workouts and append those of added ones."""
+        for workout in removed:
+            span = self.spans.pop(id(workout), None)
+            if span is None:
+                continue
+            _, first, end = span
+            for row in range(first, end):
+                self.alive[row] = 0
+            self.dead += end - first
+        for workout in added:
+            self._append(workout)
+        if self.dead > len(self.alive) * COMPACT_RATIO:
+            self._compact()
+
+    def _append(self, workout: Workout) -> None:
+        """Append one row per set of a workout."""
+        serial: int = self.serials
+        self.serials += 1
+        first: int = len(self.alive)
+        ordinal: int = workout.date.toordinal()
+        for group in workout.groups:
+            group_id: int = self.groups.intern(group.name.strip())
+            for exercise in group.exercises:
+                exercise_id: int = self.exercises.intern(exercise_key(exercise.name))
+                for s in exercise.sets:
+                    self.workout.append(serial)
+                    self.ordinal.append(ordinal)
+                    self.group.append(group_id)
+                    self.exercise.append(exercise_id)
+                    self.reps.append(s.reps or 0)
+                    self.weight.append(math.nan if s.weight is None else s.weight)
+                    self.alive.append(1)
+        self.spans[id(workout)] = (serial, first, len(self.alive))
+
+    def _compact(self) -> None:
+        """Rebuild the columns without the rows of removed workouts."""
+        columns = (
+            "workout",
+            "ordinal",
+            "group",
+            "exercise",
+            "reps",
+            "weight",
+            "alive",
+        )
+        fresh: dict[str, array] = {
+            name: array(getattr(self, name).typecode) for name in columns
+        }
+        spans: dict[int, tuple[int, int, int]] = {}
+        for key, (serial, first, end) in sorted(
+            self.spans.items(), key=lambda item: item[1][1]
+        ):
+            start: int = len(fresh["alive"])
+            for name in columns:
+                fresh[name].extend(getattr(self, name)[first:end])
+            spans[key] = (serial, start, len(fresh["alive"]))
+        for name in columns:
+            setattr(self, name, fresh[name])
+        self.spans = spans
+        self.dead = 0
+
+    # stats
+
+    def _rows(
+        self, start: date | None, end: date | None
+    ) -> tuple["np.ndarray", "np.ndarray"]:
+        """Return a NumPy view of the date column and the mask of live rows in range."""
+        ordinal = np.frombuffer(self.ordinal, dtype=np.int64)
+        mask = np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+        if start is not None:
+            mask &= ordinal >= start.toordinal()
+        if end is not None:
+            mask &= ordinal <= end.toordinal()
+        return ordinal, mask
+
+    def _in_range(self, row: int, start: int, end: int) -> bool:
+        """Return True if a row is live and dated within [start, end]."""
+        return bool(self.alive[row]) and start <= self.ordinal[row] <= end
+
+    def weekly_tonnage(
+        self, start: date | None = None, end: date | None = None
+    ) -> list[tuple[date, float]]:
+        """Return total reps x weight per Sunday-start week, in week order."""
+        if not self.alive:
+            return []
+        if np is not None:
+            ordinal, mask = self._rows(start, end)
+            weight = np.frombuffer(self.weight, dtype=np.float64)
+            mask &= ~np.isnan(weight)
+            reps = np.frombuffer(self.reps, dtype=np.int64)
+            week = ordinal[mask] - ordinal[mask] % 7
+            weeks, inverse = np.unique(week, return_inverse=True)
+            totals = np.bincount(inverse, weights=reps[mask] * weight[mask])
+            return [
+                (date.fromordinal(int(w)), round(float(t), 3))
+                for w, t in zip(weeks, totals)
+            ]
+
+        lo, hi = _bounds(start, end)
+        sums: dict[int, float] = defaultdict(float)
+        for row, ordinal in enumerate(self.ordinal):
+            weight = self.weight[row]
+            if self._in_range(row, lo, hi) and not math.isnan(weight):
+                sums[ordinal - ordinal % 7] += self.reps[row] * weight
+        return [(date.fromordinal(w), round(sums[w], 3)) for w in sorted(sums)]
+
+    def sets_per_group(
+        self, start: date | None = None, end: date | None = None
+    ) -> dict[str, int]:
+        """Return the number of sets logged under each group name."""
+        if not self.alive:
+            return {}
+        if np is not None:
+            _, mask = self._rows(start, end)
+            group = np.frombuffer(self.group, dtype=np.int64)
+            counts = np.bincount(group[mask], minlength=len(self.groups.names))
+            return {self.groups.names[i]: int(n) for i, n in enumerate(counts) if n}
+
+        lo, hi = _bounds(start, end)
+        counts: dict[int, int] = defaultdict(int)
+        for row, group_id in enumerate(self.group):
+            if self._in_range(row, lo, hi):
+                counts[group_id] += 1
+        return {self.groups.names[i]: n for i, n in sorted(counts.items())}
+
+    def personal_records(
+        self, start: date | None = None, end: date | None = None
+    ) -> list[dict]:
+        """Return the sessions that set a new best estimated 1RM for an exercise.
+
+        A session is a PR when its best set's e1RM beats every earlier
+        session of the exercise, including those before start; an
+        exercise's first session is the baseline, not a PR.
+        """
+        sessions: list[tuple[int, int, int, int]] = self._pr_sessions(end)
+        lo, _ = _bounds(start, end)
+        records: list[dict] = []
+        for exercise_id, ordinal, first, last in sessions:
+            if ordinal < lo:
+                continue
+            best: int = max(
+                (
+                    row
+                    for row in range(first, last)
+                    if self.exercise[row] == exercise_id and self._is_weighted(row)
+                ),
+                key=lambda row: self._e1rm(row),
+            )
+            records.append(
+                {
+                    "exercise": self.exercises.names[exercise_id],
+                    "date": date.fromordinal(ordinal).isoformat(),
+                    "weight": self.weight[best],
+                    "reps": self.reps[best],
+                    "e1rm": round(self._e1rm(best), 3),
+                }
+            )
+        records.sort(key=lambda r: (r["date"], r["exercise"]))
+        return records
+
+    def _is_weighted(self, row: int) -> bool:
+        """Return True if a row has both a weight and at least one rep."""
+        return not math.isnan(self.weight[row]) and self.reps[row] > 0
+
+    def _e1rm(self, row: int) -> float:
+        """Return the estimated 1RM of one set."""
+        return estimated_1rm(self.reps[row], self.weight[row])
+
+    def _pr_sessions(self, end: date | None) -> list[tuple[int, int, int, int]]:
+        """Return (exercise, date ordinal, first row, end row) of each PR session.
+
+        Rows of one workout are contiguous, so a session (one exercise in
+        one workout) lies within its workout's rows; first and end bound it.
+        """
+        if not self.alive:
+            return []
+        if np is not None:
+            return self._pr_sessions_numpy(end)
+
+        _, hi = _bounds(None, end)
+        # (exercise, ordinal, serial) -> [best e1RM, first row, end row]
+        bests: dict[tuple[int, int, int], list] = {}
+        for row in range(len(self.alive)):
+            if not self._in_range(row, 0, hi) or not self._is_weighted(row):
+                continue
+            key = (self.exercise[row], self.ordinal[row], self.workout[row])
+            e1rm: float = self._e1rm(row)
+            session = bests.get(key)
+            if session is None:
+                bests[key] = [e1rm, row, row + 1]
+            else:
+                session[0] = max(session[0], e1rm)
+                session[2] = row + 1
+        prs: list[tuple[int, int, int, int]] = []
+        record: dict[int, float] = {}
+        for (exercise_id, ordinal, _), (e1rm, first, last) in sorted(bests.items()):
+            previous = record.get(exercise_id)
+            if previous is not None and e1rm > previous:
+                prs.append((exercise_id, ordinal, first, last))
+            if previous is None or e1rm > previous:
+                record[exercise_id] = e1rm
+        return prs
+
+    def _pr_sessions_numpy(self, end: date | None) -> list[tuple[int, int, int, int]]:
+        """Vectorized _pr_sessions: sort rows by session, reduce, running max."""
+        ordinal, mask = self._rows(None, end)
+        weight = np.frombuffer(self.weight, dtype=np.float64)
+        reps = np.frombuffer(self.reps, dtype=np.int64)
+        mask &= ~np.isnan(weight) & (reps > 0)
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return []
+        e1rm = np.where(
+            reps[rows] == 1, weight[rows], weight[rows] * (1 + reps[rows] / 30)
+        )
+        exercise = np.frombuffer(self.exercise, dtype=np.int64)[rows]
+        serial = np.frombuffer(self.workout, dtype=np.int64)[rows]
+        day = ordinal[rows]
+
+        order = np.lexsort((rows, serial, day, exercise))
+        rows, e1rm, exercise, serial, day = (
+            rows[order],
+            e1rm[order],
+            exercise[order],
+            serial[order],
+            day[order],
+        )
+        starts = np.flatnonzero(
+            np.r_[True, (exercise[1:] != exercise[:-1]) | (serial[1:] != serial[:-1])]
+        )
+        best = np.maximum.reduceat(e1rm, starts)
+        session_exercise = exercise[starts]
+
+        # a running max per exercise in one pass: lift each exercise's values
+        # above every value of the exercises sorted before it
+        lifted = best - best.min() + session_exercise * (best.max() - best.min() + 1)
+        previous = np.r_[-np.inf, np.maximum.accumulate(lifted)[:-1]]
+        first_of_exercise = np.r_[True, session_exercise[1:] != session_exercise[:-1]]
+        is_pr = ~first_of_exercise & (lifted > previous)
+
+        first_row = np.minimum.reduceat(rows, starts)
+        last_row = np.maximum.reduceat(rows, starts) + 1
+        return [
+            (
+                int(session_exercise[i]),
+                int(day[starts[i]]),
+                int(first_row[i]),
+                int(last_row[i]),
+            )
+            for i in np.flatnonzero(is_pr)
+        ]
+
+
+def _bounds(start: date | None, end: date | None) -> tuple[int, int]:
+    """Return inclusive date ordinal bounds, open ends widened to any date."""
+    return (
+        start.toordinal() if start else 0,
+        end.toordinal() if end else date.max.toordinal(),
+    )
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import frontmatter
+
+from app.writer import write_post
+
+logger: logging.Logger = logging.getLogger("uvicorn.error")
+
+# (store name, written paths, failed paths) awaited on the loop after a flush
+FlushCallback = Callable[[str, list[Path], list[Path]], Awaitable[None]]
+
+
+class WriteFailed(Exception):
+    """A queued write or deletion of a file could not be applied to disk."""
+
+    def __init__(self, path: Path, error: str) -> None:
+        super().__init__(f"failed to write {path.name}: {error}")
+        self.path: Path = path
+        self.error: str = error
+
+
+@dataclass(slots=True)
+class PendingWrite:
+    """The latest queued change to one file: a post to write, or None to delete."""
+
+    store: str
+    post: frontmatter.Post | None
+
+
+@dataclass
+class WriteQueueStats:
+    """Counters describing the write queue's activity."""
+
+    queued: int = 0
+    coalesced: int = 0
+    written: int = 0
+    deleted: int = 0
+    failed: int = 0
+    flushes: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+    total_flush_ms: float = 0.0
+    # the most recent failure, as "<file name>: <error>"
+    last_error: str | None = None
+
+    def to_dict(self, depth: int) -> dict[str, int | float | str | None]:
+        """Convert the counters and the current queue depth to a dict."""
+        return {
+            "depth": depth,
+            "queued": self.queued,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / (self.flushes or 1), 3),
+            "last_error": self.last_error,
+        }
+
+
+@dataclass
+class WriteQueue:
+    """Deferred disk writes, coalesced per file and flushed off the event loop.
+
+    Routes apply a change to the in-memory stores and put() the file's new
+    post (or its deletion) here. Only the last change queued for a path is
+    kept; the queue is flushed by a single writer thread a short delay after
+    the first change, and on shutdown. Callers that must not respond before
+    their files are on disk await written() for them, which starts the flush
+    without waiting out the delay.
+    """
+
+    on_flushed: FlushCallback
+    delay_seconds: float
+    stats: WriteQueueStats = field(default_factory=WriteQueueStats)
+    _pending: dict[Path, PendingWrite] = field(default_factory=dict)
+    # futures resolved by the flush that writes each pending path
+    _waiters: dict[Path, list[asyncio.Future[None]]] = field(default_factory=dict)
+    _executor: ThreadPoolExecutor = field(
+        default_factory=lambda: ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shelf-writer"
+        )
+    )
+    _flush_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    _timer: asyncio.Handle | None = None
+    _tasks: set[asyncio.Task] = field(default_factory=set)
+
+    @property
+    def depth(self) -> int:
+        """Return the number of files with a change waiting to be flushed."""
+        return len(self._pending)
+
+    def put(self, store: str, path: Path, post: frontmatter.Post | None) -> None:
+        """Queue a write, or a deletion for a None post, replacing any pending one."""
+        self.stats.queued += 1
+        if path in self._pending:
+            self.stats.coalesced += 1
+        self._pending[path] = PendingWrite(store=store, post=post)
+        if self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.delay_seconds, self._on_timer)
+
+    def written(self, path: Path) -> asyncio.Future[None]:
+        """Return a future done once the flush covering a queued path finishes.
+
+        It fails with WriteFailed if that flush could not write the file.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        if path not in self._pending:
+            future.set_result(None)
+            return future
+        self._waiters.setdefault(path, []).append(future)
+        if isinstance(self._timer, asyncio.TimerHandle):
+            # someone waits: flush once the current callbacks have queued
+            # their changes, rather than after the coalescing delay; writes
+            # queued while that flush runs are grouped into the next one
+            self._timer.cancel()
+            self._timer = loop.call_soon(self._on_timer)
+        return future
+
+    def _on_timer(self) -> None:
+        """Start a background flush when the delay expires."""
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        """Write every pending change to disk and settle it in its store."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            waiters: dict[Path, list[asyncio.Future[None]]] = {
+                path: self._waiters.pop(path) for path in batch if path in self._waiters
+            }
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            failed: dict[Path, str] = await loop.run_in_executor(
+                self._executor, self._write_batch, batch
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            self.stats.flushes += 1
+            self.stats.last_flush_ms = elapsed_ms
+            self.stats.max_flush_ms = max(self.stats.max_flush_ms, elapsed_ms)
+            self.stats.total_flush_ms += elapsed_ms
+
+            # paths queued again during the flush settle after their next one
+            settled: dict[str, tuple[list[Path], list[Path]]] = {}
+            for path, write in batch.items():
+                if path not in self._pending:
+                    written, errors = settled.setdefault(write.store, ([], []))
+                    (errors if path in failed else written).append(path)
+            for store, (written, errors) in settled.items():
+                try:
+                    await self.on_flushed(store, written, errors)
+                except Exception:
+                    logger.exception("Failed to settle flushed %s writes", store)
+
+            # waiters wake only once failed writes were rolled back in memory
+            for path, futures in waiters.items():
+                for future in futures:
+                    if future.done():
+                        continue
+                    if path in failed:
+                        future.set_exception(WriteFailed(path, failed[path]))
+                    else:
+                        future.set_result(None)
+
+    def _write_batch(self, batch: dict[Path, PendingWrite]) -> dict[Path, str]:
+        """Apply a batch of changes to disk and return the failed paths' errors.
+
+        Runs in the writer thread.
+        """
+        failed: dict[Path, str] = {}
+        for path, write in batch.items():
+            try:
+                if write.post is None:
+                    path.unlink(missing_ok=True)
+                    self.stats.deleted += 1
+                else:
+                    write_post(write.post, path)
+                    self.stats.written += 1
+            except Exception as e:
+                self.stats.failed += 1
+                self.stats.last_error = f"{path.name}: {e}"
+                failed[path] = str(e)
+                logger.exception("Failed to write %s", path)
+        return failed
+
+    async def close(self) -> None:
+        """Cancel the flush timer, flush what is left, and stop the writer thread."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for task in list(self._tasks):
+            await task
+        await self.flush()
+        self._executor.shutdown(wait=True)
@@ -1,3 +1,8 @@
+import itertools
+import logging
+import os
+import threading
+import time
 from pathlib import Path
 
 import frontmatter
@@ -12,9 +17,144 @@ from app.models import (
     WorkoutTemplateModel,
 )
 
+logger: logging.Logger = logging.getLogger("uvicorn.error")
 
-def write_media_item(media_item: MediaModel, file_path: Path) -> None:
-    """Serialize a MediaItem to a markdown file with frontmatter."""
+# "none": rename only, "fsync": fsync every write and its directory before it
+# returns, "group": fsync every write, then its directory with recent others
+DURABILITY_MODES: tuple[str, ...] = ("none", "fsync", "group")
+
+_tmp_counter = itertools.count()
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Flush a directory entry change (a rename) to disk."""
+    fd: int = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class GroupCommitter:
+    """Background thread that fsyncs the directories of recent renames in batches.
+
+    Files are fsynced before they are renamed into place, so only the
+    renames are batched. The first rename after an idle period opens a
+    window; every directory renamed into within it is fsynced once when the
+    window closes. A crash can at most undo the renames of the open window,
+    leaving the previous version of those files, never a partial one.
+    """
+
+    def __init__(self, window_seconds: float) -> None:
+        self._window: float = window_seconds
+        self._pending: set[Path] = set()
+        self._cond = threading.Condition()
+        self._closed: bool = False
+        self._thread = threading.Thread(
+            target=self._run, name="shelf-group-commit", daemon=True
+        )
+        self._thread.start()
+
+    def add(self, directory: Path) -> None:
+        """Queue a directory a file was renamed into for the next batch."""
+        with self._cond:
+            if not self._pending:
+                self._cond.notify()
+            self._pending.add(directory)
+
+    def flush(self) -> None:
+        """Fsync every queued directory now."""
+        with self._cond:
+            batch, self._pending = self._pending, set()
+        for directory in batch:
+            _fsync_dir(directory)
+
+    def close(self) -> None:
+        """Stop the background thread after syncing anything still queued."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        """Wait for a rename, let the window fill, then sync the batch."""
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                deadline: float = time.monotonic() + self._window
+                while not self._closed and (left := deadline - time.monotonic()) > 0:
+                    self._cond.wait(left)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Group commit fsync failed")
+
+
+_durability: str = "none"
+_committer: GroupCommitter | None = None
+
+
+def configure_durability(mode: str, group_window_seconds: float = 0.05) -> None:
+    """Select how writes are flushed to disk, replacing any previous mode."""
+    global _durability, _committer
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"unknown write durability mode: {mode}")
+    close_durability()
+    _durability = mode
+    if mode == "group":
+        _committer = GroupCommitter(group_window_seconds)
+
+
+def durability() -> str:
+    """Return the configured durability mode."""
+    return _durability
+
+
+def close_durability() -> None:
+    """Flush pending group commits and stop the committer thread, if any."""
+    global _committer
+    if _committer is not None:
+        _committer.close()
+        _committer = None
+
+
+def write_post(post: frontmatter.Post, file_path: Path) -> None:
+    """Atomically replace a markdown file with a serialized post.
+
+    The post is written to a hidden temp file in the same directory, which
+    is then renamed over the target, so readers see either the old or the
+    new file and never a partial one. Unless durability is "none", the temp
+    file is fsynced before the rename, so a crash cannot leave it partial
+    either.
+    """
+    tmp_path: Path = file_path.with_name(
+        f".{file_path.name}.{os.getpid()}.{next(_tmp_counter)}.tmp"
+    )
+    fd: int = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            frontmatter.dump(post, f)
+            f.write(b"\n")
+            if _durability != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if _durability == "fsync":
+        _fsync_dir(file_path.parent)
+    elif _durability == "group" and _committer is not None:
+        _committer.add(file_path.parent)
+
+
+def media_post(media_item: MediaModel) -> frontmatter.Post:
+    """Build the frontmatter post a media item is stored as."""
     post = frontmatter.Post(content=media_item.review or "")
     post["name"] = media_item.name
     post["country"] = media_item.country
@@ -22,13 +162,16 @@ def write_media_item(media_item: MediaModel, file_path: Path) -> None:
     post["status"] = media_item.status
     post["rating"] = media_item.rating or ""
 
-    with open(file_path, "wb") as f:
-        frontmatter.dump(post, f)
-        f.write(b"\n")
+    return post
 
 
-def write_workout(workout: WorkoutModel, file_path: Path) -> None:
-    """Serialize a Workout to a markdown file with frontmatter."""
+def write_media_item(media_item: MediaModel, file_path: Path) -> None:
+    """Serialize a MediaItem to a markdown file with frontmatter."""
+    write_post(media_post(media_item), file_path)
+
+
+def workout_post(workout: WorkoutModel) -> frontmatter.Post:
+    """Build the frontmatter post a Workout is stored as."""
     post = frontmatter.Post(content=workout.content or "")
     post["date"] = workout.date.isoformat()
     post["time"] = workout.time.strftime("%H:%M:%S")
@@ -55,13 +198,16 @@ def write_workout(workout: WorkoutModel, file_path: Path) -> None:
         )
     post["groups"] = groups
 
-    with open(file_path, "wb") as f:
-        frontmatter.dump(post, f)
-        f.write(b"\n")
+    return post
 
 
-def write_habit(habit: HabitModel, file_path: Path) -> None:
-    """Serialize a Habit to a markdown file with frontmatter."""
+def write_workout(workout: WorkoutModel, file_path: Path) -> None:
+    """Serialize a Workout to a markdown file with frontmatter."""
+    write_post(workout_post(workout), file_path)
+
+
+def habit_post(habit: HabitModel) -> frontmatter.Post:
+    """Build the frontmatter post a Habit is stored as."""
     post = frontmatter.Post(content="")
     post["name"] = habit.name
     post["days"] = habit.days
@@ -77,39 +223,45 @@ def write_habit(habit: HabitModel, file_path: Path) -> None:
             serialized_shifts.append(entry)
         post["shifts"] = serialized_shifts
 
-    with open(file_path, "wb") as f:
-        frontmatter.dump(post, f)
-        f.write(b"\n")
+    return post
 
 
-def write_activity(activity: ActivityModel, file_path: Path) -> None:
-    """Serialize an Activity to a markdown file with frontmatter."""
+def write_habit(habit: HabitModel, file_path: Path) -> None:
+    """Serialize a Habit to a markdown file with frontmatter."""
+    write_post(habit_post(habit), file_path)
+
+
+def activity_post(activity: ActivityModel) -> frontmatter.Post:
+    """Build the frontmatter post an Activity is stored as."""
     post = frontmatter.Post(content="")
     post["name"] = activity.name
     post["date"] = activity.date.isoformat()
 
-    with open(file_path, "wb") as f:
-        frontmatter.dump(post, f)
-        f.write(b"\n")
+    return post
 
 
-def write_preset(preset: PresetModel, file_path: Path) -> None:
-    """Serialize a Preset to a markdown file with frontmatter."""
+def write_activity(activity: ActivityModel, file_path: Path) -> None:
+    """Serialize an Activity to a markdown file with frontmatter."""
+    write_post(activity_post(activity), file_path)
+
+
+def preset_post(preset: PresetModel) -> frontmatter.Post:
+    """Build the frontmatter post a Preset is stored as."""
     post = frontmatter.Post(content="")
     post["name"] = preset.name
 
-    with open(file_path, "wb") as f:
-        frontmatter.dump(post, f)
-        f.write(b"\n")
+    return post
 
 
-def write_task(
-    task: TaskModel,
-    file_path: Path,
-    created_at_iso: str,
-    completed_at_iso: str | None = None,
-) -> None:
-    """Serialize a Task to a markdown file with frontmatter."""
+def write_preset(preset: PresetModel, file_path: Path) -> None:
+    """Serialize a Preset to a markdown file with frontmatter."""
+    write_post(preset_post(preset), file_path)
+
+
+def task_post(
+    task: TaskModel, created_at_iso: str, completed_at_iso: str | None = None
+) -> frontmatter.Post:
+    """Build the frontmatter post a Task is stored as."""
     post = frontmatter.Post(content=task.notes or "")
     post["title"] = task.title
     post["status"] = task.status
@@ -118,13 +270,21 @@ def write_task(
     post["created_at"] = created_at_iso
     post["completed_at"] = completed_at_iso
 
-    with open(file_path, "wb") as f:
-        frontmatter.dump(post, f)
-        f.write(b"\n")
+    return post
 
 
-def write_template(template: WorkoutTemplateModel, file_path: Path) -> None:
-    """Serialize a WorkoutTemplate to a markdown file with frontmatter."""
+def write_task(
+    task: TaskModel,
+    file_path: Path,
+    created_at_iso: str,
+    completed_at_iso: str | None = None,
+) -> None:
+    """Serialize a Task to a markdown file with frontmatter."""
+    write_post(task_post(task, created_at_iso, completed_at_iso), file_path)
+
+
+def template_post(template: WorkoutTemplateModel) -> frontmatter.Post:
+    """Build the frontmatter post a WorkoutTemplate is stored as."""
     post = frontmatter.Post(content="")
     post["name"] = template.name
 
@@ -150,6 +310,9 @@ def write_template(template: WorkoutTemplateModel, file_path: Path) -> None:
         )
     post["groups"] = groups
 
-    with open(file_path, "wb") as f:
-        frontmatter.dump(post, f)
-        f.write(b"\n")
+    return post
+
+
+def write_template(template: WorkoutTemplateModel, file_path: Path) -> None:
+    """Serialize a WorkoutTemplate to a markdown file with frontmatter."""
+    write_post(template_post(template), file_path)
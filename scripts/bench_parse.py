@@ -0,0 +1,198 @@
+"""Benchmark frontmatter parsing throughput per shelf file type.
+
+Writes sample files with app.writer, checks that the fast parse path returns
+the same metadata and content as python-frontmatter, then reports files per
+second for the generic loader, the fast loader, and the full parse_md_to_*
+functions. Both loaders use libyaml's CSafeLoader when PyYAML has it, so the
+speedup only comes from the flat reader (media, activity, preset, task).
+
+usage: uv run python scripts/bench_parse.py [files per type]
+"""
+
+import sys
+import tempfile
+import time as time_mod
+from collections.abc import Callable
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+import frontmatter
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import fast_frontmatter  # noqa: E402
+from app.main import (  # noqa: E402
+    parse_md_to_activity,
+    parse_md_to_habit,
+    parse_md_to_media,
+    parse_md_to_preset,
+    parse_md_to_task,
+    parse_md_to_template,
+    parse_md_to_workout,
+)
+from app.models import (  # noqa: E402
+    ActivityModel,
+    HabitModel,
+    MediaModel,
+    PresetModel,
+    TaskModel,
+    WorkoutModel,
+    WorkoutTemplateModel,
+)
+from app.writer import (  # noqa: E402
+    write_activity,
+    write_habit,
+    write_media_item,
+    write_preset,
+    write_task,
+    write_template,
+    write_workout,
+)
+
+GROUPS: list[dict] = [
+    {
+        "name": f"group {g}",
+        "rest_seconds": 90,
+        "exercises": [
+            {"name": f"exercise {e}", "sets": [{"reps": 8, "weight": 60.5}] * 4}
+            for e in range(3)
+        ],
+    }
+    for g in range(2)
+]
+
+
+def write_samples(root: Path, n: int) -> dict[str, tuple[list[Path], Callable]]:
+    """Write n sample files per type and return them with their parse function."""
+    day = date(2020, 1, 1)
+    writers: dict[str, tuple[Callable[[int, Path], None], Callable]] = {
+        "media": (
+            lambda i, p: write_media_item(
+                MediaModel(
+                    name=f"Show {i}",
+                    country="korea",
+                    type="drama",
+                    status="watched",
+                    rating="4",
+                    review=f"review {i}\n\nsecond paragraph",
+                ),
+                p,
+            ),
+            parse_md_to_media,
+        ),
+        "workout": (
+            lambda i, p: write_workout(
+                WorkoutModel(
+                    date=day + timedelta(days=i),
+                    time=time(7, 30),
+                    groups=GROUPS,
+                    content="notes",
+                ),
+                p,
+            ),
+            parse_md_to_workout,
+        ),
+        "template": (
+            lambda i, p: write_template(
+                WorkoutTemplateModel(name=f"Template {i}", groups=GROUPS), p
+            ),
+            parse_md_to_template,
+        ),
+        "habit": (
+            lambda i, p: write_habit(
+                HabitModel(
+                    name=f"Habit {i}",
+                    days=[1, 3, 5],
+                    color="#605dff",
+                    completions=[
+                        (day + timedelta(days=d)).isoformat() for d in range(200)
+                    ],
+                ),
+                p,
+            ),
+            parse_md_to_habit,
+        ),
+        "activity": (
+            lambda i, p: write_activity(
+                ActivityModel(name=f"Swim {i}", date=day + timedelta(days=i)), p
+            ),
+            parse_md_to_activity,
+        ),
+        "preset": (
+            lambda i, p: write_preset(PresetModel(name=f"Preset {i}"), p),
+            parse_md_to_preset,
+        ),
+        "task": (
+            lambda i, p: write_task(
+                TaskModel(
+                    title=f"Task {i}",
+                    doDate=day + timedelta(days=i) if i % 2 else None,
+                    notes="some notes",
+                ),
+                p,
+                datetime(2024, 1, 1, 9, 0, 0).isoformat(),
+            ),
+            parse_md_to_task,
+        ),
+    }
+
+    samples: dict[str, tuple[list[Path], Callable]] = {}
+    for name, (write, parse) in writers.items():
+        directory = root / name
+        directory.mkdir()
+        paths: list[Path] = []
+        for i in range(n):
+            path = directory / f"{i}.md"
+            write(i, path)
+            paths.append(path)
+        samples[name] = (paths, parse)
+    return samples
+
+
+def files_per_second(paths: list[Path], parse: Callable[[Path], object]) -> float:
+    """Parse every file once and return the throughput."""
+    start = time_mod.perf_counter()
+    for path in paths:
+        parse(path)
+    return len(paths) / (time_mod.perf_counter() - start)
+
+
+def generic_load(path: Path) -> frontmatter.Post:
+    """Parse a file the way the app did before the fast path."""
+    with path.open("r", encoding="utf-8") as f:
+        return frontmatter.load(f)
+
+
+def main() -> None:
+    n: int = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        samples = write_samples(Path(tmp), n)
+
+        print(f"libyaml: {yaml.__with_libyaml__}")
+        print(
+            f"{'type':<10}{'generic/s':>12}{'fast/s':>12}{'speedup':>10}"
+            f"{'parse_md/s':>12}"
+        )
+        for name, (paths, parse) in samples.items():
+            flat: bool = name in ("media", "activity", "preset", "task")
+            for path in paths[:50]:
+                expected = generic_load(path)
+                actual = fast_frontmatter.load(path, flat=flat)
+                assert actual.metadata == expected.metadata, path
+                assert actual.content == expected.content, path
+                parse(path)
+
+            generic = files_per_second(paths, generic_load)
+            fast = files_per_second(
+                paths, lambda p: fast_frontmatter.load(p, flat=flat)
+            )
+            full = files_per_second(paths, parse)
+            print(
+                f"{name:<10}{generic:>12.0f}{fast:>12.0f}{fast / generic:>9.1f}x"
+                f"{full:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
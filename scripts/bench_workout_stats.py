@@ -0,0 +1,166 @@
+"""Benchmark the columnar workout set store against naive iteration.
+
+Generates synthetic workouts, checks that the NumPy and pure-Python paths of
+app.workout_sets return the same weekly tonnage, sets per group and PRs as a
+plain loop over the Workout dataclasses, then reports the time of each and
+the memory the columns take.
+
+usage: uv run python scripts/bench_workout_stats.py [workouts]
+"""
+
+import random
+import sys
+import time as time_mod
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import date, time, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import workout_sets  # noqa: E402
+from app.models import Exercise, ExerciseGroup, Workout, WorkoutSet  # noqa: E402
+from app.progression import estimated_1rm, exercise_key  # noqa: E402
+
+GROUPS: dict[str, list[str]] = {
+    "push": ["Bench Press", "Overhead Press", "Dips"],
+    "pull": ["Deadlift", "Barbell Row", "Pull Up"],
+    "legs": ["Squat", "Lunge", "Leg Press"],
+}
+
+
+def make_workouts(n: int) -> list[Workout]:
+    """Return n random workouts, one or two a day, with a few bodyweight sets."""
+    rng = random.Random(19)
+    day = date(2000, 1, 1)
+    workouts: list[Workout] = []
+    for i in range(n):
+        names = rng.sample(list(GROUPS), 2)
+        workouts.append(
+            Workout(
+                date=day + timedelta(days=i * 2 // 3),
+                time=time(7 + i % 2 * 10, 0),
+                groups=[
+                    ExerciseGroup(
+                        name=name,
+                        rest_seconds=90,
+                        exercises=[
+                            Exercise(
+                                name=exercise,
+                                sets=[
+                                    WorkoutSet(
+                                        reps=rng.randint(1, 12),
+                                        weight=None
+                                        if rng.random() < 0.1
+                                        else rng.randint(20, 200) / 2,
+                                    )
+                                    for _ in range(rng.randint(2, 5))
+                                ],
+                            )
+                            for exercise in GROUPS[name]
+                        ],
+                    )
+                    for name in names
+                ],
+                content="",
+            )
+        )
+    return workouts
+
+
+def naive_stats(workouts: list[Workout], start: date, end: date) -> dict:
+    """Compute the stats by walking the Workout dataclasses directly."""
+    tonnage: dict[date, float] = defaultdict(float)
+    groups: dict[str, int] = defaultdict(int)
+    record: dict[str, float] = {}
+    prs: list[dict] = []
+    for workout in sorted(workouts, key=lambda w: w.date):
+        in_range: bool = start <= workout.date <= end
+        if workout.date > end:
+            break
+        week = workout.date - timedelta(days=workout.date.toordinal() % 7)
+        best: dict[str, tuple[float, WorkoutSet]] = {}
+        for group in workout.groups:
+            for exercise in group.exercises:
+                key = exercise_key(exercise.name)
+                for s in exercise.sets:
+                    if in_range:
+                        groups[group.name] += 1
+                    if s.weight is None:
+                        continue
+                    if in_range:
+                        tonnage[week] += (s.reps or 0) * s.weight
+                    if s.reps:
+                        e1rm = estimated_1rm(s.reps, s.weight)
+                        if key not in best or e1rm > best[key][0]:
+                            best[key] = (e1rm, s)
+        for key, (e1rm, s) in best.items():
+            if key in record and e1rm > record[key] and in_range:
+                prs.append(
+                    {
+                        "exercise": key,
+                        "date": workout.date.isoformat(),
+                        "weight": s.weight,
+                        "reps": s.reps,
+                        "e1rm": round(e1rm, 3),
+                    }
+                )
+            record[key] = max(record.get(key, e1rm), e1rm)
+    prs.sort(key=lambda r: (r["date"], r["exercise"]))
+    return {
+        "weekly_tonnage": sorted((w, round(t, 3)) for w, t in tonnage.items()),
+        "sets_per_group": dict(sorted(groups.items())),
+        "personal_records": prs,
+    }
+
+
+def indexed_stats(store: workout_sets.WorkoutSetStore, start: date, end: date) -> dict:
+    """Compute the stats from the columnar store."""
+    return {
+        "weekly_tonnage": store.weekly_tonnage(start, end),
+        "sets_per_group": dict(sorted(store.sets_per_group(start, end).items())),
+        "personal_records": store.personal_records(start, end),
+    }
+
+
+def timed(run: Callable[[], object], repeat: int = 3) -> float:
+    """Return the best wall time of a few runs, in milliseconds."""
+    best: float = float("inf")
+    for _ in range(repeat):
+        start = time_mod.perf_counter()
+        run()
+        best = min(best, time_mod.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    n: int = int(sys.argv[1]) if len(sys.argv) > 1 else 12000
+    workouts = make_workouts(n)
+    start, end = date(2001, 1, 1), workouts[-1].date
+
+    tracemalloc.start()
+    store = workout_sets.WorkoutSetStore()
+    store.update([], workouts)
+    columns, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{n} workouts, {len(store)} sets, columns {columns / 1024:.0f} KiB")
+
+    expected = naive_stats(workouts, start, end)
+    naive = timed(lambda: naive_stats(workouts, start, end))
+    print(f"{'naive':<10}{naive:>10.1f} ms")
+
+    numpy = workout_sets.np
+    for label, module in (("numpy", numpy), ("python", None)):
+        if label == "numpy" and numpy is None:
+            print(f"{'numpy':<10}{'not installed':>13}")
+            continue
+        workout_sets.np = module
+        assert indexed_stats(store, start, end) == expected, label
+        elapsed = timed(lambda: indexed_stats(store, start, end))
+        print(f"{label:<10}{elapsed:>10.1f} ms{naive / elapsed:>8.1f}x")
+    workout_sets.np = numpy
+
+
+if __name__ == "__main__":
+    main()
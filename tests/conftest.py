@@ -0,0 +1,54 @@
+"""Shared fixtures: the app served over a temporary content directory."""
+
+import json
+import re
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+CONFIG: Path = Path(__file__).parent.parent / "config.toml"
+
+
+@pytest.fixture
+def make_client(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[Callable[..., TestClient]]:
+    """Return a factory starting the app in tmp_path with config.toml overrides.
+
+    The content directories in config.toml are relative, so every store
+    starts empty under tmp_path/contents. The app is a single object, so
+    starting another client first shuts the previous one down, as a restart
+    over the same contents.
+    """
+    monkeypatch.chdir(tmp_path)
+    clients: list[TestClient] = []
+
+    def make(**options: Any) -> TestClient:
+        while clients:
+            clients.pop().__exit__(None, None, None)
+        config: str = CONFIG.read_text()
+        for key, value in options.items():
+            line: str = f"{key} = {json.dumps(value)}"
+            config, replaced = re.subn(rf"(?m)^{key}\s*=.*$", line, config)
+            if not replaced:
+                config += f"\n{line}\n"
+        (tmp_path / "config.toml").write_text(config)
+        client = TestClient(app)
+        client.__enter__()
+        clients.append(client)
+        return client
+
+    yield make
+    while clients:
+        clients.pop().__exit__(None, None, None)
+
+
+@pytest.fixture
+def client(make_client: Callable[..., TestClient]) -> TestClient:
+    """Return a client of the app with the default configuration."""
+    return make_client()
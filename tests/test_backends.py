@@ -0,0 +1,232 @@
+"""Behavior tests checking that the memory and SQLite query backends agree."""
+
+import asyncio
+import random
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.backends import MemoryBackend, QueryBackend, QuerySpec, SqliteBackend
+from app.indexes import IdIndex
+from app.pagination import KEY_MAX
+from app.store import StoreIndex
+
+BACKENDS: dict[str, type] = {"memory": MemoryBackend, "sqlite": SqliteBackend}
+
+SPEC: QuerySpec = QuerySpec(
+    key=lambda item: (item.status, item.id),
+    facets={"status": lambda item: item.status, "type": lambda item: item.type},
+    date_of=lambda item: item.day,
+)
+
+QUERIES: list[dict] = [
+    {},
+    {"limit": 7},
+    {"limit": 7, "descending": True},
+    {"lo": ("b",), "hi": ("b", KEY_MAX), "limit": 13},
+    {"lo": ("b",), "limit": 9, "descending": True},
+    {"where": {"status": "a", "type": "y"}, "limit": 5},
+    {"where": {"type": "z"}},
+]
+
+
+@dataclass(eq=False)
+class Item:
+    id: str
+    status: str
+    type: str
+    day: date
+
+
+def make_items(count: int, rng: random.Random) -> list[Item]:
+    """Return items with non-ASCII IDs and shared statuses, types and days."""
+    return [
+        Item(
+            id=f"i{n:04d}-é{rng.randint(0, 9)}",
+            status=rng.choice("abc"),
+            type=rng.choice("xyz"),
+            day=date(2024, 1, 1) + timedelta(days=rng.randint(0, 90)),
+        )
+        for n in range(count)
+    ]
+
+
+@dataclass
+class Backends:
+    memory: MemoryBackend
+    sqlite: SqliteBackend
+    feeds: list[StoreIndex]
+
+    def update(self, removed: list[Item], added: list[Item]) -> None:
+        """Publish a store delta to the ID index and both backends."""
+        for feed in self.feeds:
+            feed.update(removed, added)
+
+
+@pytest.fixture
+def start(tmp_path: Path) -> Iterator[Callable[..., Backends]]:
+    """Return a factory of both backends over one index file, as on a restart."""
+    opened: list[SqliteBackend] = []
+
+    def make(items: list[Item], spec: QuerySpec = SPEC) -> Backends:
+        while opened:
+            opened.pop().close()
+        ids: dict[str, IdIndex] = {"item": IdIndex()}
+        memory = MemoryBackend()
+        sqlite = SqliteBackend(tmp_path / "index.sqlite", ids)
+        opened.append(sqlite)
+        backends = Backends(
+            memory,
+            sqlite,
+            [
+                ids["item"],
+                *memory.add_collection("item", spec),
+                *sqlite.add_collection("item", spec),
+            ],
+        )
+        if items:
+            backends.update([], items)
+        sqlite.loaded()
+        return backends
+
+    yield make
+    while opened:
+        opened.pop().close()
+
+
+async def walk(backend: QueryBackend, **query) -> list[str]:
+    """Follow the cursors of a query to its end and return every ID in order."""
+    ids: list[str] = []
+    cursor: str | None = None
+    while True:
+        page, cursor = await backend.page("item", cursor=cursor, **query)
+        ids += [item.id for item in page]
+        if cursor is None:
+            return ids
+
+
+async def answers(backend: QueryBackend) -> dict:
+    """Return a backend's answers to the pages, months and facets queried."""
+    return {
+        "pages": [await walk(backend, **query) for query in QUERIES],
+        "months": [await backend.month_dates("item", 2024, m) for m in range(1, 5)],
+        "facets": [await backend.facet_counts("item", f) for f in ("status", "type")],
+    }
+
+
+def assert_agree(backends: Backends) -> None:
+    memory: dict = asyncio.run(answers(backends.memory))
+    assert asyncio.run(answers(backends.sqlite)) == memory
+    assert memory["pages"][0] and memory["months"][0]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_backends_agree_after_changes(
+    start: Callable[..., Backends], seed: int
+) -> None:
+    rng = random.Random(seed)
+    items: list[Item] = make_items(400, rng)
+    backends: Backends = start(items)
+
+    replaced: list[Item] = rng.sample(items, 60)
+    backends.update(
+        replaced, [Item(i.id, "c", "x", i.day + timedelta(days=40)) for i in replaced]
+    )
+    kept: list[Item] = [i for i in items if i not in replaced]
+    backends.update(kept[:30], make_items(450, rng)[400:])
+    assert_agree(backends)
+
+
+def test_backends_agree_after_a_restart(start: Callable[..., Backends]) -> None:
+    items: list[Item] = make_items(300, random.Random(7))
+    start(items)
+
+    unchanged: Backends = start(items)
+    asyncio.run(unchanged.sqlite.page("item", limit=1))
+    assert unchanged.sqlite._db.total_changes == 0
+    assert_agree(unchanged)
+
+    edited: list[Item] = [Item(i.id, "a", i.type, i.day) for i in items[:10]]
+    assert_agree(start(edited + items[10:290]))
+
+    # a changed facet set recreates the table
+    types = QuerySpec(key=SPEC.key, facets={"type": SPEC.facets["type"]})
+    assert len(asyncio.run(walk(start(items, types).sqlite))) == len(items)
+
+    empty: Backends = start([])
+    assert asyncio.run(walk(empty.sqlite)) == []
+    assert asyncio.run(empty.sqlite.facet_counts("item", "type")) == {}
+
+
+def walk_route(client: TestClient, url: str, **params) -> list[dict]:
+    """Follow a list route's X-Next-Cursor headers and return every item."""
+    items: list[dict] = []
+    while True:
+        response = client.get(url, params=params)
+        items += response.json()
+        if "x-next-cursor" not in response.headers:
+            return items
+        params["cursor"] = response.headers["x-next-cursor"]
+
+
+def test_routes_agree_across_backends(make_client: Callable[..., TestClient]) -> None:
+    rng = random.Random(25)
+    days: list[date] = [
+        date(2024, 1, 1) + timedelta(days=rng.randint(0, 70)) for _ in range(20)
+    ]
+    media: list[dict] = [
+        {
+            "name": f"Show {n}",
+            "country": rng.choice(["korea", "japan"]),
+            "type": rng.choice(["drama", "movie"]),
+            "status": rng.choice(["watched", "queued"]),
+            "rating": "8",
+        }
+        for n in range(20)
+    ]
+
+    responses: list[list] = []
+    for backend in ("memory", "sqlite"):
+        client = make_client(index_backend=backend, write_wait=True)
+        assert isinstance(client.app.state.query, BACKENDS[backend])
+        if backend == "memory":
+            for item in media:
+                client.post("/api/media", json=item)
+            for n, day in enumerate(days):
+                client.post(
+                    "/api/workout",
+                    json={
+                        "date": day.isoformat(),
+                        "time": f"{7 + n % 3:02d}:00:00",
+                        "groups": [],
+                        "content": "",
+                    },
+                )
+        responses.append(
+            [
+                walk_route(client, "/api/media", status="watched", limit=3),
+                walk_route(
+                    client, "/api/media", status="queued", type="drama", limit=2
+                ),
+                walk_route(client, "/api/workouts", limit=4),
+                walk_route(client, "/api/workouts", start="2024-02-01", limit=3),
+                [
+                    client.get(
+                        "/api/workout-calendar", params={"year": 2024, "month": month}
+                    ).json()
+                    for month in (1, 2, 3)
+                ],
+                client.get(
+                    "/api/workout-calendar/range",
+                    params={"start": "2023-12", "end": "2024-04"},
+                ).json(),
+            ]
+        )
+
+    memory, sqlite = responses
+    assert sqlite == memory
+    assert all(memory[:4]) and memory[4][0]["workout_dates"]
@@ -0,0 +1,91 @@
+"""Behavior tests for the all-or-nothing batch mutation endpoint."""
+
+from fastapi.testclient import TestClient
+
+HABIT: dict = {"name": "Run", "days": [1], "color": "#fff"}
+
+
+def batch(client: TestClient, *operations: dict):
+    return client.post("/api/batch", json={"operations": list(operations)})
+
+
+def test_valid_batch_applies_every_operation_in_order(client: TestClient) -> None:
+    response = batch(
+        client,
+        {"op": "create", "collection": "habit", "data": HABIT},
+        {"op": "create", "collection": "preset", "data": {"name": "Yoga"}},
+        {
+            "op": "create",
+            "collection": "activity",
+            "data": {"name": "Yoga", "date": "2024-01-02"},
+        },
+        {"op": "create", "collection": "task", "data": {"title": "Stretch"}},
+        {
+            "op": "update",
+            "collection": "habit",
+            "id": "run",
+            "data": {**HABIT, "days": [2]},
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    results: list[dict] = response.json()["results"]
+    assert [r.get("name", r.get("title")) for r in results] == [
+        "Run",
+        "Yoga",
+        "Yoga",
+        "Stretch",
+        "Run",
+    ]
+    assert client.get("/api/habit/run").json()["days"] == [2]
+    assert [p["name"] for p in client.get("/api/presets").json()] == ["Yoga"]
+    assert [t["title"] for t in client.get("/api/tasks").json()] == ["Stretch"]
+
+
+def test_invalid_batch_applies_nothing_and_lists_every_error(
+    client: TestClient,
+) -> None:
+    response = batch(
+        client,
+        {"op": "create", "collection": "habit", "data": HABIT},
+        {"op": "create", "collection": "habit", "data": {"name": "No days"}},
+        {"op": "delete", "collection": "preset", "id": "missing"},
+        {"op": "delete", "collection": "preset"},
+        {"op": "create", "collection": "habit", "data": HABIT},
+    )
+
+    assert response.status_code == 422
+    errors: list[dict] = response.json()["detail"]
+    assert [(e["index"], e["status"]) for e in errors] == [
+        (1, 422),
+        (2, 404),
+        (3, 422),
+        (4, 409),
+    ]
+    assert client.get("/api/habit/run").status_code == 404
+
+
+def test_operations_see_the_batch_s_earlier_changes(client: TestClient) -> None:
+    response = batch(
+        client,
+        {"op": "create", "collection": "preset", "data": {"name": "Yoga"}},
+        {"op": "delete", "collection": "preset", "id": "yoga"},
+        {"op": "create", "collection": "preset", "data": {"name": "Yoga"}},
+    )
+
+    assert response.status_code == 200, response.text
+    assert [p["name"] for p in client.get("/api/presets").json()] == ["Yoga"]
+
+
+def test_if_match_is_checked_per_operation(client: TestClient) -> None:
+    client.post("/api/habit", json=HABIT)
+    etag: str = client.get("/api/habit/run").headers["etag"]
+    update: dict = {"op": "update", "collection": "habit", "id": "run"}
+
+    stale = batch(client, {**update, "data": {**HABIT, "days": [2]}, "if_match": '"x"'})
+    assert stale.status_code == 422
+    assert stale.json()["detail"][0]["status"] == 412
+
+    fresh = batch(client, {**update, "data": {**HABIT, "days": [2]}, "if_match": etag})
+    assert fresh.status_code == 200
+    assert client.get("/api/habit/run").json()["days"] == [2]
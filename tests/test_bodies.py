@@ -0,0 +1,55 @@
+"""Behavior tests for lazily read bodies in list views."""
+
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import bodies
+from app.bodies import BodyRef
+
+FILES: dict[str, str] = {
+    "media/show.md": "---\nname: Show\ncountry: korea\ntype: drama\n"
+    "status: watched\n---\na fine review\n",
+    "workout/20240102-070000.md": "---\ndate: 2024-01-02\ntime: '07:00:00'\n"
+    "groups: []\n---\nok\n",
+    "tasks/20240101-000000-plan.md": "---\ntitle: Plan\nstatus: open\n"
+    "created_at: '2024-01-01T00:00:00'\n---\nparent notes\n",
+    "tasks/20240101-000000-step.md": "---\ntitle: Step\nstatus: open\n"
+    "parent: 20240101-000000-plan\ncreated_at: '2024-01-01T00:00:00'\n"
+    "---\nchild notes\n",
+}
+
+
+def test_list_views_read_lazy_bodies_off_the_loop(
+    make_client: Callable[..., TestClient],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    contents: Path = tmp_path / "contents"
+    for name, text in FILES.items():
+        (contents / name).parent.mkdir(parents=True, exist_ok=True)
+        (contents / name).write_text(text)
+    client = make_client(lazy_bodies=True)
+    reads: list[str] = []
+    read = bodies.text
+
+    def spy(body: str | BodyRef) -> str:
+        if isinstance(body, BodyRef):
+            reads.append(threading.current_thread().name)
+        return read(body)
+
+    monkeypatch.setattr(bodies, "text", spy)
+
+    media: list[dict] = client.get("/api/media", params={"status": "watched"}).json()
+    workouts: list[dict] = client.get("/api/workouts").json()
+    tasks: list[dict] = client.get("/api/tasks").json()
+
+    assert [m["review"] for m in media] == ["a fine review"]
+    assert [w["content"] for w in workouts] == ["ok"]
+    assert tasks[0]["notes"] == "parent notes"
+    assert tasks[0]["subtasks"][0]["notes"] == "child notes"
+    assert len(reads) == 4
+    assert all(name.startswith("shelf-reload") for name in reads), reads
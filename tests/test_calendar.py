@@ -0,0 +1,75 @@
+"""Behavior tests for the month index and the workout calendar routes."""
+
+from dataclasses import dataclass
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.indexes import MonthIndex
+
+
+@dataclass(eq=False)
+class Item:
+    day: date
+
+
+def workout(day: str, at: str = "07:00:00") -> dict:
+    return {"date": day, "time": at, "groups": [], "content": ""}
+
+
+def test_month_index_follows_item_deltas() -> None:
+    index: MonthIndex[Item] = MonthIndex(date_of=lambda item: item.day)
+    first, second, other = (
+        Item(date(2024, 2, 9)),
+        Item(date(2024, 2, 9)),
+        Item(date(2024, 2, 1)),
+    )
+    index.update([], [first, second, other, Item(date(2024, 3, 1))])
+
+    assert index.dates_in(2024, 2) == [date(2024, 2, 1), date(2024, 2, 9)]
+    index.update([first], [])
+    assert index.dates_in(2024, 2) == [date(2024, 2, 1), date(2024, 2, 9)]
+    index.update([second, other], [])
+    assert index.dates_in(2024, 2) == []
+    assert list(index.months) == [(2024, 3)]
+
+
+def test_calendar_month(client: TestClient) -> None:
+    for day, at in (("2024-02-29", "07:00:00"), ("2024-02-29", "18:00:00")):
+        client.post("/api/workout", json=workout(day, at))
+    client.post("/api/workout", json=workout("2024-02-03"))
+    client.post("/api/workout", json=workout("2024-03-01"))
+
+    month: dict = client.get(
+        "/api/workout-calendar", params={"year": 2024, "month": 2}
+    ).json()
+
+    assert month["workout_dates"] == ["2024-02-03", "2024-02-29"]
+    assert (month["days_in_month"], month["first_weekday"]) == (29, 4)
+    assert (month["prev_month"], month["next_month"]) == (1, 3)
+    assert client.get("/api/workout-calendar", params={"month": 13}).status_code == 422
+
+
+def test_calendar_range_crosses_years(client: TestClient) -> None:
+    client.post("/api/workout", json=workout("2025-01-02"))
+
+    months: list[dict] = client.get(
+        "/api/workout-calendar/range", params={"start": "2024-11", "end": "2025-02"}
+    ).json()
+
+    assert [(m["year"], m["month"]) for m in months] == [
+        (2024, 11),
+        (2024, 12),
+        (2025, 1),
+        (2025, 2),
+    ]
+    assert [m["workout_dates"] for m in months] == [[], [], ["2025-01-02"], []]
+    for start, end in (
+        ("2024-13", "2025-01"),
+        ("2025-02", "2025-01"),
+        ("2020-01", "2025-01"),
+    ):
+        response = client.get(
+            "/api/workout-calendar/range", params={"start": start, "end": end}
+        )
+        assert response.status_code == 422, (start, end)
@@ -0,0 +1,72 @@
+"""Behavior tests for habit completion sets and hand-edited completion lists."""
+
+import logging
+from collections.abc import Callable
+from datetime import date
+from pathlib import Path
+
+import frontmatter
+import pytest
+from fastapi.testclient import TestClient
+
+from app.completions import CompletionSet
+
+
+def test_toggle_keeps_the_dates_sorted() -> None:
+    completions = CompletionSet.from_iso(["2024-01-03", date(2024, 1, 1)])
+
+    assert completions.toggle("2024-01-02") is True
+    assert completions.toggle(date(2024, 1, 3)) is False
+    assert completions.isoformats() == ["2024-01-01", "2024-01-02"]
+    assert "2024-01-02" in completions and "2024-01-03" not in completions
+
+
+def test_window_is_inclusive() -> None:
+    completions = CompletionSet.from_iso(f"2024-01-{d:02d}" for d in range(1, 10))
+
+    assert completions.isoformats(date(2024, 1, 3), date(2024, 1, 5)) == [
+        "2024-01-03",
+        "2024-01-04",
+        "2024-01-05",
+    ]
+    assert len(completions.ordinals(start=date(2024, 1, 8))) == 2
+
+
+def test_unparsable_values_are_kept() -> None:
+    completions = CompletionSet.from_iso(["2024-01-02", "2024-13-01", "2024-01-01"])
+    copied = completions.copy()
+    copied.toggle("2024-01-05")
+
+    assert completions.unparsed == ("2024-13-01",)
+    assert "2024-13-01" not in completions
+    assert copied.values() == ["2024-01-01", "2024-01-02", "2024-01-05", "2024-13-01"]
+    assert completions != CompletionSet.from_iso(["2024-01-02", "2024-01-01"])
+
+
+def test_toggle_keeps_hand_edited_values(
+    make_client: Callable[..., TestClient],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    path: Path = tmp_path / "contents" / "habits" / "run.md"
+    path.parent.mkdir(parents=True)
+    post = frontmatter.Post(content="")
+    post["name"] = "Run"
+    post["days"] = [1]
+    post["color"] = "#fff"
+    post["completions"] = ["2024-01-02", "2024-02-30", "2024-01-02"]
+    path.write_text(frontmatter.dumps(post))
+
+    with caplog.at_level(logging.WARNING, logger="uvicorn.error"):
+        client = make_client(write_wait=True)
+    assert "2024-02-30" in caplog.text
+    assert "duplicate" in caplog.text
+
+    response = client.post("/api/habit/run/toggle/2024-01-01")
+
+    assert response.json()["completions"] == ["2024-01-01", "2024-01-02", "2024-02-30"]
+    assert frontmatter.load(path)["completions"] == [
+        "2024-01-01",
+        "2024-01-02",
+        "2024-02-30",
+    ]
@@ -0,0 +1,148 @@
+"""Differential tests: fast_frontmatter must parse exactly like python-frontmatter."""
+
+import random
+
+import frontmatter
+import pytest
+
+from app import fast_frontmatter
+
+# values that look flat but need YAML's rules: quoting, escapes, nulls,
+# colons, comments, implicit types, indicators and trailing whitespace
+VALUES: list[str] = [
+    "Show 1",
+    "don't",
+    "a/b+c&d!",
+    "é ü",
+    "'it''s'",
+    "'a'b'",
+    "''",
+    "'",
+    '"quoted"',
+    '"a\\"b"',
+    '"a\\nb"',
+    "~",
+    "null",
+    "Null",
+    "NULL",
+    "",
+    "a: b",
+    "x:",
+    ": x",
+    "http://example.com/a",
+    "foo # comment",
+    "foo#bar",
+    "'a' # comment",
+    "4",
+    "4.5",
+    ".5",
+    ".inf",
+    "0x1A",
+    "0o7",
+    "1_000",
+    "1e3",
+    "+1",
+    "1.",
+    "-foo",
+    "- x",
+    "x -",
+    "yes",
+    "no",
+    "on",
+    "off",
+    "True",
+    "y",
+    "2024-01-01",
+    "10:00",
+    "[a]",
+    "{a: 1}",
+    "*ref",
+    "&anchor x",
+    "!tag x",
+    "%x",
+    "@x",
+    "`x`",
+    "|",
+    ">",
+    "a  b",
+    "a\tb",
+    "foo ",
+    "(x)",
+    "(",
+    "x?",
+    "?x",
+    "a,b",
+    "x.",
+    ".",
+    "=",
+    "<<",
+    "-",
+    "---",
+    "...",
+    "~x",
+]
+
+DOCUMENTS: list[str] = [
+    *(f"---\nname: {value}\n---\nbody" for value in VALUES),
+    *(f"---\nname: {value}\nstatus: queued\n---\n\nbody\n" for value in VALUES),
+    "no frontmatter",
+    "---\n---\nbody",
+    "---\nname: x\n---\n",
+    "\n\n---\nname: x\n---\nbody",
+    "---\nname: x\n---\nbody\n---\nmore",
+    "---\nname: x\ntags:\n  - a\n---\nbody",
+    "---\nname: |\n  a\n---\nbody",
+    "---\nname: 'multi\n  line'\n---\nbody",
+    "---\nname: a\n  b\n---\nbody",
+    "---\nname: x\nname: y\n---\nbody",
+    "---\ndo-date: x\n---\nbody",
+    "---\nname:x\n---\nbody",
+    "---\nname:  x\n---\nbody",
+    "---\n name: x\n---\nbody",
+    "---\nname: x\n# comment\n---\nbody",
+    "---\nname: x\n\n---\nbody",
+    "----\nname: x\n----\nbody",
+    "--- \nname: x\n---\nbody",
+    "---\r\nname: x\r\n---\r\nbody",
+    "﻿---\nname: x\n---\nbody",
+    "---\n- a\n---\nbody",
+    "---\nfoo\n---\nbody",
+    "---\n{}\n---\nbody",
+]
+
+
+def parsed(load, text: str) -> tuple:
+    """Return the metadata, its value types and content, or the error type."""
+    try:
+        post = load(text)
+    except Exception as e:
+        return ("error", type(e))
+    types = {key: type(value) for key, value in post.metadata.items()}
+    return (post.metadata, types, post.content)
+
+
+@pytest.mark.parametrize("flat", [True, False])
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_matches_frontmatter(text: str, flat: bool) -> None:
+    expected = parsed(frontmatter.loads, text)
+    assert parsed(lambda t: fast_frontmatter.loads(t, flat=flat), text) == expected
+
+
+def test_matches_frontmatter_on_random_values() -> None:
+    rng = random.Random(10)
+    alphabet: str = "ab1 .:'\"#-_~!&*?,()/+%@`|>[]{}\\\té0"
+    for _ in range(5000):
+        value: str = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+        text: str = f"---\nname: {value}\nnext:{rng.choice(['', ' ', ' x'])}\n---\nb"
+        expected = parsed(frontmatter.loads, text)
+        assert parsed(fast_frontmatter.loads, text) == expected, value
+
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_span_locates_content(text: str) -> None:
+    if parsed(frontmatter.loads, text)[0] == "error":
+        pytest.skip("not valid frontmatter")
+    post, span = fast_frontmatter.loads_with_span(text)
+    if span is not None:
+        start, end = span
+        assert text[start:end] == post.content
@@ -0,0 +1,126 @@
+"""Behavior tests for incrementally cached habit streaks and completion rates."""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.completions import CompletionSet
+from app.habit_stats import RATE_WINDOWS, HabitStatsCache
+from app.models import Habit, HabitShift
+
+START: date = date(2024, 1, 1)
+
+
+def make_habit(seed: int) -> Habit:
+    rng = random.Random(seed)
+    days: list[date] = [START + timedelta(days=n) for n in range(120)]
+    shifts: list[HabitShift] = [
+        HabitShift(
+            from_date=day.isoformat(),
+            to_date=rng.choice([None, (day + timedelta(days=1)).isoformat()]),
+        )
+        for day in rng.sample(days, 6)
+    ]
+    return Habit(
+        name=f"Habit {seed}",
+        days=sorted(rng.sample(range(7), rng.randint(1, 7))),
+        color="#fff",
+        completions=CompletionSet.from_iso(day for day in days if rng.random() < 0.7),
+        shifts=shifts,
+    )
+
+
+def is_due(habit: Habit, day: date) -> bool:
+    iso: str = day.isoformat()
+    if any(s.to_date == iso for s in habit.shifts):
+        return True
+    if any(s.from_date == iso for s in habit.shifts):
+        return False
+    return (day.weekday() + 1) % 7 in habit.days
+
+
+def expected(habit: Habit, today: date) -> dict:
+    """Recompute the stats from scratch, one day at a time."""
+    done_today: bool = is_due(habit, today) and today in habit.completions
+    run = longest = 0
+    day: date = min(next(iter(habit.completions), today), today)
+    while day < today:
+        if is_due(habit, day):
+            run = run + 1 if day in habit.completions else 0
+            longest = max(longest, run)
+        day += timedelta(days=1)
+
+    rates: dict[str, float | None] = {}
+    for name, window in RATE_WINDOWS.items():
+        due = hits = int(done_today)
+        for n in range(1, window):
+            day = today - timedelta(days=n)
+            if is_due(habit, day):
+                due += 1
+                hits += day in habit.completions
+        rates[f"{name}_rate"] = round(hits / due, 4) if due else None
+
+    current: int = run + done_today
+    return {
+        "current_streak": current,
+        "longest_streak": max(longest, current),
+        **rates,
+        "as_of": today.isoformat(),
+    }
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_stats_match_a_full_recomputation(seed: int) -> None:
+    habit = make_habit(seed)
+    cache = HabitStatsCache()
+
+    # moving forward a day at a time folds only the new days in
+    for offset in range(0, 140, 3):
+        today: date = START + timedelta(days=offset)
+        assert cache.get(habit, today).to_dict() == expected(habit, today), today
+
+    earlier: date = START + timedelta(days=40)
+    assert cache.get(habit, earlier).to_dict() == expected(habit, earlier)
+
+
+def test_a_changed_habit_is_recomputed() -> None:
+    habit = make_habit(1)
+    cache = HabitStatsCache()
+    today: date = START + timedelta(days=100)
+    cache.get(habit, today)
+
+    completions: CompletionSet = habit.completions.copy()
+    for n in range(1, 30):
+        day: date = today - timedelta(days=n)
+        if (day in completions) != (n % 2 == 0):
+            completions.toggle(day)
+    changed = Habit(habit.name, habit.days, habit.color, completions, habit.shifts)
+
+    assert cache.get(changed, today).to_dict() == expected(changed, today)
+    cache.prune(set())
+    assert len(cache) == 0
+
+
+def test_stats_routes(client: TestClient) -> None:
+    habit: dict = {
+        "name": "Run",
+        "days": [0, 1, 2, 3, 4, 5, 6],
+        "color": "#fff",
+        "completions": ["2024-01-01", "2024-01-02", "2024-01-04", "2024-01-05"],
+    }
+    client.post("/api/habit", json=habit)
+
+    stats: dict = client.get(
+        "/api/habit/run/stats", params={"today": "2024-01-05"}
+    ).json()
+    assert (stats["current_streak"], stats["longest_streak"]) == (2, 2)
+    # the window also counts the due days before the first completion
+    assert stats["weekly_rate"] == round(4 / 7, 4)
+
+    listed = client.get("/api/habit-stats", params={"today": "2024-01-06"})
+    assert [(s["id"], s["current_streak"]) for s in listed.json()] == [("run", 2)]
+    later = client.get("/api/habit-stats", params={"today": "2024-01-08"})
+    assert later.headers["etag"] != listed.headers["etag"]
+    assert later.json()[0]["current_streak"] == 0
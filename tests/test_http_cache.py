@@ -0,0 +1,111 @@
+"""Behavior tests for collection ETags, conditional GETs and the response cache."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.http_cache import CachedBody, ResponseCache
+from app.routes import media
+
+MEDIA: dict = {
+    "name": "Foo Bar",
+    "country": "korea",
+    "type": "drama",
+    "status": "watched",
+    "rating": "8",
+    "review": "a show about dragons",
+}
+
+
+def test_matching_if_none_match_is_a_304(client: TestClient) -> None:
+    first = client.get("/api/media", params={"status": "watched"})
+    etag: str = first.headers["etag"]
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        again = client.get(
+            "/api/media",
+            params={"status": "watched"},
+            headers={"If-None-Match": header},
+        )
+        assert again.status_code == 304, header
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+
+    other = client.get(
+        "/api/media", params={"status": "watched"}, headers={"If-None-Match": '"x"'}
+    )
+    assert other.status_code == 200
+
+
+def test_writes_change_the_collection_etag(client: TestClient) -> None:
+    before = client.get("/api/media", params={"status": "watched"})
+    assert client.post("/api/media", json=MEDIA).status_code == 200
+
+    after = client.get(
+        "/api/media",
+        params={"status": "watched"},
+        headers={"If-None-Match": before.headers["etag"]},
+    )
+
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert [m["name"] for m in after.json()] == ["Foo Bar"]
+
+
+def test_etags_are_per_collection(client: TestClient) -> None:
+    media = client.get("/api/media", params={"status": "watched"}).headers["etag"]
+    habit = {"name": "Run", "days": [1], "color": "#fff"}
+    assert client.post("/api/habit", json=habit).status_code == 200
+
+    assert (
+        client.get("/api/media", params={"status": "watched"}).headers["etag"] == media
+    )
+
+
+def test_entity_etag_follows_the_item(client: TestClient) -> None:
+    created = client.post("/api/media", json=MEDIA)
+    fetched = client.get("/api/media/foo-bar")
+    assert fetched.headers["etag"] == created.headers["etag"]
+
+    edited = client.put("/api/media/foo-bar", json={**MEDIA, "rating": "9"})
+    assert edited.headers["etag"] != created.headers["etag"]
+    assert client.get("/api/media/foo-bar").headers["etag"] == edited.headers["etag"]
+
+
+def test_unchanged_views_are_served_from_the_cache(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client.post("/api/media", json=MEDIA)
+    built: list[str] = []
+    encode = media.parse_media_to_dict
+
+    def counting(item: media.Media, *args) -> dict:
+        built.append(item.id)
+        return encode(item, *args)
+
+    monkeypatch.setattr(media, "parse_media_to_dict", counting)
+    first = client.get("/api/media", params={"status": "watched", "limit": 5})
+    second = client.get("/api/media", params={"limit": 5, "status": "watched"})
+
+    assert built == ["foo-bar"]
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+
+    client.put("/api/media/foo-bar", json={**MEDIA, "rating": "9"})
+    built.clear()
+    third = client.get("/api/media", params={"status": "watched", "limit": 5})
+    assert built == ["foo-bar"]
+    assert third.json()[0]["rating"] == "9"
+
+
+def test_response_cache_evicts_least_recently_used() -> None:
+    cache = ResponseCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, CachedBody(etag=f'"{key}"', body=b"[]", headers={}))
+    assert cache.get("a", '"a"') is not None
+    cache.put("c", CachedBody(etag='"c"', body=b"[]", headers={}))
+
+    assert len(cache) == 2
+    assert cache.get("b", '"b"') is None
+    assert cache.get("a", '"a"') is not None
+    # an entry built for an older ETag is never served
+    assert cache.get("c", '"c2"') is None
@@ -0,0 +1,94 @@
+"""Behavior tests for entity locks and If-Match preconditions."""
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.http_cache import etag_matches
+from app.locks import EntityLocks
+from app.routes.tasks import _hold_subtree
+
+HABIT: dict = {"name": "Run", "days": [1], "color": "#fff"}
+
+
+def test_locks_serialize_one_entity_and_are_dropped() -> None:
+    locks = EntityLocks()
+    order: list[str] = []
+
+    async def mutate(name: str, *keys: str) -> None:
+        async with locks.hold(*keys):
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    async def run() -> None:
+        await asyncio.gather(mutate("a", "x", "y"), mutate("b", "y", "x"))
+
+    asyncio.run(run())
+    assert order == ["a start", "a end", "b start", "b end"]
+    assert len(locks) == 0
+
+
+def test_if_match_uses_the_strong_comparison() -> None:
+    assert etag_matches('"a"', '"a"', strong=True)
+    assert etag_matches('"b", "a"', '"a"', strong=True)
+    assert etag_matches("*", '"a"', strong=True)
+    assert not etag_matches('W/"a"', '"a"', strong=True)
+    assert etag_matches('W/"a"', '"a"')
+
+
+def test_stale_or_weak_if_match_is_a_412(client: TestClient) -> None:
+    client.post("/api/habit", json=HABIT)
+    etag: str = client.get("/api/habit/run").headers["etag"]
+    edited: dict = {**HABIT, "days": [2]}
+
+    for header in ('"stale"', f"W/{etag}"):
+        response = client.put(
+            "/api/habit/run", json=edited, headers={"If-Match": header}
+        )
+        assert response.status_code == 412, header
+    assert client.get("/api/habit/run").json()["days"] == [1]
+
+    response = client.put("/api/habit/run", json=edited, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    deleted = client.delete("/api/habit/run", headers={"If-Match": etag})
+    assert deleted.status_code == 412
+
+
+def test_renaming_onto_an_existing_item_is_a_409(client: TestClient) -> None:
+    client.post("/api/habit", json=HABIT)
+    client.post("/api/habit", json={**HABIT, "name": "Walk"})
+
+    response = client.put("/api/habit/walk", json=HABIT)
+
+    assert response.status_code == 409
+    assert client.get("/api/habit/walk").status_code == 200
+
+
+def test_task_mutations_hold_their_sub_tasks_locks(client: TestClient) -> None:
+    parent: str = client.post("/api/task", json={"title": "Parent"}).json()["id"]
+    child: str = client.post(
+        "/api/task", json={"title": "Child", "parent": parent}
+    ).json()["id"]
+    state = client.app.state
+    request = SimpleNamespace(app=client.app)
+    child_path: Path = state.tasks_dir / f"{child}.md"
+
+    async def run() -> None:
+        entered = asyncio.Event()
+
+        async def hold_parent() -> None:
+            async with _hold_subtree(request, parent):
+                entered.set()
+
+        async with state.entity_locks.hold(child_path):
+            waiting = asyncio.create_task(hold_parent())
+            await asyncio.sleep(0.05)
+            assert not entered.is_set()
+        await asyncio.wait_for(waiting, timeout=5)
+        assert entered.is_set()
+
+    client.portal.call(run)
@@ -0,0 +1,108 @@
+"""Behavior tests for key-sorted pagination and cursors."""
+
+import random
+from dataclasses import dataclass
+
+import pytest
+from fastapi import HTTPException
+
+from app.indexes import SortedIndex, SortKey
+from app.pagination import KEY_MAX, decode_cursor, encode_cursor, paginate
+
+
+@dataclass(eq=False)
+class Item:
+    id: str
+    day: str
+
+
+def key(item: Item) -> SortKey:
+    return (item.day, item.id)
+
+
+def make_items(count: int) -> list[Item]:
+    rng = random.Random(7)
+    items = [
+        Item(f"i{n:03d}", f"2024-01-{rng.randint(1, 9):02d}") for n in range(count)
+    ]
+    return sorted(items, key=key)
+
+
+def walk(items: list[Item], limit: int, **kwargs) -> list[list[str]]:
+    """Follow next-page cursors to the end and return each page's IDs."""
+    pages: list[list[str]] = []
+    cursor: str | None = None
+    while True:
+        page, cursor = paginate(items, key, cursor=cursor, limit=limit, **kwargs)
+        pages.append([item.id for item in page])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 3, 10, 50])
+def test_cursor_pages_cover_every_item_once(limit: int, descending: bool) -> None:
+    items = make_items(37)
+    pages = walk(items, limit, descending=descending)
+
+    expected = [item.id for item in (reversed(items) if descending else items)]
+    assert [item_id for page in pages for item_id in page] == expected
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 1 <= len(pages[-1]) <= limit
+
+
+def test_bounds_are_inclusive() -> None:
+    items = make_items(37)
+    page, cursor = paginate(items, key, lo=("2024-01-03",), hi=("2024-01-05", KEY_MAX))
+
+    assert cursor is None
+    assert [item.id for item in page] == [
+        item.id for item in items if "2024-01-03" <= item.day <= "2024-01-05"
+    ]
+
+
+def test_cursor_survives_removing_the_page_it_came_from() -> None:
+    items = make_items(20)
+    first, cursor = paginate(items, key, limit=5)
+    remaining = [item for item in items if item not in first]
+
+    page, _ = paginate(remaining, key, cursor=cursor, limit=5)
+
+    assert [item.id for item in page] == [item.id for item in items[5:10]]
+
+
+def test_where_filters_before_limiting() -> None:
+    items = make_items(37)
+    odd = [item.id for item in items if int(item.id[1:]) % 2]
+    pages = walk(items, 4, where=lambda item: int(item.id[1:]) % 2 == 1)
+
+    assert [item_id for page in pages for item_id in page] == odd
+
+
+def test_cursor_round_trips() -> None:
+    assert decode_cursor(encode_cursor(("queued", "é-1"))) == ("queued", "é-1")
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "bm90IGpzb24", encode_cursor(("a",))[:-2]])
+def test_invalid_cursor_is_a_400(cursor: str) -> None:
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+@pytest.mark.parametrize("batch", [1, 5, 200])
+def test_sorted_index_stays_sorted(batch: int) -> None:
+    rng = random.Random(batch)
+    index: SortedIndex[Item] = SortedIndex(key=key)
+    live: list[Item] = []
+    for _ in range(6):
+        added = [
+            Item(f"i{rng.randint(0, 999):03d}", f"2024-01-{rng.randint(1, 9):02d}")
+            for _ in range(batch)
+        ]
+        removed = rng.sample(live, min(len(live), batch // 2))
+        index.update(removed, added)
+        live = [item for item in live if item not in removed] + added
+
+        assert [key(i) for i in index.items] == sorted(key(i) for i in live)
+        assert {id(i) for i in index.items} == {id(i) for i in live}
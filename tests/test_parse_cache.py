@@ -0,0 +1,208 @@
+"""Behavior tests for the parse cache, its invalidation and the item codecs."""
+
+import logging
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import store as store_module
+from app.parse_cache import ItemCodec, ParseCache
+from app.records import ITEM_CODECS
+from app.store import FileStore
+
+TEXT_CODEC: ItemCodec[str] = ItemCodec(
+    to_record=lambda text: {"text": text},
+    from_record=lambda record, path: record["text"],
+)
+
+WORKOUT: str = """---
+date: 2024-01-02
+time: '07:30:00'
+groups:
+- name: legs
+  rest_seconds: 90
+  exercises:
+  - name: Squat
+    sets:
+    - reps: 5
+      weight: 100
+    - reps: 5
+    - weight: 20.5
+---
+felt strong
+"""
+
+
+def make_store(
+    directory: Path, cache: ParseCache, codec: ItemCodec[str] = TEXT_CODEC
+) -> tuple[FileStore[str], list[Path]]:
+    """Return a cached store of file texts and the list of paths it parsed."""
+    parsed: list[Path] = []
+
+    def parse(path: Path) -> str:
+        parsed.append(path)
+        return path.read_text()
+
+    store = FileStore(
+        name="note", directory=directory, parse=parse, cache=cache, codec=codec
+    )
+    return store, parsed
+
+
+def write_old(path: Path, text: str) -> None:
+    """Write a file and date it well past the mtime granularity."""
+    path.write_text(text)
+    old: int = time.time_ns() - 60 * 10**9
+    os.utime(path, ns=(old, old))
+
+
+def restart(tmp_path: Path, **kwargs) -> tuple[FileStore[str], list[Path]]:
+    """Return a fresh store over the notes directory and the same cache file."""
+    cache = ParseCache(tmp_path / "cache.sqlite", "fingerprint")
+    return make_store(tmp_path / "notes", cache, **kwargs)
+
+
+@pytest.fixture
+def notes(tmp_path: Path) -> Path:
+    (tmp_path / "notes").mkdir()
+    return tmp_path / "notes"
+
+
+def test_warm_start_loads_unchanged_files(tmp_path: Path, notes: Path) -> None:
+    write_old(notes / "a.md", "a")
+    write_old(notes / "b.md", "b")
+    restart(tmp_path)[0].scan()
+    write_old(notes / "b.md", "bb")
+
+    store, parsed = restart(tmp_path)
+    stats = store.scan()
+
+    assert sorted(store.items) == ["a", "bb"]
+    assert [p.name for p in parsed] == ["b.md"]
+    assert (stats.cached, stats.parsed) == (1, 1)
+
+
+def test_rewrite_keeping_a_recent_stat_is_caught(
+    tmp_path: Path, notes: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path: Path = notes / "a.md"
+    path.write_text("one")
+    st: os.stat_result = path.stat()
+    restart(tmp_path)[0].scan()
+
+    # rewritten in place within the same mtime tick: the stat is unchanged
+    path.write_text("two")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert path.stat().st_mtime_ns == st.st_mtime_ns
+
+    store, parsed = restart(tmp_path)
+    store.scan()
+    assert store.items == ["two"] and len(parsed) == 1
+
+    # an old stat is trusted without reading the file
+    monkeypatch.setattr(store_module, "content_digest", None)
+    write_old(path, "three")
+    restart(tmp_path)[0].scan()
+    store, parsed = restart(tmp_path)
+    store.scan()
+    assert store.items == ["three"] and parsed == []
+
+
+def test_recently_written_files_are_not_cached(tmp_path: Path, notes: Path) -> None:
+    store, _ = restart(tmp_path)
+    store.scan()
+    path: Path = notes / "a.md"
+    path.write_text("written")
+    store.apply({path: "written"})
+    store.save_cache()
+
+    store, parsed = restart(tmp_path)
+    store.scan()
+
+    assert store.items == ["written"] and parsed == [path]
+
+
+def test_codec_failures_are_logged_and_not_cached(
+    tmp_path: Path, notes: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    def to_record(text: str) -> dict:
+        raise ValueError("cannot encode")
+
+    write_old(notes / "a.md", "a")
+    codec: ItemCodec[str] = ItemCodec(to_record, TEXT_CODEC.from_record)
+    with caplog.at_level(logging.ERROR, logger="uvicorn.error"):
+        restart(tmp_path, codec=codec)[0].scan()
+    assert "Not caching" in caplog.text and "cannot encode" in caplog.text
+
+    store, parsed = restart(tmp_path)
+    store.scan()
+    assert store.items == ["a"] and len(parsed) == 1
+
+
+def test_a_new_fingerprint_clears_the_cache(tmp_path: Path) -> None:
+    cache = ParseCache(tmp_path / "cache.sqlite", "one")
+    cache.sync("note", {"a.md": ((1, 2, 3), None, "a")}, TEXT_CODEC.dumps)
+    assert "a.md" in cache.load("note")
+    cache.close()
+
+    assert ParseCache(tmp_path / "cache.sqlite", "two").load("note") == {}
+
+
+@pytest.mark.parametrize("lazy_bodies", [False, True])
+def test_codecs_rebuild_every_item_exactly(
+    make_client: Callable[..., TestClient], tmp_path: Path, lazy_bodies: bool
+) -> None:
+    workouts: Path = tmp_path / "contents" / "workout"
+    workouts.mkdir(parents=True)
+    (workouts / "20240102-073000.md").write_text(WORKOUT)
+    client = make_client(lazy_bodies=lazy_bodies, write_wait=True)
+    client.post(
+        "/api/media",
+        json={
+            "name": "Show",
+            "country": "korea",
+            "type": "drama",
+            "status": "watched",
+            "rating": "8",
+            "review": "é ✓",
+        },
+    )
+    habit: dict = {"name": "Run", "days": [1, 3], "color": "#fff"}
+    client.post("/api/habit", json={**habit, "completions": ["2024-01-01", "x"]})
+    client.post("/api/habit/run/shift", json={"from": "2024-01-01"})
+    client.post("/api/activity", json={"name": "Yoga", "date": "2024-01-02"})
+    client.post("/api/preset", json={"name": "Yoga"})
+    client.post(
+        "/api/template",
+        json={
+            "name": "Legs",
+            "groups": [{"name": "a", "rest_seconds": 60, "exercises": []}],
+        },
+    )
+    task: dict = client.post("/api/task", json={"title": "Plan", "notes": "n"}).json()
+    client.post(
+        "/api/task",
+        json={
+            "title": "Step",
+            "parent": task["id"],
+            "status": "closed",
+            "do_date": "2024-02-01",
+        },
+    )
+
+    for name, codec in ITEM_CODECS.items():
+        store: FileStore = client.app.state.stores[name]
+        paths: list[Path] = sorted(store.directory.glob("*.md"))
+        assert paths, name
+        for path in paths:
+            item = store.get(path)
+            text: str | None = codec.dumps(item, path)
+            assert text is not None, path
+            rebuilt = codec.loads(text, path)
+            assert rebuilt == item, path
+            # also tells 1 from 1.0, such as a hand-written integer weight
+            assert codec.dumps(rebuilt, path) == text, path
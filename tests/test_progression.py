@@ -0,0 +1,124 @@
+"""Behavior tests for the per-exercise progression index and its routes."""
+
+import math
+import random
+from datetime import date, time, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.models import Exercise, ExerciseGroup, Workout, WorkoutSet
+from app.progression import ProgressionIndex, SessionSummary, estimated_1rm
+
+NAMES: list[str] = ["Squat", "squat ", "Bench  Press", "Pull Up"]
+
+
+def make_workout(day: date, at: time, rng: random.Random) -> Workout:
+    return Workout(
+        date=day,
+        time=at,
+        groups=[
+            ExerciseGroup(
+                name="main",
+                rest_seconds=90,
+                exercises=[
+                    Exercise(
+                        name=name,
+                        sets=[
+                            WorkoutSet(
+                                reps=rng.choice([None, 1, 5, 8]),
+                                weight=rng.choice([None, 40.0, 60.0, 62.5]),
+                            )
+                            for _ in range(rng.randint(1, 3))
+                        ],
+                    )
+                    for name in rng.sample(NAMES, 2)
+                ],
+            )
+        ],
+        content="",
+    )
+
+
+def test_session_summary() -> None:
+    summary = SessionSummary.of(
+        [
+            WorkoutSet(reps=5, weight=60.0),
+            WorkoutSet(reps=8, weight=60.0),
+            WorkoutSet(reps=3, weight=50.0),
+            WorkoutSet(reps=12),
+        ]
+    )
+
+    assert (summary.best_weight, summary.best_reps, summary.sets) == (60.0, 8, 4)
+    assert summary.volume == 5 * 60 + 8 * 60 + 3 * 50
+    assert summary.e1rm == estimated_1rm(8, 60.0) == 60 * (1 + 8 / 30)
+    bodyweight = SessionSummary.of([WorkoutSet(reps=10), WorkoutSet(reps=12)])
+    assert math.isnan(bodyweight.best_weight) and bodyweight.best_reps == 12
+    assert math.isnan(bodyweight.e1rm) and bodyweight.volume == 0
+
+
+def test_incremental_updates_match_a_rebuild() -> None:
+    rng = random.Random(18)
+    index = ProgressionIndex()
+    live: dict[str, Workout] = {}
+    for _ in range(60):
+        day: date = date(2024, 1, 1) + timedelta(days=rng.randint(0, 20))
+        added: Workout = make_workout(day, time(rng.choice([7, 18])), rng)
+        # a workout on a taken slot is an edit: its old version is removed
+        removed: list[Workout] = [live[added.id]] if added.id in live else []
+        if live and rng.random() < 0.3:
+            removed.append(live.pop(rng.choice(list(live))))
+        live[added.id] = added
+        index.update(removed, [added])
+
+    rebuilt = ProgressionIndex()
+    rebuilt.update([], list(live.values()))
+    assert {k: s.to_dict() for k, s in index.series.items()} == {
+        k: s.to_dict() for k, s in rebuilt.series.items()
+    }
+    assert set(index.series) <= {"squat", "bench press", "pull up"}
+
+
+def test_progression_routes(client: TestClient) -> None:
+    for day, weight in (
+        ("2024-01-03", 100.0),
+        ("2024-01-01", 90.0),
+        ("2024-01-05", None),
+    ):
+        client.post(
+            "/api/workout",
+            json={
+                "date": day,
+                "time": "07:00:00",
+                "groups": [
+                    {
+                        "name": "legs",
+                        "rest_seconds": 90,
+                        "exercises": [
+                            {
+                                "name": "Back Squat",
+                                "sets": [{"reps": 5, "weight": weight}],
+                            }
+                        ],
+                    }
+                ],
+            },
+        )
+
+    assert client.get("/api/exercises").json() == [
+        {
+            "name": "Back Squat",
+            "sessions": 3,
+            "first": "2024-01-01",
+            "last": "2024-01-05",
+        }
+    ]
+    series: dict = client.get(
+        "/api/exercises/progression",
+        params={"name": "back  SQUAT", "start": "2024-01-02"},
+    ).json()
+    assert series["dates"] == ["2024-01-03", "2024-01-05"]
+    assert series["best_weight"] == [100.0, None]
+    assert series["volume"] == [500.0, 0.0]
+    missing = client.get("/api/exercises/progression", params={"name": "Deadlift"})
+    assert missing.status_code == 404
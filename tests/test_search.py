@@ -0,0 +1,119 @@
+"""Behavior tests for the full-text search index, its route and the chat tool."""
+
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.routes.tasks import _execute_tool
+from app.search import SearchIndex, count_terms
+
+MEDIA: dict = {
+    "name": "Dragon Tales",
+    "country": "korea",
+    "type": "drama",
+    "status": "watched",
+    "rating": "8",
+}
+
+
+@dataclass(eq=False)
+class Doc:
+    id: str
+    title: str
+    body: str
+
+
+def add(index: SearchIndex, doc: Doc, collection: str = "note") -> None:
+    index.add(
+        collection, doc, doc.title, count_terms(doc.title, doc.body), lambda d: d.body
+    )
+
+
+def make_index(*docs: Doc) -> SearchIndex:
+    index = SearchIndex()
+    for doc in docs:
+        add(index, doc)
+    return index
+
+
+def ids(index: SearchIndex, query: str, **kwargs) -> list[str]:
+    return [hit.item.id for hit in index.search(query, **kwargs)]
+
+
+def test_title_matches_outrank_body_matches() -> None:
+    index = make_index(
+        Doc("body", "Groceries", "buy milk for the workout shake"),
+        Doc("title", "Workout plan", "legs on monday"),
+        Doc("other", "Reading", "a novel"),
+    )
+
+    assert ids(index, "workout") == ["title", "body"]
+    assert ids(index, "WORKOUT   plan") == ["title"]
+    assert ids(index, "workout novel") == []
+
+
+def test_prefixes_match_and_rank_below_exact_terms() -> None:
+    index = make_index(
+        Doc("prefix", "Working late", ""),
+        Doc("exact", "Work", ""),
+    )
+
+    assert ids(index, "work") == ["exact", "prefix"]
+    assert ids(index, "wor") == ["exact", "prefix"]
+    # a single character only matches the term exactly
+    assert ids(index, "w") == []
+
+
+def test_documents_are_replaced_and_removed() -> None:
+    first = Doc("a", "Alpha", "old words")
+    index = make_index(first, Doc("b", "Beta", "old words"))
+    replaced = Doc("a", "Alpha", "new")
+    add(index, replaced)
+
+    assert ids(index, "old") == ["b"]
+    index.remove("note", first)
+    assert ids(index, "new") == ["a"]
+    index.remove("note", replaced)
+    assert ids(index, "alpha") == [] and len(index) == 1
+
+
+def test_collections_filter_and_snippets() -> None:
+    index = make_index(Doc("n", "Notes", "x " * 100 + "the dragon appears"))
+    add(index, Doc("m", "Dragon", ""), collection="media")
+
+    assert ids(index, "dragon", collections=["note"]) == ["n"]
+    hit = index.search("dragon", ["note"])[0]
+    assert hit.snippet.startswith("…") and "the dragon appears" in hit.snippet
+
+
+def test_search_route(client: TestClient) -> None:
+    client.post("/api/media", json={**MEDIA, "review": "about a dragon"})
+    client.post("/api/task", json={"title": "Watch dragon documentary"})
+
+    hits: list[dict] = client.get("/api/search", params={"q": "drag"}).json()
+    assert {(h["collection"], h["title"]) for h in hits} == {
+        ("media", "Dragon Tales"),
+        ("task", "Watch dragon documentary"),
+    }
+    only = client.get("/api/search", params={"q": "drag", "collection": "task"})
+    assert [h["collection"] for h in only.json()] == ["task"]
+    unknown = client.get("/api/search", params={"q": "x", "collection": "nope"})
+    assert unknown.status_code == 422
+
+
+def test_chat_search_tool_matches_substrings(client: TestClient) -> None:
+    client.post("/api/task", json={"title": "Morning workout"})
+    client.post("/api/task", json={"title": "Groceries", "notes": "get a new fork"})
+    client.post("/api/task", json={"title": "Reading"})
+    request = SimpleNamespace(app=client.app)
+
+    result, changed = client.portal.call(
+        _execute_tool, "search_tasks", {"query": "ORK"}, request
+    )
+
+    assert not changed
+    assert [line.split("] ")[1].split(" —")[0] for line in result.splitlines()] == [
+        "Groceries",
+        "Morning workout",
+    ]
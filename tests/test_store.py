@@ -0,0 +1,182 @@
+"""Behavior tests for FileStore scans, write-through and index deltas."""
+
+from pathlib import Path
+
+import pytest
+
+from app.store import FileStore, StoreIndex
+
+
+class Recorder(StoreIndex[str]):
+    """Collects every (removed, added) delta a store publishes."""
+
+    def __init__(self) -> None:
+        self.deltas: list[tuple[list[str], list[str]]] = []
+
+    def update(self, removed: list[str], added: list[str]) -> None:
+        self.deltas.append((sorted(removed), sorted(added)))
+
+
+def make_store(directory: Path) -> tuple[FileStore[str], list[Path]]:
+    """Return a store of file texts and the list of paths it parsed."""
+    parsed: list[Path] = []
+
+    def parse(path: Path) -> str:
+        parsed.append(path)
+        return path.read_text()
+
+    return FileStore(name="note", directory=directory, parse=parse), parsed
+
+
+def test_first_scan_parses_only_owned_files(tmp_path: Path) -> None:
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("b")
+    (tmp_path / "c.txt").write_text("c")
+    (tmp_path / ".a.md.tmp").write_text("staged")
+    store, parsed = make_store(tmp_path)
+
+    stats = store.scan()
+
+    assert sorted(store.items) == ["a", "b"]
+    assert stats.parsed == 2 and stats.statted == 2
+    assert sorted(p.name for p in parsed) == ["a.md", "b.md"]
+
+
+def test_unchanged_rescan_parses_nothing(tmp_path: Path) -> None:
+    (tmp_path / "a.md").write_text("a")
+    store, parsed = make_store(tmp_path)
+    store.scan()
+    parsed.clear()
+
+    stats = store.scan()
+
+    assert parsed == []
+    assert stats.statted == 1 and not stats.changed
+
+
+def test_rescan_reparses_only_changed_files(tmp_path: Path) -> None:
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("b")
+    store, parsed = make_store(tmp_path)
+    store.scan()
+    parsed.clear()
+
+    (tmp_path / "b.md").write_text("b edited")
+    (tmp_path / "a.md").unlink()
+    (tmp_path / "c.md").write_text("c")
+    stats = store.scan()
+
+    assert sorted(p.name for p in parsed) == ["b.md", "c.md"]
+    assert (stats.parsed, stats.removed) == (2, 1)
+    assert sorted(store.items) == ["b edited", "c"]
+
+
+def test_refresh_checks_only_the_given_paths(tmp_path: Path) -> None:
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("b")
+    store, parsed = make_store(tmp_path)
+    store.scan()
+    parsed.clear()
+
+    (tmp_path / "a.md").write_text("a edited")
+    (tmp_path / "b.md").write_text("b edited")
+    (tmp_path / "c.md").write_text("c")
+    stats = store.refresh([tmp_path / "a.md", tmp_path / "c.md", tmp_path / "x.txt"])
+
+    assert sorted(p.name for p in parsed) == ["a.md", "c.md"]
+    assert stats.statted == 2
+    assert sorted(store.items) == ["a edited", "b", "c"]
+
+    (tmp_path / "c.md").unlink()
+    assert store.refresh([tmp_path / "c.md"]).removed == 1
+    assert store.get(tmp_path / "c.md") is None
+
+
+def test_publish_feeds_indexes_item_deltas(tmp_path: Path) -> None:
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("b")
+    store, _ = make_store(tmp_path)
+    recorder = Recorder()
+    store.indexes.append(recorder)
+
+    store.scan()
+    assert recorder.deltas == []
+    assert sorted(store.publish()) == ["a", "b"]
+    assert recorder.deltas == [([], ["a", "b"])]
+    generation: int = store.generation
+
+    (tmp_path / "a.md").write_text("a edited")
+    store.scan()
+    store.publish()
+    assert recorder.deltas[-1] == (["a"], ["a edited"])
+    assert store.generation == generation + 1
+
+    store.scan()
+    store.publish()
+    assert len(recorder.deltas) == 2
+    assert store.generation == generation + 1
+
+
+def test_store_index_requires_update() -> None:
+    class Incomplete(StoreIndex[str]):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_apply_writes_through_without_reparsing(tmp_path: Path) -> None:
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("b")
+    store, parsed = make_store(tmp_path)
+    recorder = Recorder()
+    store.indexes.append(recorder)
+    store.scan()
+    store.publish()
+    parsed.clear()
+
+    (tmp_path / "a.md").write_text("a written")
+    (tmp_path / "c.md").write_text("c")
+    (tmp_path / "b.md").unlink()
+    store.apply(
+        {tmp_path / "a.md": "a written", tmp_path / "c.md": "c"},
+        removes=[tmp_path / "b.md"],
+    )
+    store.publish()
+
+    assert sorted(store.items) == ["a written", "c"]
+    assert recorder.deltas[-1] == (["a", "b"], ["a written", "c"])
+    assert not store.scan().changed
+    assert parsed == []
+
+
+def test_pending_writes_are_skipped_until_settled(tmp_path: Path) -> None:
+    path: Path = tmp_path / "a.md"
+    path.write_text("a")
+    store, parsed = make_store(tmp_path)
+    store.scan()
+    parsed.clear()
+
+    store.apply({path: "a queued"}, pending=True)
+    assert store.get(path) == "a queued"
+    # the disk still holds the old text, but the queued item wins
+    store.scan()
+    assert store.get(path) == "a queued" and parsed == []
+
+    path.write_text("a queued")
+    store.settle([path])
+    assert not store.scan().changed
+    assert parsed == []
+
+
+def test_failed_writes_are_reread_from_disk(tmp_path: Path) -> None:
+    path: Path = tmp_path / "a.md"
+    path.write_text("a")
+    store, parsed = make_store(tmp_path)
+    store.scan()
+
+    store.apply({path: "never written"}, pending=True)
+    store.settle([], failed=[path])
+    store.scan()
+
+    assert store.get(path) == "a"
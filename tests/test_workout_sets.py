@@ -0,0 +1,181 @@
+"""Behavior tests for the columnar workout set store and its stats."""
+
+import random
+from collections import defaultdict
+from datetime import date, time, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import workout_sets
+from app.models import Exercise, ExerciseGroup, Workout, WorkoutSet
+from app.progression import estimated_1rm, exercise_key
+from app.workout_sets import WorkoutSetStore
+
+GROUPS: dict[str, list[str]] = {
+    "push": ["Bench Press", "Dips"],
+    "pull": ["Deadlift", "Pull Up"],
+}
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Run a test over both the NumPy and the plain-loop stats paths."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(workout_sets, "np", None)
+    return request.param
+
+
+def make_workouts(count: int, rng: random.Random) -> list[Workout]:
+    """Return workouts on distinct days, with some bodyweight and empty sets."""
+    days: list[int] = sorted(rng.sample(range(200), count))
+    return [
+        Workout(
+            date=date(2024, 1, 1) + timedelta(days=day),
+            time=time(7),
+            groups=[
+                ExerciseGroup(
+                    name=name,
+                    rest_seconds=90,
+                    exercises=[
+                        Exercise(
+                            name=exercise,
+                            sets=[
+                                WorkoutSet(
+                                    reps=rng.choice([None, 1, 3, 5, 10]),
+                                    weight=rng.choice([None, 20.0, 40.0, 60.0]),
+                                )
+                                for _ in range(rng.randint(1, 3))
+                            ],
+                        )
+                        for exercise in GROUPS[name]
+                    ],
+                )
+                for name in rng.sample(list(GROUPS), rng.randint(1, 2))
+            ],
+            content="",
+        )
+        for day in days
+    ]
+
+
+def naive_stats(workouts: list[Workout], start: date, end: date) -> dict:
+    """Compute the stats by walking the Workout dataclasses."""
+    tonnage: dict[date, float] = defaultdict(float)
+    groups: dict[str, int] = defaultdict(int)
+    record: dict[str, float] = {}
+    prs: list[dict] = []
+    for workout in sorted(workouts, key=lambda w: w.date):
+        if workout.date > end:
+            break
+        in_range: bool = workout.date >= start
+        week: date = workout.date - timedelta(days=workout.date.toordinal() % 7)
+        best: dict[str, tuple[float, WorkoutSet]] = {}
+        for group in workout.groups:
+            for exercise in group.exercises:
+                for s in exercise.sets:
+                    groups[group.name] += in_range
+                    if s.weight is None:
+                        continue
+                    tonnage[week] += in_range * (s.reps or 0) * s.weight
+                    e1rm: float = estimated_1rm(s.reps or 0, s.weight)
+                    key: str = exercise_key(exercise.name)
+                    if s.reps and (key not in best or e1rm > best[key][0]):
+                        best[key] = (e1rm, s)
+        for key, (e1rm, s) in best.items():
+            if in_range and key in record and e1rm > record[key]:
+                prs.append(
+                    {
+                        "exercise": key,
+                        "date": workout.date.isoformat(),
+                        "weight": s.weight,
+                        "reps": s.reps,
+                        "e1rm": round(e1rm, 3),
+                    }
+                )
+            record[key] = max(record.get(key, e1rm), e1rm)
+    return {
+        "weekly_tonnage": [(w, round(t, 3)) for w, t in sorted(tonnage.items()) if t],
+        "sets_per_group": {name: n for name, n in sorted(groups.items()) if n},
+        "personal_records": sorted(prs, key=lambda r: (r["date"], r["exercise"])),
+    }
+
+
+def store_stats(store: WorkoutSetStore, start: date, end: date) -> dict:
+    return {
+        "weekly_tonnage": [(w, t) for w, t in store.weekly_tonnage(start, end) if t],
+        "sets_per_group": dict(sorted(store.sets_per_group(start, end).items())),
+        "personal_records": store.personal_records(start, end),
+    }
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_stats_match_naive_iteration(backend: str, seed: int) -> None:
+    rng = random.Random(seed)
+    live: list[Workout] = make_workouts(60, rng)
+    store = WorkoutSetStore()
+    store.update([], live)
+
+    # drop enough workouts to compact the columns, then add some back
+    removed: list[Workout] = rng.sample(live, 30)
+    live = [w for w in live if w not in removed]
+    store.update(removed, removed[:10])
+    live += removed[:10]
+
+    assert len(store) == sum(
+        len(e.sets) for w in live for g in w.groups for e in g.exercises
+    )
+    for start, end in (
+        (date(2024, 1, 1), date(2024, 12, 31)),
+        (date(2024, 3, 1), date(2024, 5, 1)),
+    ):
+        assert store_stats(store, start, end) == naive_stats(live, start, end)
+
+
+def test_empty_store(backend: str) -> None:
+    store = WorkoutSetStore()
+
+    assert store.weekly_tonnage() == []
+    assert store.sets_per_group() == {}
+    assert store.personal_records() == []
+
+
+def test_workout_stats_route(client: TestClient) -> None:
+    for day, weight in (("2024-01-01", 100.0), ("2024-01-08", 110.0)):
+        client.post(
+            "/api/workout",
+            json={
+                "date": day,
+                "time": "07:00:00",
+                "groups": [
+                    {
+                        "name": "legs",
+                        "rest_seconds": 90,
+                        "exercises": [
+                            {
+                                "name": "Squat",
+                                "sets": [{"reps": 1, "weight": weight}] * 2,
+                            }
+                        ],
+                    }
+                ],
+            },
+        )
+
+    stats: dict = client.get(
+        "/api/workout-stats", params={"start": "2024-01-02"}
+    ).json()
+
+    assert stats["weekly_tonnage"] == [{"week": "2024-01-07", "tonnage": 220.0}]
+    assert stats["sets_per_group"] == {"legs": 2}
+    assert stats["personal_records"] == [
+        {
+            "exercise": "squat",
+            "date": "2024-01-08",
+            "weight": 110.0,
+            "reps": 1,
+            "e1rm": 110.0,
+        }
+    ]
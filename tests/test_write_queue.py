@@ -0,0 +1,168 @@
+"""Behavior tests for the coalescing write queue and the write-behind routes."""
+
+import asyncio
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import frontmatter
+import pytest
+from fastapi.testclient import TestClient
+
+from app import write_queue
+from app.write_queue import WriteFailed, WriteQueue
+
+HABIT: dict = {"name": "Run", "days": [1], "color": "#fff"}
+
+
+def post(text: str) -> frontmatter.Post:
+    return frontmatter.Post(content=text)
+
+
+def make_queue(
+    delay_seconds: float = 60,
+) -> tuple[WriteQueue, list[tuple[str, list[Path], list[Path]]]]:
+    """Return a queue and the list its flush callbacks are recorded in."""
+    flushed: list[tuple[str, list[Path], list[Path]]] = []
+
+    async def on_flushed(store: str, written: list[Path], failed: list[Path]) -> None:
+        flushed.append((store, written, failed))
+
+    return WriteQueue(on_flushed=on_flushed, delay_seconds=delay_seconds), flushed
+
+
+def test_changes_to_one_file_are_coalesced(tmp_path: Path) -> None:
+    path: Path = tmp_path / "a.md"
+
+    async def run() -> None:
+        queue, flushed = make_queue()
+        queue.put("note", path, post("one"))
+        queue.put("note", path, post("two"))
+        assert queue.depth == 1 and not path.exists()
+
+        await queue.flush()
+        assert frontmatter.load(path).content == "two"
+        assert flushed == [("note", [path], [])]
+        assert (queue.stats.queued, queue.stats.coalesced) == (2, 1)
+        assert queue.stats.written == 1
+
+        queue.put("note", path, None)
+        await queue.close()
+        assert not path.exists() and queue.stats.deleted == 1
+
+    asyncio.run(run())
+
+
+def test_queue_flushes_after_its_delay(tmp_path: Path) -> None:
+    path: Path = tmp_path / "a.md"
+
+    async def run() -> None:
+        queue, flushed = make_queue(delay_seconds=0.01)
+        queue.put("note", path, post("one"))
+        await asyncio.sleep(0.2)
+        assert path.exists() and len(flushed) == 1
+        await queue.close()
+
+    asyncio.run(run())
+
+
+def test_waiting_for_a_write_flushes_right_away(tmp_path: Path) -> None:
+    path: Path = tmp_path / "a.md"
+
+    async def run() -> None:
+        queue, _ = make_queue(delay_seconds=60)
+        queue.put("note", path, post("one"))
+        await asyncio.wait_for(queue.written(path), timeout=5)
+        assert path.exists()
+        await queue.close()
+
+    asyncio.run(run())
+
+
+def test_failed_writes_are_reported(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    good: Path = tmp_path / "good.md"
+    bad: Path = tmp_path / "bad.md"
+    real = write_queue.write_post
+
+    def failing(post: frontmatter.Post, path: Path) -> None:
+        if path == bad:
+            raise OSError("disk full")
+        real(post, path)
+
+    monkeypatch.setattr(write_queue, "write_post", failing)
+
+    async def run() -> None:
+        queue, flushed = make_queue()
+        queue.put("note", good, post("good"))
+        queue.put("note", bad, post("bad"))
+        waiting = queue.written(bad)
+        with pytest.raises(WriteFailed, match="disk full"):
+            await waiting
+        assert flushed == [("note", [good], [bad])]
+        assert queue.stats.failed == 1
+        assert queue.stats.last_error == "bad.md: disk full"
+        await queue.close()
+
+    asyncio.run(run())
+
+
+def test_mutations_respond_before_the_write_by_default(
+    make_client: Callable[..., TestClient], tmp_path: Path
+) -> None:
+    client = make_client(write_flush_ms=60000)
+    path: Path = tmp_path / "contents" / "habits" / "run.md"
+
+    assert client.post("/api/habit", json=HABIT).status_code == 200
+    assert not path.exists()
+    assert client.get("/api/habit/run").json()["name"] == "Run"
+
+    client.portal.call(client.app.state.write_queue.flush)
+    assert path.exists()
+
+
+def test_write_wait_responds_after_the_write(
+    make_client: Callable[..., TestClient], tmp_path: Path
+) -> None:
+    client = make_client(write_flush_ms=60000, write_wait=True)
+    start: float = time.monotonic()
+
+    assert client.post("/api/habit", json=HABIT).status_code == 200
+    assert (tmp_path / "contents" / "habits" / "run.md").exists()
+    assert time.monotonic() - start < 30
+
+
+def test_failed_write_is_rolled_back_and_reported(
+    make_client: Callable[..., TestClient], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client = make_client(write_flush_ms=60000)
+    client.post("/api/habit", json=HABIT)
+    client.portal.call(client.app.state.write_queue.flush)
+
+    def failing(post: frontmatter.Post, path: Path) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(write_queue, "write_post", failing)
+    assert client.post("/api/habit/run/toggle/2025-01-01").status_code == 200
+    assert client.get("/api/habit/run").json()["completions"] == ["2025-01-01"]
+
+    client.portal.call(client.app.state.write_queue.flush)
+    assert client.get("/api/habit/run").json()["completions"] == []
+    assert "run.md: disk full" in client.get("/api/meta/writes").json()["last_error"]
+
+
+def test_failed_write_is_a_500_with_write_wait(
+    make_client: Callable[..., TestClient], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client = make_client(write_wait=True)
+    client.post("/api/habit", json=HABIT)
+
+    def failing(post: frontmatter.Post, path: Path) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(write_queue, "write_post", failing)
+    response = client.post("/api/habit/run/toggle/2025-01-01")
+
+    assert response.status_code == 500 and "disk full" in response.text
+    assert client.get("/api/habit/run").json()["completions"] == []
@@ -0,0 +1,91 @@
+"""Behavior tests for atomic, fsynced markdown writes."""
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import frontmatter
+import pytest
+
+from app import writer
+
+
+@pytest.fixture(autouse=True)
+def reset_durability() -> Iterator[None]:
+    yield
+    writer.configure_durability("none")
+
+
+def post(text: str) -> frontmatter.Post:
+    result = frontmatter.Post(content=text)
+    result["name"] = text
+    return result
+
+
+@pytest.mark.parametrize("mode", writer.DURABILITY_MODES)
+def test_write_replaces_the_file_and_leaves_no_temp_file(
+    tmp_path: Path, mode: str
+) -> None:
+    writer.configure_durability(mode, 0.01)
+    path: Path = tmp_path / "a.md"
+    writer.write_post(post("one"), path)
+    writer.write_post(post("two"), path)
+    writer.close_durability()
+
+    assert frontmatter.load(path).content == "two"
+    assert [p.name for p in tmp_path.iterdir()] == ["a.md"]
+
+
+@pytest.mark.parametrize("mode", ["fsync", "group"])
+def test_data_is_fsynced_before_the_rename(
+    tmp_path: Path, mode: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    writer.configure_durability(mode, 0.01)
+    events: list[str] = []
+    fsync, replace = os.fsync, os.replace
+
+    def recording_fsync(fd: int) -> None:
+        events.append("fsync-dir" if os.path.isdir(f"/proc/self/fd/{fd}") else "fsync")
+        fsync(fd)
+
+    def recording_replace(src: Path, dst: Path) -> None:
+        events.append("rename")
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "fsync", recording_fsync)
+    monkeypatch.setattr(os, "replace", recording_replace)
+    writer.write_post(post("one"), tmp_path / "a.md")
+    writer.close_durability()
+
+    assert events == ["fsync", "rename", "fsync-dir"]
+
+
+def test_group_mode_syncs_each_directory_once_per_window(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    writer.configure_durability("group", 60)
+    synced: list[Path] = []
+    monkeypatch.setattr(writer, "_fsync_dir", synced.append)
+    for name in ("a.md", "b.md", "c.md"):
+        writer.write_post(post(name), tmp_path / name)
+    assert synced == []
+
+    writer.close_durability()
+    assert synced == [tmp_path]
+
+
+def test_failed_write_keeps_the_old_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path: Path = tmp_path / "a.md"
+    writer.write_post(post("one"), path)
+
+    def failing_dump(*args: object, **kwargs: object) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(writer.frontmatter, "dump", failing_dump)
+    with pytest.raises(OSError):
+        writer.write_post(post("two"), path)
+
+    assert frontmatter.load(path).content == "one"
+    assert [p.name for p in tmp_path.iterdir()] == ["a.md"]